@@ -1,7 +1,229 @@
 from abc import ABC, abstractmethod
-from typing import Dict
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+import os
+import tempfile
+import threading
+import numpy as np  # type: ignore
 import pandas as pd  # type: ignore
 
+from app.utils.log import Log
+from app.utils.profiling import Profiler
+from app.utils.singleton import Singleton
+
+
+def _freezable(dtype) -> bool:
+    # pandas cannot compare read-only object arrays, so only the
+    # plain numeric and datetime columns are frozen
+    return isinstance(dtype, np.dtype) and dtype.kind in "biufcmM"
+
+
+def _read_only(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Constrói um DataFrame cujas colunas numéricas não podem ser
+    alteradas no local, a partir de cópias das colunas do original.
+    """
+    columns = {}
+    for c in df.columns:
+        if _freezable(df[c].dtype):
+            values = df[c].to_numpy(copy=True)
+            values.flags.writeable = False
+            columns[c] = values
+        else:
+            columns[c] = df[c].array.copy()
+    return pd.DataFrame(columns, index=df.index, copy=False)
+
+
+def _view(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Constrói uma visão de um DataFrame do cache, que compartilha as
+    colunas somente leitura e copia as demais.
+    """
+    view = df.copy(deep=False)
+    for c in view.columns:
+        if not _freezable(view[c].dtype):
+            view[c] = view[c].copy()
+    return view
+
+
+SIDECAR_VERSION = 1
+SIDECAR_EXTENSION = ".npz"
+CATEGORICAL_COLUMNS = ["cluster"]
+DATE_COLUMNS = {"data_hora": "%Y-%m-%d"}
+
+
+def _read_csv(path: str) -> pd.DataFrame:
+    """
+    Lê um arquivo da clusterização, convertendo os nomes dos clusters
+    para categorias e as datas para datetime64.
+    """
+    df = pd.read_csv(path, index_col=None)
+    for c in CATEGORICAL_COLUMNS:
+        if c in df.columns:
+            df[c] = df[c].astype("category")
+    for c, fmt in DATE_COLUMNS.items():
+        if c in df.columns:
+            try:
+                df[c] = pd.to_datetime(df[c], format=fmt)
+            except (ValueError, TypeError):
+                # Left as text for the validation to report
+                pass
+    return df
+
+
+def _sidecar_signature(stat: os.stat_result) -> np.ndarray:
+    return np.array(
+        [SIDECAR_VERSION, stat.st_mtime_ns, stat.st_size], dtype=np.int64
+    )
+
+
+def _load_sidecar(path: str, stat: os.stat_result) -> Optional[pd.DataFrame]:
+    """
+    Lê o arquivo binário associado a um CSV, se existir e tiver sido
+    gerado a partir da versão atual do CSV.
+    """
+    sidecar = path + SIDECAR_EXTENSION
+    if not os.path.isfile(sidecar):
+        return None
+    try:
+        with np.load(sidecar, allow_pickle=False) as data:
+            if not np.array_equal(data["signature"], _sidecar_signature(stat)):
+                return None
+            columns = {}
+            for c in data["columns"].tolist():
+                if f"codes:{c}" in data:
+                    columns[c] = pd.Categorical.from_codes(
+                        data[f"codes:{c}"],
+                        data[f"categories:{c}"].astype(object),
+                    )
+                else:
+                    values = data[f"values:{c}"]
+                    if values.dtype.kind == "U":
+                        values = values.astype(object)
+                    columns[c] = values
+        return pd.DataFrame(columns, copy=False)
+    except Exception:
+        return None
+
+
+def _save_sidecar(path: str, stat: os.stat_result, df: pd.DataFrame):
+    """
+    Escreve o arquivo binário associado a um CSV. Colunas de texto com
+    valores ausentes não são suportadas e, nesse caso, nada é escrito.
+    """
+    arrays = {
+        "signature": _sidecar_signature(stat),
+        "columns": np.array(df.columns, dtype=str),
+    }
+    for c in df.columns:
+        col = df[c]
+        if isinstance(col.dtype, pd.CategoricalDtype):
+            if col.isna().any():
+                return
+            arrays[f"codes:{c}"] = col.cat.codes.to_numpy()
+            arrays[f"categories:{c}"] = np.array(col.cat.categories, dtype=str)
+        elif col.dtype == object:
+            if not all(isinstance(v, str) for v in col):
+                return
+            arrays[f"values:{c}"] = col.to_numpy(dtype=str)
+        else:
+            arrays[f"values:{c}"] = col.to_numpy()
+    directory = os.path.dirname(os.path.abspath(path))
+    try:
+        fd, tmp = tempfile.mkstemp(suffix=SIDECAR_EXTENSION, dir=directory)
+    except OSError:
+        Log.log().warning(
+            f"Não foi possível escrever o cache binário de {path}"
+        )
+        return
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, **arrays)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path + SIDECAR_EXTENSION)
+    except OSError:
+        Log.log().warning(
+            f"Não foi possível escrever o cache binário de {path}"
+        )
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _read_with_sidecar(path: str) -> pd.DataFrame:
+    """
+    Lê um arquivo da clusterização a partir do seu arquivo binário
+    associado, que é reconstruído quando o CSV é alterado.
+    """
+    stat = os.stat(path)
+    df = _load_sidecar(path, stat)
+    if df is None:
+        df = _read_csv(path)
+        _save_sidecar(path, stat, df)
+    return df
+
+
+class ClustersDataCache(metaclass=Singleton):
+    """
+    Cache de processo para os dados da clusterização, indexado pelo
+    caminho, data de modificação e tamanho de cada arquivo. Os dados
+    são entregues como visões somente leitura e os menos usados
+    recentemente são descartados quando o limite de memória é atingido.
+    """
+
+    MAX_BYTES = 512 * 1024 * 1024
+
+    def __init__(self, max_bytes: int = MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, int, int], pd.DataFrame]"
+        self._entries = OrderedDict()
+        self._sizes: Dict[Tuple[str, int, int], int] = {}
+
+    @staticmethod
+    def _key(path: str) -> Tuple[str, int, int]:
+        stat = os.stat(path)
+        return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+    @property
+    def size(self) -> int:
+        return sum(self._sizes.values())
+
+    def get(
+        self, path: str, loader: Callable[[str], pd.DataFrame]
+    ) -> pd.DataFrame:
+        key = self._key(path)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return _view(self._entries[key])
+        df = _read_only(loader(path))
+        size = int(df.memory_usage(deep=True).sum())
+        with self._lock:
+            self.__remove(key[0])
+            if size <= self.max_bytes:
+                self._entries[key] = df
+                self._sizes[key] = size
+                self.__evict()
+        return _view(df)
+
+    def __remove(self, path: str):
+        for key in [k for k in self._entries if k[0] == path]:
+            self._entries.pop(key)
+            self._sizes.pop(key)
+
+    def __evict(self):
+        while self.size > self.max_bytes:
+            key, _ = self._entries.popitem(last=False)
+            self._sizes.pop(key)
+
+    def invalidate(self, path: Optional[str] = None):
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._sizes.clear()
+            else:
+                self.__remove(os.path.abspath(path))
+
 
 class AbstractClustersRepository(ABC):
     @abstractmethod
@@ -24,43 +246,56 @@ class AbstractClustersRepository(ABC):
 class FSClustersRepository(AbstractClustersRepository):
     def __init__(
         self,
+        path: str,
         clusters_file: str,
         installed_capacity_file: str,
         ftm_file: str,
         average_wind_file: str,
+        sidecar: bool = False,
     ):
-        self.__clusters_file = clusters_file
-        self.__installed_capacity_file = installed_capacity_file
-        self.__ftm_file = ftm_file
-        self.__average_wind_file = average_wind_file
+        self.__sidecar = sidecar
+        self.__clusters_file = os.path.join(path, clusters_file)
+        self.__installed_capacity_file = os.path.join(
+            path, installed_capacity_file
+        )
+        self.__ftm_file = os.path.join(path, ftm_file)
+        self.__average_wind_file = os.path.join(path, average_wind_file)
         self.__clusters = None
         self.__installed_capacity = None
         self.__ftm = None
         self.__average_wind = None
 
+    def __read(self, path: str) -> pd.DataFrame:
+        loader = _read_with_sidecar if self.__sidecar else _read_csv
+
+        def load(path: str) -> pd.DataFrame:
+            # Only the readings that miss the cache are recorded
+            name = os.path.basename(path)
+            with Profiler.span(f"leitura {name}", "leitura"):
+                return loader(path)
+
+        return ClustersDataCache().get(path, load)
+
     def get_clusters(self) -> pd.DataFrame:
         if self.__clusters is None:
-            self.__clusters = pd.read_csv(self.__clusters_file, index_col=None)
+            self.__clusters = self.__read(self.__clusters_file)
         return self.__clusters
 
     def get_ftm(self) -> pd.DataFrame:
         if self.__ftm is None:
-            self.__ftm = pd.read_csv(self.__ftm_file, index_col=None)
+            self.__ftm = self.__read(self.__ftm_file)
         return self.__ftm
 
     def get_installed_capacity(self) -> pd.DataFrame:
         if self.__installed_capacity is None:
-            self.__installed_capacity = pd.read_csv(
-                self.__installed_capacity_file,
-                index_col=None,
+            self.__installed_capacity = self.__read(
+                self.__installed_capacity_file
             )
         return self.__installed_capacity
 
     def get_average_wind(self) -> pd.DataFrame:
         if self.__average_wind is None:
-            self.__average_wind = pd.read_csv(
-                self.__average_wind_file, index_col=None
-            )
+            self.__average_wind = self.__read(self.__average_wind_file)
         return self.__average_wind
 
 
@@ -1,7 +1,30 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Type, Optional
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Type,
+    Optional,
+    Union,
+    TypeVar,
+)
+from io import StringIO
+import copy
 import pathlib
-from app.utils.encoding import convert_encoding
+import threading
+from app.utils.encoding import convert_encoding, decode_text
+from app.utils.profiling import Profiler
+from app.utils.registertable import RegisterTableFile
+from app.utils.zipsession import ZipSession
+
+from cfinterface.components.defaultregister import DefaultRegister
+from cfinterface.components.defaultsection import DefaultSection
+from cfinterface.data.registerdata import RegisterData
+from cfinterface.data.sectiondata import SectionData
+from cfinterface.files.registerfile import RegisterFile
+from cfinterface.files.sectionfile import SectionFile
 
 from inewave.newave.caso import Caso
 from inewave.newave.arquivos import Arquivos
@@ -16,6 +39,13 @@ from inewave.newave.eolicafte import EolicaFTE
 from inewave.newave.eolicahistorico import EolicaHistorico
 from inewave.newave.eolicageracao import EolicaGeracao
 
+T = TypeVar("T")
+
+# The cfinterface lines keep the field values in class attributes
+# shared by every file of a type, so reading and writing must not
+# happen concurrently within a process
+FILES_LOCK = threading.RLock()
+
 
 class AbstractNewaveRepository(ABC):
     @property
@@ -57,7 +87,7 @@ class AbstractNewaveRepository(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    def set_eolicacadastro(self, d: EolicaCadastro):
+    def set_eolicacadastro(self, d: Union[EolicaCadastro, RegisterTableFile]):
         raise NotImplementedError
 
     @abstractmethod
@@ -65,11 +95,13 @@ class AbstractNewaveRepository(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    def set_eolicaposto(self, d: EolicaPosto):
+    def set_eolicaposto(self, d: Union[EolicaPosto, RegisterTableFile]):
         raise NotImplementedError
 
     @abstractmethod
-    def set_eolicaconfiguracao(self, d: EolicaConfiguracao):
+    def set_eolicaconfiguracao(
+        self, d: Union[EolicaConfiguracao, RegisterTableFile]
+    ):
         raise NotImplementedError
 
     @abstractmethod
@@ -77,32 +109,145 @@ class AbstractNewaveRepository(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    def set_eolicasubmercado(self, d: EolicaSubmercado):
+    def set_eolicasubmercado(
+        self, d: Union[EolicaSubmercado, RegisterTableFile]
+    ):
         raise NotImplementedError
 
     @abstractmethod
-    def set_eolicafte(self, d: EolicaFTE):
+    def set_eolicafte(self, d: Union[EolicaFTE, RegisterTableFile]):
         raise NotImplementedError
 
     @abstractmethod
-    def set_eolicageracao(self, d: EolicaGeracao):
+    def set_eolicageracao(self, d: Union[EolicaGeracao, RegisterTableFile]):
         raise NotImplementedError
 
     @abstractmethod
-    def set_histventos(self, d: EolicaHistorico):
+    def set_histventos(self, d: Union[EolicaHistorico, RegisterTableFile]):
         raise NotImplementedError
 
 
-class FSNewaveRepository(AbstractNewaveRepository):
-    def __init__(self, path: str, caso: str, encoding_script: str):
-        self.__path = path
-        self.__caso = Caso.le_arquivo(str(self.__path), caso)
-        self.__encoding_script = encoding_script
+class CachedNewaveRepository(AbstractNewaveRepository):
+    """
+    Mantém uma única instância de cada arquivo lido ou alterado durante
+    o processamento. Os arquivos alterados são marcados e escritos
+    uma única vez, quando é feito o flush. Opcionalmente, mantém também
+    os arquivos como foram lidos, para que sejam restaurados sem uma
+    nova leitura.
+    """
+
+    GENERATED_FILES = [
+        "eolica-cadastro.csv",
+        "eolica-submercado.csv",
+        "eolica-config.csv",
+        "eolica-fte.csv",
+        "eolica-posto.csv",
+        "hist-ventos.csv",
+        "eolica-geracao.csv",
+    ]
+
+    def __init__(self, caso: str, keep_originals: bool = False):
+        self.__files: Dict[str, Any] = {}
+        self.__dirty: Dict[str, None] = {}
+        self.__keep_originals = keep_originals
+        self.__originals: Dict[str, Any] = {}
+        self.__caso = self.__get(Caso, caso)
         self.__arquivos: Optional[Arquivos] = None
 
+    @abstractmethod
+    def _read(self, filetype: Type[T], filename: str) -> T:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _write(
+        self,
+        file: Union[SectionFile, RegisterFile, RegisterTableFile],
+        filename: str,
+    ):
+        raise NotImplementedError
+
+    def __get(self, filetype: Type[T], filename: str) -> T:
+        with FILES_LOCK:
+            if filename not in self.__files:
+                if filename in self.__originals:
+                    file = self.__originals[filename]
+                else:
+                    with Profiler.span(f"leitura {filename}", "leitura"):
+                        file = self._read(filetype, filename)
+                if self.__keep_originals:
+                    # The copies are changed, never the originals
+                    self.__originals[filename] = file
+                    file = copy.deepcopy(file)
+                self.__files[filename] = file
+        file = self.__files[filename]
+        if isinstance(file, RegisterTableFile):
+            # The tables are only turned into registers when some
+            # other file needs their contents
+            with FILES_LOCK, Profiler.span(f"leitura {filename}", "leitura"):
+                return _read_from_buffer(filetype, file.to_text())
+        return file
+
+    def __set(
+        self,
+        file: Union[SectionFile, RegisterFile, RegisterTableFile],
+        filename: str,
+    ):
+        self.__files[filename] = file
+        self.__dirty[filename] = None
+
     @property
-    def caminho(self) -> pathlib.Path:
-        return pathlib.Path(self.__path)
+    def dirty(self) -> List[str]:
+        # The generated files are always written in the same order,
+        # whatever the order of the stages that generated them
+        def rank(filename: str) -> int:
+            if filename in self.GENERATED_FILES:
+                return self.GENERATED_FILES.index(filename)
+            return -1
+
+        return sorted(self.__dirty.keys(), key=rank)
+
+    def flush(self):
+        with FILES_LOCK:
+            for filename in self.dirty:
+                with Profiler.span(f"escrita {filename}", "escrita"):
+                    self._write(self.__files[filename], filename)
+        self.__dirty.clear()
+
+    def flush_to_buffers(self) -> Dict[str, Union[bytes, Iterable[bytes]]]:
+        """
+        Serializa os arquivos alterados em memória, sem escrevê-los
+        no armazenamento do repositório. Os arquivos compostos por
+        tabelas são fornecidos em partes, produzidas durante a escrita.
+        """
+        buffers: Dict[str, Union[bytes, Iterable[bytes]]] = {}
+        with FILES_LOCK:
+            for filename in self.dirty:
+                file = self.__files[filename]
+                if isinstance(file, RegisterTableFile):
+                    buffers[filename] = _counted_bytes(filename, file)
+                else:
+                    with Profiler.span(f"escrita {filename}", "escrita"):
+                        buffers[filename] = _write_to_buffer(file)
+                    Profiler.record(filename, registros=len(file.data))
+        self.__dirty.clear()
+        return buffers
+
+    def discard(self):
+        """
+        Descarta as alterações ainda não escritas, fazendo com que os
+        arquivos sejam lidos novamente do armazenamento.
+        """
+        for filename in self.dirty:
+            self.__files.pop(filename)
+        self.__dirty.clear()
+
+    def restore(self):
+        """
+        Descarta todas as alterações, inclusive as já serializadas,
+        fazendo com que os arquivos voltem ao estado em que foram lidos.
+        """
+        self.__files.clear()
+        self.__dirty.clear()
 
     @property
     def caso(self) -> Caso:
@@ -111,82 +256,196 @@ class FSNewaveRepository(AbstractNewaveRepository):
     @property
     def arquivos(self) -> Arquivos:
         if self.__arquivos is None:
-            self.__arquivos = Arquivos.le_arquivo(
-                self.__path, self.__caso.arquivos
-            )
+            self.__arquivos = self.__get(Arquivos, self.__caso.arquivos)
         return self.__arquivos
 
     def get_dger(self) -> DGer:
-        if self.arquivos.dger is not None:
-            convert_encoding(
-                str(self.caminho.joinpath(self.arquivos.dger)),
-                self.__encoding_script,
-            )
-        return DGer.le_arquivo(self.__path, self.arquivos.dger)
+        return self.__get(DGer, self.arquivos.dger)
 
     def set_dger(self, d: DGer):
         if self.arquivos.dger is not None:
-            d.escreve_arquivo(self.__path, self.arquivos.dger)
+            self.__set(d, self.arquivos.dger)
 
     def get_patamar(self) -> Patamar:
-        if self.arquivos.patamar is not None:
-            convert_encoding(
-                str(self.caminho.joinpath(self.arquivos.patamar)),
-                self.__encoding_script,
-            )
-        return Patamar.le_arquivo(self.__path, self.arquivos.patamar)
+        return self.__get(Patamar, self.arquivos.patamar)
 
     def set_patamar(self, d: Patamar):
         if self.arquivos.patamar is not None:
-            d.escreve_arquivo(self.__path, self.arquivos.patamar)
+            self.__set(d, self.arquivos.patamar)
 
     def get_sistema(self) -> Sistema:
-        if self.arquivos.sistema is not None:
-            convert_encoding(
-                str(self.caminho.joinpath(self.arquivos.sistema)),
-                self.__encoding_script,
-            )
-        return Sistema.le_arquivo(self.__path, self.arquivos.sistema)
+        return self.__get(Sistema, self.arquivos.sistema)
 
     def set_sistema(self, d: Sistema):
         if self.arquivos.sistema is not None:
-            d.escreve_arquivo(self.__path, self.arquivos.sistema)
+            self.__set(d, self.arquivos.sistema)
 
     def get_eolicacadastro(self) -> EolicaCadastro:
-        return EolicaCadastro.le_arquivo(self.__path, "eolica-cadastro.csv")
+        return self.__get(EolicaCadastro, "eolica-cadastro.csv")
 
-    def set_eolicacadastro(self, d: EolicaCadastro):
-        d.escreve_arquivo(self.__path, "eolica-cadastro.csv")
+    def set_eolicacadastro(self, d: Union[EolicaCadastro, RegisterTableFile]):
+        self.__set(d, "eolica-cadastro.csv")
 
     def get_eolicaposto(self) -> EolicaPosto:
-        return EolicaPosto.le_arquivo(self.__path, "eolica-posto.csv")
+        return self.__get(EolicaPosto, "eolica-posto.csv")
 
-    def set_eolicaposto(self, d: EolicaPosto):
-        d.escreve_arquivo(self.__path, "eolica-posto.csv")
+    def set_eolicaposto(self, d: Union[EolicaPosto, RegisterTableFile]):
+        self.__set(d, "eolica-posto.csv")
 
-    def set_eolicaconfiguracao(self, d: EolicaConfiguracao):
-        d.escreve_arquivo(self.__path, "eolica-config.csv")
+    def set_eolicaconfiguracao(
+        self, d: Union[EolicaConfiguracao, RegisterTableFile]
+    ):
+        self.__set(d, "eolica-config.csv")
 
     def get_eolicasubmercado(self) -> EolicaSubmercado:
-        return EolicaSubmercado.le_arquivo(
-            self.__path, "eolica-submercado.csv"
-        )
+        return self.__get(EolicaSubmercado, "eolica-submercado.csv")
+
+    def set_eolicasubmercado(
+        self, d: Union[EolicaSubmercado, RegisterTableFile]
+    ):
+        self.__set(d, "eolica-submercado.csv")
+
+    def set_eolicafte(self, d: Union[EolicaFTE, RegisterTableFile]):
+        self.__set(d, "eolica-fte.csv")
 
-    def set_eolicasubmercado(self, d: EolicaSubmercado):
-        d.escreve_arquivo(self.__path, "eolica-submercado.csv")
+    def set_eolicageracao(self, d: Union[EolicaGeracao, RegisterTableFile]):
+        self.__set(d, "eolica-geracao.csv")
 
-    def set_eolicafte(self, d: EolicaFTE):
-        d.escreve_arquivo(self.__path, "eolica-fte.csv")
+    def set_histventos(self, d: Union[EolicaHistorico, RegisterTableFile]):
+        self.__set(d, "hist-ventos.csv")
 
-    def set_eolicageracao(self, d: EolicaGeracao):
-        d.escreve_arquivo(self.__path, "eolica-geracao.csv")
 
-    def set_histventos(self, d: EolicaHistorico):
-        d.escreve_arquivo(self.__path, "hist-ventos.csv")
+class FSNewaveRepository(CachedNewaveRepository):
+    def __init__(self, path: str, caso: str):
+        self.__path = path
+        super().__init__(caso)
+
+    @property
+    def caminho(self) -> pathlib.Path:
+        return pathlib.Path(self.__path)
+
+    def _read(self, filetype: Type[T], filename: str) -> T:
+        convert_encoding(str(self.caminho.joinpath(filename)))
+        return filetype.le_arquivo(self.__path, filename)  # type: ignore
+
+    def _write(
+        self,
+        file: Union[SectionFile, RegisterFile, RegisterTableFile],
+        filename: str,
+    ):
+        file.escreve_arquivo(self.__path, filename)  # type: ignore
+
+
+def _read_from_buffer(filetype: Type[T], content: str) -> T:
+    """
+    Realiza a leitura de um arquivo do NEWAVE a partir do conteúdo em
+    memória, seguindo o mesmo procedimento das leituras em disco.
+    """
+    buffer = StringIO(content)
+    if issubclass(filetype, SectionFile):
+        sectiondata = SectionData(DefaultSection(data=""))
+        for sectiontype in filetype.SECTIONS:
+            section = sectiontype()
+            section.read(buffer)
+            sectiondata.append(section)
+        while True:
+            position = buffer.tell()
+            if len(buffer.readline()) == 0:
+                break
+            buffer.seek(position)
+            section = DefaultSection()
+            section.read(buffer)
+            sectiondata.append(section)
+        return filetype(sectiondata)  # type: ignore
+    elif issubclass(filetype, RegisterFile):
+        registerdata = RegisterData(DefaultRegister(data=""))
+        while True:
+            position = buffer.tell()
+            line = buffer.readline()
+            if len(line) == 0:
+                break
+            buffer.seek(position)
+            registertype = next(
+                (
+                    r
+                    for r in filetype.REGISTERS
+                    if r.matches(line, filetype.STORAGE)
+                ),
+                DefaultRegister,
+            )
+            register = registertype()
+            register.read(buffer, filetype.STORAGE)
+            registerdata.append(register)
+        return filetype(registerdata)  # type: ignore
+    raise TypeError(f"Tipo de arquivo não suportado: {filetype}")
+
+
+def _write_to_buffer(
+    file: Union[SectionFile, RegisterFile, RegisterTableFile],
+) -> bytes:
+    """
+    Realiza a escrita de um arquivo do NEWAVE em memória, retornando
+    o conteúdo codificado como seria escrito em disco.
+    """
+    if isinstance(file, RegisterTableFile):
+        return file.to_text().encode(file.ENCODING)
+    buffer = StringIO()
+    if isinstance(file, SectionFile):
+        for section in file.data:
+            section.write(buffer)
+    else:
+        for register in file.data:
+            register.write(buffer, file.STORAGE)
+    return buffer.getvalue().encode(file.ENCODING)
+
+
+def _counted_bytes(filename: str, file: RegisterTableFile) -> Iterator[bytes]:
+    """
+    Produz o conteúdo codificado de um arquivo composto por tabelas,
+    contando os registros escritos. A produção de cada parte é
+    registrada como uma escrita do arquivo, dentro da etapa que o
+    consome.
+    """
+    registers = 0
+    tables = file.iter_tables()
+    while True:
+        # The span must not stay open while the part is consumed
+        with Profiler.span(f"escrita {filename}", "escrita"):
+            table = next(tables, None)
+            if table is None:
+                break
+            registers += len(table)
+            data = table.to_text().encode(file.ENCODING)
+        yield data
+    Profiler.record(filename, registros=registers)
+
+
+class ZIPNewaveRepository(CachedNewaveRepository):
+    def __init__(
+        self, session: ZipSession, caso: str, keep_originals: bool = False
+    ):
+        self.__session = session
+        self.__outputs: Dict[str, bytes] = {}
+        super().__init__(caso, keep_originals)
+
+    def _read(self, filetype: Type[T], filename: str) -> T:
+        if filename in self.__outputs:
+            data = self.__outputs[filename]
+        else:
+            data = self.__session.read(filename)
+        return _read_from_buffer(filetype, decode_text(data))
+
+    def _write(
+        self,
+        file: Union[SectionFile, RegisterFile, RegisterTableFile],
+        filename: str,
+    ):
+        self.__outputs[filename] = _write_to_buffer(file)
 
 
 def factory(kind: str, *args, **kwargs) -> AbstractNewaveRepository:
     mapping: Dict[str, Type[AbstractNewaveRepository]] = {
-        "FS": FSNewaveRepository
+        "FS": FSNewaveRepository,
+        "ZIP": ZIPNewaveRepository,
     }
     return mapping[kind](*args, **kwargs)
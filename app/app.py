@@ -1,7 +1,11 @@
 import click
 import tempfile
 import os
-from app.services.handlers.generation import generate, validate
+from app.models.settings import Settings
+
+# The handlers, and with them pandas, numpy and inewave, are only
+# imported by the commands that use them, so that the help and the
+# argument errors are shown without loading them
 
 
 DEFAULT_CLUSTERS_PATH_FILE = "CAMINHO-DECK"
@@ -18,6 +22,12 @@ def __read_clusters_path():
     return path
 
 
+def __enable_profile(settings: Settings, profile: bool, trace, metrics):
+    settings.profile = settings.profile or profile or trace is not None
+    settings.profile_trace = trace
+    settings.metrics = settings.metrics or metrics
+
+
 @click.group()
 def cli():
     """
@@ -33,23 +43,42 @@ def cli():
     default=None,
     help="diretório com os arquivos resultantes da clusterização",
 )
+@click.option(
+    "--profile",
+    is_flag=True,
+    default=False,
+    help="exibe no log o tempo de execução de cada etapa",
+)
+@click.option(
+    "--trace",
+    default=None,
+    help="arquivo JSON (Chrome trace) com o tempo de cada etapa",
+)
+@click.option(
+    "--metricas",
+    is_flag=True,
+    default=False,
+    help="salva ao lado do log o pico de memória de cada etapa e os"
+    + " registros e bytes de cada arquivo",
+)
 @click.argument(
     "deck",
 )
-def validatefiles(clusters, deck):
+def validatefiles(clusters, profile, trace, metricas, deck):
     """
     Valida o deck para o processamento. Confere se os arquivos necessários
     estão no ZIP e se contém as informações necessárias no processamento.
 
     DECK: arquivos de entrada do NEWAVE comprimidos em um .zip
     """
+    from app.services.handlers.generation import validate
+
     if clusters is None:
         clusters = __read_clusters_path()
-    os.environ["CLUSTERSDIR"] = clusters
-    os.environ["DECK"] = deck
     with tempfile.TemporaryDirectory() as tmpdirname:
-        os.environ["TMPDIR"] = tmpdirname
-        validate()
+        settings = Settings(clusters, deck, tmpdirname)
+        __enable_profile(settings, profile, trace, metricas)
+        validate(settings)
 
 
 @click.command("geradeck")
@@ -58,24 +87,112 @@ def validatefiles(clusters, deck):
     default=None,
     help="diretório com os arquivos resultantes da clusterização",
 )
+@click.option(
+    "--profile",
+    is_flag=True,
+    default=False,
+    help="exibe no log o tempo de execução de cada etapa",
+)
+@click.option(
+    "--trace",
+    default=None,
+    help="arquivo JSON (Chrome trace) com o tempo de cada etapa",
+)
+@click.option(
+    "--metricas",
+    is_flag=True,
+    default=False,
+    help="salva ao lado do log o pico de memória de cada etapa e os"
+    + " registros e bytes de cada arquivo",
+)
 @click.argument(
     "deck",
 )
-def generatedeck(clusters, deck):
+def generatedeck(clusters, profile, trace, metricas, deck):
     """
     Processa o deck, realiza as alterações necessárias e gera os arquivos
     novos para consideração da geração eólica.
 
     DECK: arquivos de entrada do NEWAVE comprimidos em um .zip
     """
+    from app.services.handlers.generation import generate
+
     if clusters is None:
         clusters = __read_clusters_path()
-    os.environ["CLUSTERSDIR"] = clusters
-    os.environ["DECK"] = deck
     with tempfile.TemporaryDirectory() as tmpdirname:
-        os.environ["TMPDIR"] = tmpdirname
-        generate()
+        settings = Settings(clusters, deck, tmpdirname)
+        __enable_profile(settings, profile, trace, metricas)
+        generate(settings)
+
+
+@click.command("geradecks")
+@click.option(
+    "--clusters",
+    default=None,
+    help="diretório com os arquivos resultantes da clusterização",
+)
+@click.option(
+    "--lista",
+    default=None,
+    help="arquivo com o caminho de um deck por linha",
+)
+@click.option(
+    "--processos",
+    default=None,
+    type=int,
+    help="número de decks gerados em paralelo",
+)
+@click.argument("decks", nargs=-1)
+def generatedecks(clusters, lista, processos, decks):
+    """
+    Processa diversos decks, com os mesmos dados de clusterização,
+    distribuindo-os entre vários processos.
+
+    DECKS: arquivos .zip dos decks ou padrões de busca (ex: "*.zip")
+    """
+    from app.services.handlers.batch import generate_many
+
+    if clusters is None:
+        clusters = __read_clusters_path()
+    results = generate_many(clusters, list(decks), lista, processos)
+    if not all(r.success for r in results):
+        raise SystemExit(1)
+
+
+@click.command("geravariantes")
+@click.option(
+    "--clusters",
+    default=None,
+    help="diretório com os arquivos resultantes da clusterização",
+)
+@click.option(
+    "--saida",
+    default="variantes",
+    help="diretório onde são escritos os decks das variantes",
+)
+@click.argument("deck")
+@click.argument("variantes")
+def generatevariants(clusters, saida, deck, variantes):
+    """
+    Gera um deck para cada variante de configuração a partir do mesmo
+    deck base, que não é alterado.
+
+    DECK: arquivos de entrada do NEWAVE comprimidos em um .zip
+
+    VARIANTES: arquivo .csv com a coluna nome e as configurações de cada
+    variante (CONSIDERA_GERACAO_EOLICA, PENALIDADE_CORTE_GERACAO_EOLICA,
+    BLOCO_NAO_SIMULADAS_EOLICA e CLUSTERSDIR)
+    """
+    from app.services.handlers.sweep import generate_variants
+
+    if clusters is None:
+        clusters = __read_clusters_path()
+    results = generate_variants(clusters, deck, variantes, saida)
+    if not all(r.success for r in results):
+        raise SystemExit(1)
 
 
 cli.add_command(validatefiles)
 cli.add_command(generatedeck)
+cli.add_command(generatedecks)
+cli.add_command(generatevariants)
@@ -1,6 +1,9 @@
 from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Union
 import pandas as pd  # type: ignore
 
+from app.domain.messages import ClustersIndex
+
 
 @dataclass
 class ExtractZipFile:
@@ -9,6 +12,14 @@ class ExtractZipFile:
     filename: str
 
 
+@dataclass
+class ExtractZipFiles:
+    zippath: str
+    targetdir: str
+    filenames: List[str]
+    workers: int = 1
+
+
 @dataclass
 class AddFileToZip:
     zippath: str
@@ -16,6 +27,20 @@ class AddFileToZip:
     filename: str
 
 
+@dataclass
+class ZipMember:
+    zippath: str
+    filename: str
+
+
+@dataclass
+class AddFilesToZip:
+    zippath: str
+    members: Dict[str, Union[str, bytes, Iterable[bytes], ZipMember]]
+    # The members that are kept are copied from this file, if given
+    srczip: Optional[str] = None
+
+
 @dataclass
 class ProcessDgerData:
     generatewind: int
@@ -32,6 +57,12 @@ class ProcessPatamarData:
     windblock: int
 
 
+@dataclass
+class RestorePatamarData:
+    windblock: int
+    blocks: pd.DataFrame
+
+
 @dataclass
 class ValidateDgerData:
     pass
@@ -53,6 +84,12 @@ class ProcessSistemaData:
     windblock: int
 
 
+@dataclass
+class RestoreSistemaData:
+    windblock: int
+    nonsimulated: pd.DataFrame
+
+
 @dataclass
 class GenerateEolicaCadastro:
     pre_study_month: int
@@ -89,11 +126,12 @@ class GenerateEolicaFTE:
     pre_study_horizon: int
     study_horizon: int
     post_study_horizon: int
+    index: ClustersIndex
 
 
 @dataclass
 class GenerateEolicaHistorico:
-    pass
+    index: ClustersIndex
 
 
 @dataclass
@@ -105,3 +143,4 @@ class GenerateEolicaGeracao:
     post_study_horizon: int
     numblocks: int
     patamardata: pd.DataFrame
+    index: ClustersIndex
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from typing import Dict, Optional
 import pandas as pd  # type: ignore
 
 
@@ -20,3 +21,20 @@ class PatamarData:
 @dataclass
 class SistemaData:
     nonsimulated: pd.DataFrame
+
+
+@dataclass
+class ClustersIndex:
+    # cluster name -> PEE code, in the order of the clusters file
+    codes: Dict[str, int]
+    # PEE code -> submarket
+    submarkets: Dict[int, int]
+
+
+@dataclass
+class DeckResult:
+    deck: str
+    success: bool
+    # seconds
+    elapsed: float
+    error: Optional[str] = None
@@ -0,0 +1,234 @@
+from functools import lru_cache
+import hashlib
+import json
+import os
+import zlib
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple, Union
+from zipfile import ZipFile
+import pandas as pd  # type: ignore
+
+from app.domain.commands import ZipMember
+
+Member = Union[str, bytes, Iterable[bytes], ZipMember]
+
+# Changes in the way the files are generated must increase the version,
+# so that the files generated by previous versions are not kept
+MANIFEST_VERSION = 1
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def digest(data: Any) -> str:
+    """
+    Assinatura de um conjunto de dados serializáveis em JSON.
+    """
+    content = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def file_digest(path: str) -> str:
+    """
+    Assinatura do conteúdo de um arquivo, lido em partes. A assinatura
+    é reaproveitada enquanto o arquivo não for alterado.
+    """
+    stat = os.stat(path)
+    return __file_digest(os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+@lru_cache(maxsize=64)
+def __file_digest(path: str, mtime_ns: int, size: int) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def blocks_to_json(blocks: pd.DataFrame) -> Dict[str, Any]:
+    return blocks.reset_index(drop=True).to_dict(orient="split")
+
+
+def blocks_from_json(data: Dict[str, Any]) -> pd.DataFrame:
+    return pd.DataFrame(data["data"], columns=data["columns"])
+
+
+class Manifest:
+    """
+    Manifesto armazenado no deck, com a assinatura das entradas de cada
+    arquivo gerado e a soma de verificação de cada arquivo escrito, para
+    que uma nova execução gere somente os arquivos cujas entradas mudaram.
+    Também guarda os patamares de geração eólica retirados do patamar.dat
+    e a geração eólica retirada do sistema.dat, que não estão mais no
+    deck após o primeiro processamento, junto do bloco de geração não
+    simulada do qual foram retirados.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        current: Dict[str, Tuple[int, int]],
+        outputs: Optional[Dict[str, Dict[str, Any]]] = None,
+        blocks: Optional[pd.DataFrame] = None,
+        nonsimulated: Optional[pd.DataFrame] = None,
+        windblock: Optional[int] = None,
+    ):
+        self.__filename = filename
+        # CRC and size of the members currently in the deck
+        self.__current = current
+        self.__outputs = outputs if outputs is not None else {}
+        self.__blocks = blocks
+        self.__nonsimulated = nonsimulated
+        self.__windblock = windblock
+        self.__inputs: Dict[str, str] = {}
+
+    @classmethod
+    def parse(
+        cls,
+        filename: str,
+        current: Dict[str, Tuple[int, int]],
+        content: bytes,
+    ) -> "Manifest":
+        data = json.loads(content.decode("utf-8"))
+        if data["versao"] != MANIFEST_VERSION:
+            raise ValueError(
+                f"versão {data['versao']} diferente de {MANIFEST_VERSION}"
+            )
+        blocks = data["patamar"]
+        # Absent in the manifests written before they were stored
+        nonsimulated = data.get("sistema")
+        windblock = data.get("bloco")
+        return cls(
+            filename,
+            current,
+            dict(data["saidas"]),
+            blocks_from_json(blocks) if blocks is not None else None,
+            (
+                blocks_from_json(nonsimulated)
+                if nonsimulated is not None
+                else None
+            ),
+            int(windblock) if windblock is not None else None,
+        )
+
+    @property
+    def filename(self) -> str:
+        return self.__filename
+
+    @property
+    def blocks(self) -> Optional[pd.DataFrame]:
+        return self.__blocks
+
+    @blocks.setter
+    def blocks(self, blocks: pd.DataFrame):
+        self.__blocks = blocks
+
+    @property
+    def nonsimulated(self) -> Optional[pd.DataFrame]:
+        return self.__nonsimulated
+
+    @nonsimulated.setter
+    def nonsimulated(self, nonsimulated: pd.DataFrame):
+        self.__nonsimulated = nonsimulated
+
+    @property
+    def windblock(self) -> Optional[int]:
+        return self.__windblock
+
+    @windblock.setter
+    def windblock(self, windblock: int):
+        self.__windblock = windblock
+
+    def written(self, filename: str) -> bool:
+        """
+        Verifica se o arquivo no deck é o mesmo que foi escrito na
+        execução que gerou o manifesto.
+        """
+        output = self.__outputs.get(filename)
+        if output is None:
+            return False
+        return self.__current.get(filename) == (
+            output["crc"],
+            output["tamanho"],
+        )
+
+    def up_to_date(self, filename: str, inputs: str) -> bool:
+        """
+        Verifica se o arquivo no deck foi gerado a partir das mesmas
+        entradas.
+        """
+        output = self.__outputs.get(filename)
+        return (
+            self.written(filename)
+            and output is not None
+            and output["entradas"] == inputs
+        )
+
+    def generating(self, filename: str, inputs: str):
+        """
+        Registra as entradas de um arquivo que está sendo gerado.
+        """
+        self.__inputs[filename] = inputs
+
+    def __record(self, filename: str, crc: int, size: int):
+        self.__outputs[filename] = {
+            "entradas": self.__inputs.get(filename),
+            "crc": crc,
+            "tamanho": size,
+        }
+
+    def __tracked(self, filename: str, chunks: Iterable[bytes]):
+        crc, size = 0, 0
+        for chunk in chunks:
+            crc = zlib.crc32(chunk, crc)
+            size += len(chunk)
+            yield chunk
+        self.__record(filename, crc, size)
+
+    def __content(self) -> Iterator[bytes]:
+        # Only produced after every other member was written, when all
+        # the checksums are known
+        data = {
+            "versao": MANIFEST_VERSION,
+            "saidas": self.__outputs,
+            "patamar": (
+                blocks_to_json(self.__blocks)
+                if self.__blocks is not None
+                else None
+            ),
+            "sistema": (
+                blocks_to_json(self.__nonsimulated)
+                if self.__nonsimulated is not None
+                else None
+            ),
+            "bloco": self.__windblock,
+        }
+        yield json.dumps(data, indent=2, sort_keys=True).encode("utf-8")
+
+    def pending(self, members: Dict[str, Member]) -> Dict[str, Member]:
+        """
+        Seleciona os membros que diferem dos que estão no deck, os quais
+        são registrados no manifesto à medida que são escritos. Quando
+        há algum membro a escrever, o próprio manifesto é incluído no fim.
+        """
+        pending: Dict[str, Member] = {}
+        for filename, source in members.items():
+            if isinstance(source, ZipMember):
+                with ZipFile(source.zippath, "r") as z:
+                    info = z.getinfo(source.filename)
+                self.__record(filename, info.CRC, info.file_size)
+                if self.__current.get(filename) != (info.CRC, info.file_size):
+                    pending[filename] = source
+            elif isinstance(source, (str, bytes)):
+                if isinstance(source, str):
+                    with open(source, "rb") as f:
+                        content = f.read()
+                else:
+                    content = source
+                crc, size = zlib.crc32(content), len(content)
+                self.__record(filename, crc, size)
+                if self.__current.get(filename) != (crc, size):
+                    pending[filename] = source
+            else:
+                pending[filename] = self.__tracked(filename, source)
+        if len(pending) > 0:
+            pending[self.__filename] = self.__content()
+        return pending
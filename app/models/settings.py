@@ -1,29 +1,54 @@
-from app.utils.singleton import Singleton
-from os import getenv
+from os import cpu_count, getenv
+from typing import Optional
 
 
-class Settings(metaclass=Singleton):
-    def __init__(self):
+class Settings:
+    """
+    Configurações de uma execução. Os valores são lidos do ambiente,
+    exceto os parâmetros de cada deck, que podem ser fornecidos
+    explicitamente para que vários decks sejam processados em conjunto.
+    """
+
+    def __init__(
+        self,
+        clustersdir: Optional[str] = None,
+        newave_deck_zip: Optional[str] = None,
+        tmpdir: Optional[str] = None,
+    ):
         # Execution parameters
         self.basedir = getenv("APP_BASEDIR")
         self.installdir = getenv("APP_INSTALLDIR")
-        self.clustersdir = getenv("CLUSTERSDIR")
-        self.tmpdir = getenv("TMPDIR")
-        self.newave_deck_zip = getenv("DECK")
-        self.encoding_convert_script = "app/static/encoding.sh"
+        self.clustersdir = (
+            clustersdir if clustersdir is not None else getenv("CLUSTERSDIR")
+        )
+        self.tmpdir = tmpdir if tmpdir is not None else getenv("TMPDIR")
+        self.newave_deck_zip = (
+            newave_deck_zip if newave_deck_zip is not None else getenv("DECK")
+        )
         # Input files - clustering process
         self.clusters_file = getenv("ARQUIVO_CLUSTERS")
         self.installed_capacity_file = getenv("ARQUIVO_CAPACIDADE_INSTALADA")
         self.ftm_file = getenv("ARQUIVO_FTM")
         self.average_wind_file = getenv("ARQUIVO_VENTO_MEDIO")
+        self.clusters_sidecar = bool(int(getenv("CACHE_CLUSTERS", 0)))
         # Input files - NEWAVE
         self.caso_file = getenv("ARQUIVO_CASO")
+        self.deck_repository = getenv("REPOSITORIO_DECK", "FS")
         self.generatewind = int(getenv("CONSIDERA_GERACAO_EOLICA"))
         self.windcutpenalty = float(getenv("PENALIDADE_CORTE_GERACAO_EOLICA"))
         self.nonsimulatedblock = int(getenv("BLOCO_NAO_SIMULADAS_EOLICA"))
+        self.deck_workers = int(getenv("PROCESSOS_DECKS", cpu_count() or 1))
+        self.incremental_generation = bool(
+            int(getenv("GERACAO_INCREMENTAL", 1))
+        )
+        # The file with the durations is only given in the command line
+        self.profile = bool(int(getenv("PERFIL_EXECUCAO", 0)))
+        self.profile_trace: Optional[str] = None
+        self.metrics = bool(int(getenv("METRICAS_EXECUCAO", 0)))
         # Output files - NEWAVE
         self.static_file_path = "app/static"
         self.indice_file = "indices.csv"
+        self.manifest_file = "manifesto-eolicas.json"
         self.eolicacadastro_file = "eolica-cadastro.csv"
         self.eolicasubmercado_file = "eolica-submercado.csv"
         self.eolicaconfig_file = "eolica-config.csv"
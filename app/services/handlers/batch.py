@@ -0,0 +1,172 @@
+from app.models.settings import Settings
+import app.domain.messages as messages
+from app.utils.log import Log
+from app.services.handlers.generation import generate_deck
+from app.services.unitofwork.clusters import factory as clusters_factory
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional
+import glob
+import multiprocessing
+import pathlib
+import tempfile
+import time
+
+
+def __find_decks(
+    patterns: List[str], listfile: Optional[str] = None
+) -> List[str]:
+    """
+    Obtém os caminhos dos decks a partir de caminhos ou padrões
+    (glob) e, opcionalmente, de um arquivo com um deck por linha.
+    Os caminhos do arquivo são relativos ao diretório em que ele está.
+    """
+    candidates = list(patterns)
+    if listfile is not None:
+        listdir = pathlib.Path(listfile).resolve().parent
+        with open(listfile, "r") as f:
+            for line in f:
+                line = line.strip()
+                if len(line) == 0 or line.startswith("#"):
+                    continue
+                candidates.append(str(listdir.joinpath(line)))
+    decks: List[str] = []
+    for candidate in candidates:
+        matches = (
+            sorted(glob.glob(candidate))
+            if glob.has_magic(candidate)
+            else [candidate]
+        )
+        if len(matches) == 0:
+            Log.log().warning(f"Nenhum deck encontrado para {candidate}")
+        for match in matches:
+            deck = str(pathlib.Path(match).resolve())
+            if deck not in decks:
+                decks.append(deck)
+    return decks
+
+
+def __load_clusters(settings: Settings):
+    # The cluster data is kept in the process cache, so every deck of
+    # the process uses it without reading the files again
+    try:
+        uow = clusters_factory(
+            "FS",
+            str(pathlib.Path(settings.clustersdir).resolve()),
+            settings.clusters_file,
+            settings.installed_capacity_file,
+            settings.ftm_file,
+            settings.average_wind_file,
+            sidecar=settings.clusters_sidecar,
+        )
+        with uow:
+            uow.clusters.get_clusters()
+            uow.clusters.get_installed_capacity()
+            uow.clusters.get_ftm()
+            uow.clusters.get_average_wind()
+    except Exception as e:
+        # Each deck reports the problem in its own validation
+        Log.log().warning(
+            f"Erro na leitura antecipada dos dados de clusterização: {e}"
+        )
+
+
+def __generate_deck(clustersdir: str, deck: str) -> messages.DeckResult:
+    start = time.perf_counter()
+    error: Optional[str] = None
+    try:
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            success = generate_deck(Settings(clustersdir, deck, tmpdirname))
+        if not success:
+            error = "validação dos arquivos não concluída"
+    except Exception as e:
+        success = False
+        error = f"{type(e).__name__}: {e}"
+    return messages.DeckResult(
+        deck, success, time.perf_counter() - start, error
+    )
+
+
+def __pool_context():
+    # The processes inherit the cluster data already read, when the
+    # platform allows it
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context()
+
+
+def log_result(result: messages.DeckResult):
+    if result.success:
+        Log.log().info(f"Deck {result.deck} gerado em {result.elapsed:.2f} s")
+    else:
+        Log.log().error(
+            f"Erro na geração do deck {result.deck}"
+            + f" após {result.elapsed:.2f} s: {result.error}"
+        )
+
+
+def report_results(results: List[messages.DeckResult], elapsed: float):
+    width = max(len(r.deck) for r in results)
+    lines = [f"{'DECK':<{width}}  SITUAÇÃO  TEMPO (s)"]
+    for r in results:
+        status = "SUCESSO" if r.success else "ERRO"
+        lines.append(f"{r.deck:<{width}}  {status:<8}  {r.elapsed:9.2f}")
+    Log.log().info("Resumo da geração dos decks:\n" + "\n".join(lines))
+    failures = len([r for r in results if not r.success])
+    Log.log().info(
+        f"{len(results) - failures} decks gerados com sucesso e"
+        + f" {failures} com erro, em {elapsed:.2f} s"
+    )
+
+
+def generate_many(
+    clustersdir: str,
+    patterns: List[str],
+    listfile: Optional[str] = None,
+    workers: Optional[int] = None,
+) -> List[messages.DeckResult]:
+    """
+    Gera os arquivos de diversos decks, distribuídos entre processos,
+    com os dados de clusterização lidos uma única vez por processo.
+    Retorna o resultado de cada deck, na ordem em que foram fornecidos.
+    """
+    settings = Settings(clustersdir)
+    Log.configure_logging(settings.basedir)
+    decks = __find_decks(patterns, listfile)
+    if len(decks) == 0:
+        Log.log().error("Nenhum deck fornecido para geração")
+        return []
+    if workers is None:
+        workers = settings.deck_workers
+    workers = max(1, min(workers, len(decks)))
+    Log.log().info(f"Gerando {len(decks)} decks com {workers} processo(s)")
+    start = time.perf_counter()
+    __load_clusters(settings)
+    results: Dict[str, messages.DeckResult] = {}
+    if workers == 1:
+        for deck in decks:
+            results[deck] = __generate_deck(clustersdir, deck)
+            log_result(results[deck])
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=__pool_context(),
+            initializer=__load_clusters,
+            initargs=(settings,),
+        ) as pool:
+            futures = {
+                pool.submit(__generate_deck, clustersdir, deck): deck
+                for deck in decks
+            }
+            for future in as_completed(futures):
+                deck = futures[future]
+                try:
+                    results[deck] = future.result()
+                except Exception as e:
+                    # The process of the deck ended abnormally
+                    results[deck] = messages.DeckResult(
+                        deck, False, 0.0, f"{type(e).__name__}: {e}"
+                    )
+                log_result(results[deck])
+    ordered = [results[deck] for deck in decks]
+    report_results(ordered, time.perf_counter() - start)
+    return ordered
@@ -1,40 +1,223 @@
 import app.domain.commands as commands
 from app.utils.log import Log
+from app.utils.profiling import Profiler, profiled
+from app.utils.zipsession import ZipSession
+from typing import Iterable, List, Optional
 import pathlib
 import tempfile
 import os
-from zipfile import ZipFile, ZIP_DEFLATED
+import copy
+import shutil
+import struct
+import time
+import zipfile
+from zipfile import ZipFile, ZipInfo, ZIP_DEFLATED
 
+# Bit 3 of the general purpose flags: CRC and sizes after the data
+ZIP_DATA_DESCRIPTOR_FLAG = 0x08
+ZIP_COPY_CHUNK_SIZE = 1024 * 1024
+# Streamed members smaller than this are written at once, without the
+# ZIP64 fields needed by a member whose size is not known beforehand
+ZIP_STREAM_BUFFER_SIZE = 1024 * 1024
+# Private attributes of zipfile used by the copy of compressed members
+ZIPFILE_INTERNALS = [
+    "structFileHeader",
+    "sizeFileHeader",
+    "stringFileHeader",
+    "_FH_SIGNATURE",
+    "_FH_FILENAME_LENGTH",
+    "_FH_EXTRA_FIELD_LENGTH",
+]
+ZIPFILE_WRITER_INTERNALS = [
+    "fp",
+    "start_dir",
+    "filelist",
+    "NameToInfo",
+    "_didModify",
+]
 
-def extract_file(command: commands.ExtractZipFile):
+
+@profiled("arquivos")
+def extract_file(
+    command: commands.ExtractZipFile, session: Optional[ZipSession] = None
+):
     Log.log().info(
         f"Extraindo {command.filename} em"
         + f" {command.zippath} para {command.targetdir}"
     )
-    with ZipFile(command.zippath) as localzipfile:
-        localzipfile.extract(command.filename, command.targetdir)
+    if session is None:
+        with ZipSession(command.zippath) as localsession:
+            localsession.extract(command.filename, command.targetdir)
+    else:
+        session.extract(command.filename, command.targetdir)
+
+
+@profiled("arquivos")
+def extract_files(
+    command: commands.ExtractZipFiles, session: Optional[ZipSession] = None
+):
+    for filename in command.filenames:
+        Log.log().info(
+            f"Extraindo {filename} em"
+            + f" {command.zippath} para {command.targetdir}"
+        )
+    if session is None:
+        with ZipSession(command.zippath) as localsession:
+            localsession.extract_many(
+                command.filenames, command.targetdir, command.workers
+            )
+    else:
+        session.extract_many(
+            command.filenames, command.targetdir, command.workers
+        )
 
 
+@profiled("arquivos")
 def compress_file(command: commands.AddFileToZip):
-    Log.log().info(
-        f"Comprimindo {command.filename} em"
-        + f" {command.srcdir} para {command.zippath}"
+    srcpath = pathlib.Path(command.srcdir).resolve().joinpath(command.filename)
+    compress_files(
+        commands.AddFilesToZip(
+            command.zippath, {command.filename: str(srcpath)}
+        )
+    )
+
+
+def _raw_copy_supported(zout: ZipFile) -> bool:
+    """
+    Verifica se a versão do zipfile possui os atributos internos usados
+    na cópia dos membros sem descompressão.
+    """
+    return all(hasattr(zipfile, a) for a in ZIPFILE_INTERNALS) and all(
+        hasattr(zout, a) for a in ZIPFILE_WRITER_INTERNALS
     )
-    tmpfd, tmpname = tempfile.mkstemp(dir=os.path.dirname(command.zippath))
-    os.close(tmpfd)
 
-    with ZipFile(command.zippath, "r") as zin:
-        with ZipFile(tmpname, "w") as zout:
-            zout.comment = zin.comment
-            for item in zin.infolist():
-                if item.filename != command.filename:
-                    zout.writestr(item, zin.read(item.filename))
 
-    os.remove(command.zippath)
-    os.rename(tmpname, command.zippath)
+def __copy_member(zin: ZipFile, zout: ZipFile, item: ZipInfo):
+    if _raw_copy_supported(zout):
+        __copy_raw_member(zin, zout, item)
+        return
+    # Decompresses and compresses the member again, in parts
+    with zin.open(item) as src, zout.open(copy.copy(item), "w") as dst:
+        shutil.copyfileobj(src, dst, ZIP_COPY_CHUNK_SIZE)
 
-    with ZipFile(command.zippath, mode="a", compression=ZIP_DEFLATED) as zf:
-        srcpath = (
-            pathlib.Path(command.srcdir).resolve().joinpath(command.filename)
+
+def __write_stream(zout: ZipFile, info: ZipInfo, chunks: Iterable[bytes]):
+    """
+    Escreve um membro produzido em partes. Somente os membros maiores
+    que o buffer são comprimidos à medida que as partes são produzidas.
+    """
+    iterator = iter(chunks)
+    buffered: List[bytes] = []
+    size = 0
+    for chunk in iterator:
+        buffered.append(chunk)
+        size += len(chunk)
+        if size >= ZIP_STREAM_BUFFER_SIZE:
+            break
+    else:
+        zout.writestr(info, b"".join(buffered), ZIP_DEFLATED)
+        return
+    info.compress_type = ZIP_DEFLATED
+    with zout.open(info, "w", force_zip64=True) as dst:
+        for chunk in buffered:
+            dst.write(chunk)
+        buffered.clear()
+        for chunk in iterator:
+            dst.write(chunk)
+
+
+def __copy_raw_member(zin: ZipFile, zout: ZipFile, item: ZipInfo):
+    """
+    Copia um membro de um ZIP para outro sem descomprimir os dados,
+    mantendo os bytes comprimidos e o CRC originais.
+    """
+    # Skips the local header of the member in the source file
+    zin.fp.seek(item.header_offset)
+    fheader = struct.unpack(
+        zipfile.structFileHeader, zin.fp.read(zipfile.sizeFileHeader)
+    )
+    if fheader[zipfile._FH_SIGNATURE] != zipfile.stringFileHeader:
+        raise zipfile.BadZipFile(f"Cabeçalho inválido para {item.filename}")
+    zin.fp.seek(
+        fheader[zipfile._FH_FILENAME_LENGTH]
+        + fheader[zipfile._FH_EXTRA_FIELD_LENGTH],
+        os.SEEK_CUR,
+    )
+    # Writes the header and the compressed data in the target file.
+    # The CRC and sizes are already known, so no data descriptor is needed.
+    rawitem = copy.copy(item)
+    rawitem.flag_bits &= ~ZIP_DATA_DESCRIPTOR_FLAG
+    zout.fp.seek(zout.start_dir)
+    rawitem.header_offset = zout.fp.tell()
+    zout.fp.write(rawitem.FileHeader())
+    remaining = item.compress_size
+    while remaining > 0:
+        chunk = zin.fp.read(min(remaining, ZIP_COPY_CHUNK_SIZE))
+        if len(chunk) == 0:
+            raise zipfile.BadZipFile(f"Dados truncados em {item.filename}")
+        zout.fp.write(chunk)
+        remaining -= len(chunk)
+    # Registers the member for the central directory
+    zout.filelist.append(rawitem)
+    zout.NameToInfo[rawitem.filename] = rawitem
+    zout.start_dir = zout.fp.tell()
+    zout._didModify = True
+
+
+@profiled("arquivos")
+def compress_files(command: commands.AddFilesToZip):
+    for filename, source in command.members.items():
+        if isinstance(source, str):
+            origin = source
+        elif isinstance(source, commands.ZipMember):
+            origin = source.zippath
+        else:
+            origin = "memória"
+        Log.log().info(
+            f"Comprimindo {filename} de" + f" {origin} para {command.zippath}"
         )
-        zf.write(srcpath, command.filename)
+    srczip = command.srczip if command.srczip else command.zippath
+    tmpfd, tmpname = tempfile.mkstemp(dir=os.path.dirname(command.zippath))
+    os.close(tmpfd)
+
+    try:
+        with ZipFile(srczip, "r") as zin:
+            with ZipFile(tmpname, "w") as zout:
+                zout.comment = zin.comment
+                # Keeps the members that are not being replaced, copying
+                # the compressed data as is
+                for item in zin.infolist():
+                    if item.filename not in command.members:
+                        __copy_member(zin, zout, item)
+                # Adds the new members, in the given order
+                for filename, source in command.members.items():
+                    if isinstance(source, str):
+                        zout.write(source, filename, ZIP_DEFLATED)
+                        continue
+                    if isinstance(source, commands.ZipMember):
+                        # Already compressed in another file
+                        with ZipFile(source.zippath, "r") as zother:
+                            __copy_member(
+                                zother, zout, zother.getinfo(source.filename)
+                            )
+                        continue
+                    info = ZipInfo(filename, time.localtime()[:6])
+                    info.external_attr = 0o644 << 16
+                    if isinstance(source, bytes):
+                        zout.writestr(info, source, ZIP_DEFLATED)
+                    else:
+                        __write_stream(zout, info, source)
+                for filename in command.members:
+                    written = zout.getinfo(filename)
+                    Profiler.record(
+                        filename,
+                        bytes=written.file_size,
+                        bytes_comprimidos=written.compress_size,
+                    )
+    except Exception:
+        os.remove(tmpname)
+        raise
+
+    # The rewritten file keeps the permissions of the source file
+    shutil.copymode(srczip, tmpname)
+    os.replace(tmpname, command.zippath)
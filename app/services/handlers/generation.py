@@ -1,15 +1,33 @@
+from app.models.manifest import (
+    Manifest,
+    blocks_to_json,
+    digest,
+    file_digest,
+)
 from app.models.settings import Settings
 import app.domain.commands as commands
 from app.utils.log import Log
-from typing import Optional
+from app.utils.profiling import Profiler, profiled
+from app.utils.scheduler import Stage, run_stages
+from app.utils.zipsession import ZipSession
+from dataclasses import asdict
+from typing import Callable, Dict, Iterable, Optional, Tuple, Union
 import pathlib
-from app.services.unitofwork.newave import factory as nw_factory
+import pandas as pd  # type: ignore
+import app.domain.messages as messages
+from app.services.unitofwork.newave import (
+    AbstractNewaveUnitOfWork,
+    factory as nw_factory,
+)
 from app.services.unitofwork.clusters import factory as clusters_factory
-from app.services.handlers.files import compress_file, extract_file
+from app.services.handlers.files import extract_file, extract_files
 from app.services.handlers.processing import (
     process_dger_data,
     process_patamar_data,
     process_sistema_data,
+    restore_patamar_data,
+    restore_sistema_data,
+    index_clusters,
     generate_eolicacadastro,
     generate_eolicasubmercado,
     generate_eolicaconfig,
@@ -31,71 +49,178 @@ from app.services.handlers.validation import (
 
 
 class GenerationHandler:
-    def __init__(self, settings: Settings):
+    """
+    Processa um deck, alterando o próprio arquivo. Na geração de
+    variantes de um mesmo deck, a sessão do arquivo e a unidade de
+    trabalho do deck base são compartilhadas, cada variante é escrita
+    em `output` e os arquivos já gerados com as mesmas entradas para
+    outras variantes, registrados em `shared`, são copiados delas.
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        zipsession: Optional[ZipSession] = None,
+        nwuow: Optional[AbstractNewaveUnitOfWork] = None,
+        output: Optional[str] = None,
+        shared: Optional[Dict[Tuple[str, str], commands.ZipMember]] = None,
+    ):
         self._settings = settings
-        self._scriptpath = (
-            pathlib.Path(self._settings.installdir)
-            .resolve()
-            .joinpath(self._settings.encoding_convert_script)
-        )
         self._zippath = (
             pathlib.Path(self._settings.basedir)
             .resolve()
             .joinpath(self._settings.newave_deck_zip)
         )
-        self._tmppath = pathlib.Path(self._settings.tmpdir)
-        self._clusterspath = pathlib.Path(self._settings.clustersdir)
-        # Extracts "caso.dat"
-        command = commands.ExtractZipFile(
-            str(self._zippath), self._settings.tmpdir, self._settings.caso_file
+        self._tmppath = pathlib.Path(self._settings.tmpdir).resolve()
+        self._clusterspath = pathlib.Path(self._settings.clustersdir).resolve()
+        self._output = (
+            pathlib.Path(output).resolve()
+            if output is not None
+            else self._zippath
         )
-        extract_file(command)
-        # Instantiates UoW
-        self._uow = nw_factory(
-            "FS",
-            self._zippath.parent,
-            self._settings.caso_file,
-            self._scriptpath,
-        )
-        self._tmpuow = nw_factory(
-            "FS", self._tmppath, self._settings.caso_file, self._scriptpath
+        self._shared = shared
+        self._reused: Dict[str, commands.ZipMember] = {}
+        self._generated: Dict[str, str] = {}
+        # Opens the deck only once for all the readings
+        self._zipsession = (
+            zipsession
+            if zipsession is not None
+            else ZipSession(str(self._zippath))
         )
+        # Instantiates UoW
+        if nwuow is not None:
+            self._nwuow = nwuow
+        elif self._settings.deck_repository == "ZIP":
+            self._nwuow = nw_factory(
+                "ZIP", self._zipsession, self._settings.caso_file
+            )
+        else:
+            # Extracts "caso.dat"
+            command = commands.ExtractZipFile(
+                str(self._zippath),
+                str(self._tmppath),
+                self._settings.caso_file,
+            )
+            extract_file(command, self._zipsession)
+            self._nwuow = nw_factory(
+                "FS", str(self._tmppath), self._settings.caso_file
+            )
         self._clustersuow = clusters_factory(
             "FS",
-            self._clusterspath,
+            str(self._clusterspath),
             self._settings.clusters_file,
             self._settings.installed_capacity_file,
             self._settings.ftm_file,
             self._settings.average_wind_file,
+            sidecar=self._settings.clusters_sidecar,
         )
+        self._manifest = self.__read_manifest()
+
+    @property
+    def settings(self) -> Settings:
+        return self._settings
+
+    def __read_manifest(self) -> Manifest:
+        filename = self._settings.manifest_file
+        members = self._zipsession.members
+        current = {n: (i.CRC, i.file_size) for n, i in members.items()}
+        if filename in members:
+            try:
+                return Manifest.parse(
+                    filename, current, self._zipsession.read(filename)
+                )
+            except (ValueError, KeyError, TypeError) as e:
+                Log.log().warning(
+                    f"Manifesto {filename} inválido, todos os arquivos"
+                    + f" serão gerados: {e}"
+                )
+        return Manifest(filename, current)
+
+    def __stored_blocks(self) -> Optional[pd.DataFrame]:
+        """
+        Obtém os patamares de geração eólica do manifesto, quando o
+        patamar.dat do deck foi escrito pela execução que o gerou e,
+        portanto, não os contém mais. Somente são usados se foram
+        retirados do mesmo bloco de geração não simulada.
+        """
+        with self._nwuow:
+            patamar = self._nwuow.newave.arquivos.patamar
+        if self._manifest.written(patamar) and self.__same_windblock():
+            return self._manifest.blocks
+        return None
+
+    def __stored_nonsimulated(self) -> Optional[pd.DataFrame]:
+        """
+        Obtém a geração eólica não simulada do manifesto, quando o
+        sistema.dat do deck foi escrito pela execução que o gerou e,
+        portanto, não a contém mais. Somente é usada se foi retirada do
+        mesmo bloco de geração não simulada.
+        """
+        with self._nwuow:
+            sistema = self._nwuow.newave.arquivos.sistema
+        if self._manifest.written(sistema) and self.__same_windblock():
+            return self._manifest.nonsimulated
+        return None
 
+    def __same_windblock(self) -> bool:
+        return self._manifest.windblock == self._settings.nonsimulatedblock
+
+    def __restore_windblock(self):
+        """
+        Devolve ao patamar.dat e ao sistema.dat as linhas retiradas por
+        uma execução com outro bloco de geração não simulada, para que o
+        deck seja processado como o deck original.
+        """
+        windblock = self._manifest.windblock
+        if windblock is None or self.__same_windblock():
+            return
+        with self._nwuow:
+            patamar = self._nwuow.newave.arquivos.patamar
+            sistema = self._nwuow.newave.arquivos.sistema
+        blocks = self._manifest.blocks
+        if self._manifest.written(patamar) and blocks is not None:
+            restore_patamar_data(
+                commands.RestorePatamarData(windblock, blocks), self._nwuow
+            )
+        nonsimulated = self._manifest.nonsimulated
+        if self._manifest.written(sistema) and nonsimulated is not None:
+            restore_sistema_data(
+                commands.RestoreSistemaData(windblock, nonsimulated),
+                self._nwuow,
+            )
+
+    @profiled("deck")
     def extract_files_from_deck(self):
+        # The files are read directly from the zip
+        if self._settings.deck_repository == "ZIP":
+            return
         # Extracts "arquivos.dat"
-        with self._tmpuow:
-            arquivos_filename = self._tmpuow.newave.caso.arquivos
+        with self._nwuow:
+            arquivos_filename = self._nwuow.newave.caso.arquivos
         command = commands.ExtractZipFile(
-            str(self._zippath), self._settings.tmpdir, arquivos_filename
+            str(self._zippath), str(self._tmppath), arquivos_filename
         )
-        extract_file(command)
+        extract_file(command, self._zipsession)
         # Extracts the other necessary files
-        with self._tmpuow:
+        with self._nwuow:
             files_to_extract = [
-                self._tmpuow.newave.arquivos.dger,
-                self._tmpuow.newave.arquivos.sistema,
-                self._tmpuow.newave.arquivos.patamar,
+                self._nwuow.newave.arquivos.dger,
+                self._nwuow.newave.arquivos.sistema,
+                self._nwuow.newave.arquivos.patamar,
             ]
-        for f in files_to_extract:
-            command = commands.ExtractZipFile(
-                str(self._zippath), self._settings.tmpdir, f
-            )
-            extract_file(command)
+        command = commands.ExtractZipFiles(
+            str(self._zippath), str(self._tmppath), files_to_extract
+        )
+        # The files are converted to UTF-8 by the repository when read
+        extract_files(command, self._zipsession)
 
+    @profiled("deck")
     def process_deck_data(self):
         dger_command = commands.ProcessDgerData(
             self._settings.generatewind,
             self._settings.windcutpenalty,
         )
-        self._dger_data = process_dger_data(dger_command, self._tmpuow)
+        self._dger_data = process_dger_data(dger_command, self._nwuow)
         patamar_command = commands.ProcessPatamarData(
             self._settings.nonsimulatedblock
         )
@@ -103,11 +228,26 @@ class GenerationHandler:
             self._settings.nonsimulatedblock
         )
         self._patamar_count, self._patamar_data = process_patamar_data(
-            patamar_command, self._tmpuow, self._clustersuow
+            patamar_command, self._nwuow, self._clustersuow
         )
+        stored_blocks = self.__stored_blocks()
+        if stored_blocks is not None:
+            Log.log().info(
+                "Usando os patamares de geração eólica do manifesto do deck"
+            )
+            self._patamar_data = messages.PatamarData(stored_blocks)
+        self._manifest.blocks = self._patamar_data.blocks
         self._sistema_data = process_sistema_data(
-            sistema_command, self._tmpuow, self._clustersuow
+            sistema_command, self._nwuow, self._clustersuow
         )
+        stored_nonsimulated = self.__stored_nonsimulated()
+        if stored_nonsimulated is not None:
+            Log.log().info(
+                "Usando a geração eólica não simulada do manifesto do deck"
+            )
+            self._sistema_data = messages.SistemaData(stored_nonsimulated)
+        self._manifest.nonsimulated = self._sistema_data.nonsimulated
+        self._manifest.windblock = self._settings.nonsimulatedblock
 
     def __generate_eolicacadastro(self):
         comando = commands.GenerateEolicaCadastro(
@@ -118,11 +258,13 @@ class GenerationHandler:
             self._dger_data.study_horizon,
             self._dger_data.post_study_horizon,
         )
-        generate_eolicacadastro(comando, self._tmpuow, self._clustersuow)
+        self._clusters_index = generate_eolicacadastro(
+            comando, self._nwuow, self._clustersuow
+        )
 
     def __generate_eolicasubmercado(self):
         comando = commands.GenerateEolicaSubmercado()
-        generate_eolicasubmercado(comando, self._tmpuow, self._clustersuow)
+        generate_eolicasubmercado(comando, self._nwuow, self._clustersuow)
 
     def __generate_eolicaconfig(self):
         comando = commands.GenerateEolicaConfig(
@@ -132,7 +274,7 @@ class GenerationHandler:
             self._dger_data.study_horizon,
             self._dger_data.post_study_horizon,
         )
-        generate_eolicaconfig(comando, self._tmpuow, self._clustersuow)
+        generate_eolicaconfig(comando, self._nwuow, self._clustersuow)
 
     def __generate_eolicafte(self):
         comando = commands.GenerateEolicaFTE(
@@ -141,16 +283,17 @@ class GenerationHandler:
             self._dger_data.pre_study_horizon,
             self._dger_data.study_horizon,
             self._dger_data.post_study_horizon,
+            self._clusters_index,
         )
-        generate_eolicafte(comando, self._tmpuow, self._clustersuow)
+        generate_eolicafte(comando, self._nwuow, self._clustersuow)
 
     def __generate_eolicaposto(self):
         comando = commands.GenerateEolicaPosto()
-        generate_eolicaposto(comando, self._tmpuow, self._clustersuow)
+        generate_eolicaposto(comando, self._nwuow, self._clustersuow)
 
     def __generate_eolicahistorico(self):
-        comando = commands.GenerateEolicaHistorico()
-        generate_eolicahistorico(comando, self._tmpuow, self._clustersuow)
+        comando = commands.GenerateEolicaHistorico(self._clusters_index)
+        generate_eolicahistorico(comando, self._nwuow, self._clustersuow)
 
     def __generate_eolicageracao(self):
         comando = commands.GenerateEolicaGeracao(
@@ -161,73 +304,237 @@ class GenerationHandler:
             self._dger_data.post_study_horizon,
             self._patamar_count,
             self._patamar_data.blocks,
+            self._clusters_index,
         )
-        generate_eolicageracao(comando, self._tmpuow, self._clustersuow)
+        generate_eolicageracao(comando, self._nwuow, self._clustersuow)
+
+    def __index_clusters(self):
+        self._clusters_index = index_clusters(self._clustersuow)
+
+    def __inputs(self) -> Dict[str, str]:
+        """
+        Calcula a assinatura das entradas de cada arquivo gerado.
+        """
+        files = {
+            f: file_digest(str(self._clusterspath.joinpath(f)))
+            for f in [
+                self._settings.clusters_file,
+                self._settings.installed_capacity_file,
+                self._settings.ftm_file,
+                self._settings.average_wind_file,
+            ]
+        }
+        clusters = files[self._settings.clusters_file]
+        installed_capacity = files[self._settings.installed_capacity_file]
+        ftm = files[self._settings.ftm_file]
+        average_wind = files[self._settings.average_wind_file]
+        dger = asdict(self._dger_data)
+        patamar = [
+            self._patamar_count,
+            self._settings.nonsimulatedblock,
+            blocks_to_json(self._patamar_data.blocks),
+        ]
+        inputs: Dict[str, Iterable] = {
+            self._settings.eolicacadastro_file: [
+                clusters,
+                installed_capacity,
+                dger,
+            ],
+            self._settings.eolicasubmercado_file: [clusters],
+            self._settings.eolicaconfig_file: [clusters, dger],
+            self._settings.eolicafte_file: [clusters, ftm, dger],
+            self._settings.eolicaposto_file: [clusters],
+            self._settings.histventos_file: [clusters, average_wind],
+            self._settings.eolicageracao_file: [clusters, dger, patamar],
+        }
+        return {f: digest(list(i)) for f, i in inputs.items()}
+
+    def __incremental(
+        self,
+        filename: str,
+        inputs: Dict[str, str],
+        generate: Callable[[], None],
+        keep: Optional[Callable[[], None]] = None,
+    ) -> Callable[[], None]:
+        """
+        Gera o arquivo somente quando as suas entradas mudaram desde a
+        geração do que está no deck.
+        """
+
+        def run():
+            if self._settings.incremental_generation and (
+                self._manifest.up_to_date(filename, inputs[filename])
+            ):
+                Log.log().info(
+                    f"Mantendo arquivo {filename}: entradas sem alterações"
+                )
+                if keep is not None:
+                    keep()
+                return
+            self._manifest.generating(filename, inputs[filename])
+            key = (filename, inputs[filename])
+            if self._shared is not None and key in self._shared:
+                Log.log().info(
+                    f"Copiando arquivo {filename} de"
+                    + f" {self._shared[key].zippath}"
+                )
+                self._reused[filename] = self._shared[key]
+                if keep is not None:
+                    keep()
+                return
+            self._generated[filename] = inputs[filename]
+            generate()
 
+        return run
+
+    @profiled("deck")
     def generate_deck_newfiles(self):
-        self.__generate_eolicacadastro()
-        self.__generate_eolicasubmercado()
-        self.__generate_eolicaconfig()
-        self.__generate_eolicafte()
-        self.__generate_eolicaposto()
-        self.__generate_eolicahistorico()
-        self.__generate_eolicageracao()
+        inputs = self.__inputs()
+        # The files that need the PEE codes wait for the cadastro
+        stages = [
+            Stage(
+                "eolica-cadastro",
+                self.__incremental(
+                    self._settings.eolicacadastro_file,
+                    inputs,
+                    self.__generate_eolicacadastro,
+                    self.__index_clusters,
+                ),
+            ),
+            Stage(
+                "eolica-submercado",
+                self.__incremental(
+                    self._settings.eolicasubmercado_file,
+                    inputs,
+                    self.__generate_eolicasubmercado,
+                ),
+            ),
+            Stage(
+                "eolica-config",
+                self.__incremental(
+                    self._settings.eolicaconfig_file,
+                    inputs,
+                    self.__generate_eolicaconfig,
+                ),
+            ),
+            Stage(
+                "eolica-fte",
+                self.__incremental(
+                    self._settings.eolicafte_file,
+                    inputs,
+                    self.__generate_eolicafte,
+                ),
+                ["eolica-cadastro"],
+            ),
+            Stage(
+                "eolica-posto",
+                self.__incremental(
+                    self._settings.eolicaposto_file,
+                    inputs,
+                    self.__generate_eolicaposto,
+                ),
+            ),
+            Stage(
+                "hist-ventos",
+                self.__incremental(
+                    self._settings.histventos_file,
+                    inputs,
+                    self.__generate_eolicahistorico,
+                ),
+                ["eolica-cadastro"],
+            ),
+            Stage(
+                "eolica-geracao",
+                self.__incremental(
+                    self._settings.eolicageracao_file,
+                    inputs,
+                    self.__generate_eolicageracao,
+                ),
+                ["eolica-cadastro"],
+            ),
+        ]
+        run_stages(stages)
 
+    @profiled("deck")
     def compress_files_to_deck(self):
         # Static
         installdir = pathlib.Path(self._settings.installdir).resolve()
-        command = commands.AddFileToZip(
-            self._zippath,
-            installdir.joinpath(self._settings.static_file_path),
-            self._settings.indice_file,
-        )
-        compress_file(command)
-        # Generated during execution
-        with self._tmpuow:
-            files_to_compress = [
-                self._tmpuow.newave.arquivos.dger,
-                self._tmpuow.newave.arquivos.sistema,
-                self._tmpuow.newave.arquivos.patamar,
-                self._settings.eolicacadastro_file,
-                self._settings.eolicasubmercado_file,
-                self._settings.eolicaconfig_file,
-                self._settings.eolicafte_file,
-                self._settings.eolicaposto_file,
-                self._settings.histventos_file,
-                self._settings.eolicageracao_file,
-            ]
-        for f in files_to_compress:
-            command = commands.AddFileToZip(
-                self._zippath, self._settings.tmpdir, f
+        staticdir = installdir.joinpath(self._settings.static_file_path)
+        members: Dict[
+            str, Union[str, bytes, Iterable[bytes], commands.ZipMember]
+        ] = {
+            self._settings.indice_file: str(
+                staticdir.joinpath(self._settings.indice_file)
+            )
+        }
+        members.update(self._reused)
+        # Writes the changed files straight to the deck, rewriting it
+        # only once
+        srczip: Optional[str] = None
+        if self._output == self._zippath:
+            self._zipsession.close()
+        else:
+            srczip = str(self._zippath)
+        with self._nwuow:
+            self._nwuow.commit_to_archive(
+                str(self._output), members, self._manifest, srczip
             )
-            compress_file(command)
+        if self._shared is not None:
+            for filename, inputs in self._generated.items():
+                self._shared[(filename, inputs)] = commands.ZipMember(
+                    str(self._output), filename
+                )
 
-    def generate(self):
+    def generate(self) -> bool:
         if not self.validate():
-            return
+            return False
         # Reads essential information
         # Edits existing files
         Log.log().info(" ## PROCESSAMENTO DOS ARQUIVOS  ##")
-        self.process_deck_data()
-        # Generates each of the new deck files
-        self.generate_deck_newfiles()
-        # Adds new deck files to the zip
-        self.compress_files_to_deck()
+        try:
+            self.process_deck_data()
+            # Generates each of the new deck files
+            self.generate_deck_newfiles()
+            # Adds new deck files to the zip
+            self.compress_files_to_deck()
+        except Exception:
+            # The deck is only changed by the commit
+            with self._nwuow:
+                self._nwuow.rollback()
+            raise
+        return True
+
+    def close(self):
+        self._zipsession.close()
 
+    @profiled("deck")
     def validate(self) -> bool:
         Log.log().info(" ## VALIDAÇÃO DOS ARQUIVOS  ##")
+        self.__restore_windblock()
         initial_year, final_year = validate_dger_data(
             commands.ValidateDgerData(),
-            self._tmpuow,
-        )
-        valid_patamar = validate_patamar_data(
-            commands.ValidatePatamarData(self._settings.nonsimulatedblock),
-            self._tmpuow,
-        )
-        valid_sistema = validate_sistema_data(
-            commands.ValidateSistemaData(self._settings.nonsimulatedblock),
-            self._tmpuow,
+            self._nwuow,
         )
+        valid_patamar = self.__stored_blocks()
+        if valid_patamar is None:
+            valid_patamar = validate_patamar_data(
+                commands.ValidatePatamarData(self._settings.nonsimulatedblock),
+                self._nwuow,
+            )
+        else:
+            Log.log().info(
+                "Patamares de geração eólica lidos do manifesto do deck"
+            )
+        valid_sistema = self.__stored_nonsimulated()
+        if valid_sistema is None:
+            valid_sistema = validate_sistema_data(
+                commands.ValidateSistemaData(self._settings.nonsimulatedblock),
+                self._nwuow,
+            )
+        else:
+            Log.log().info(
+                "Geração eólica não simulada lida do manifesto do deck"
+            )
         valid_clusters = validate_cluster_files(self._clustersuow)
         valid = all(
             [
@@ -272,17 +579,46 @@ class GenerationHandler:
         return valid
 
 
-def __construct_handler() -> Optional[GenerationHandler]:
+def __build_handler(settings: Settings) -> GenerationHandler:
+    Log.configure_logging(settings.basedir)
+    if settings.profile or settings.metrics:
+        __enable_profile(settings)
+    try:
+        return GenerationHandler(settings)
+    except Exception:
+        # The profile is only reported with the handler, so it is not
+        # kept enabled for the next decks of the process
+        if settings.profile or settings.metrics:
+            Profiler.disable()
+        raise
+
+
+def __construct_handler(
+    settings: Optional[Settings] = None,
+) -> Optional[GenerationHandler]:
     handler: Optional[GenerationHandler] = None
     try:
-        settings = Settings()
-        Log.configure_logging(settings.basedir)
-        handler = GenerationHandler(settings)
+        if settings is None:
+            settings = Settings()
+        handler = __build_handler(settings)
     except Exception as e:
         print(f"Erro na leitura das configurações: {e}")
     return handler
 
 
+def __enable_profile(settings: Settings):
+    # The stages of decks processed at the same time in the process
+    # would be mixed, so only the first one is profiled
+    if not Profiler.try_enable(memory=settings.metrics):
+        Log.log().warning(
+            "Perfil de execução já registrado por outro deck do processo:"
+            + f" o deck {settings.newave_deck_zip} não será registrado"
+        )
+        settings.profile = False
+        settings.metrics = False
+        settings.profile_trace = None
+
+
 def __greet():
     Log.log().info(
         " #### APLICAÇÃO PARA PROCESSAMENTO DO "
@@ -294,19 +630,77 @@ def __farewell():
     Log.log().info(" #### FIM DO PROCESSAMENTO ####")
 
 
-def validate():
-    handler = __construct_handler()
-    if handler is not None:
-        __greet()
-        handler.extract_files_from_deck()
-        handler.validate()
-        __farewell()
+def __report_profile(settings: Settings):
+    if not (settings.profile or settings.metrics):
+        return
+    Profiler.disable()
+    if settings.profile:
+        Log.log().info("Tempos de execução das etapas:\n" + Profiler.summary())
+    if settings.metrics:
+        basedir = pathlib.Path(settings.basedir).resolve()
+        path = basedir.joinpath(
+            pathlib.Path(settings.newave_deck_zip).stem + "-metricas.json"
+        )
+        Profiler.write_report(
+            str(path),
+            deck=settings.newave_deck_zip,
+            clusters=settings.clustersdir,
+        )
+        Log.log().info(f"Métricas de execução salvas em {path}")
+    if settings.profile_trace is not None:
+        path = (
+            pathlib.Path(settings.basedir)
+            .resolve()
+            .joinpath(settings.profile_trace)
+        )
+        Profiler.write_trace(
+            str(path),
+            deck=settings.newave_deck_zip,
+            clusters=settings.clustersdir,
+        )
+        Log.log().info(f"Tempos de execução das etapas salvos em {path}")
 
 
-def generate():
-    handler = __construct_handler()
+def validate(settings: Optional[Settings] = None):
+    handler = __construct_handler(settings)
     if handler is not None:
         __greet()
-        handler.extract_files_from_deck()
-        handler.generate()
+        try:
+            with Profiler.span("validaarquivos", "comando"):
+                handler.extract_files_from_deck()
+                handler.validate()
+        finally:
+            handler.close()
+            __report_profile(handler.settings)
         __farewell()
+
+
+def generate(settings: Optional[Settings] = None) -> bool:
+    """
+    Gera os arquivos de um deck, retornando se a geração foi concluída.
+    """
+    handler = __construct_handler(settings)
+    if handler is None:
+        return False
+    return __generate(handler)
+
+
+def generate_deck(settings: Settings) -> bool:
+    """
+    Gera os arquivos de um deck como `generate`, mas propaga os erros na
+    leitura das configurações e do deck, em vez de só exibi-los.
+    """
+    return __generate(__build_handler(settings))
+
+
+def __generate(handler: GenerationHandler) -> bool:
+    __greet()
+    try:
+        with Profiler.span("geradeck", "comando"):
+            handler.extract_files_from_deck()
+            generated = handler.generate()
+    finally:
+        handler.close()
+        __report_profile(handler.settings)
+    __farewell()
+    return generated
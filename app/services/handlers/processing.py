@@ -1,16 +1,15 @@
 from datetime import datetime
-from dateutil.relativedelta import relativedelta  # type: ignore
 from app.services.unitofwork.newave import AbstractNewaveUnitOfWork
 from app.services.unitofwork.clusters import AbstractClustersUnitOfWork
 from app.utils.log import Log
+from app.utils.profiling import profiled
 import numpy as np  # type: ignore
 import pandas as pd  # type: ignore
-from typing import Tuple, Optional
+from typing import List, Tuple, Optional
+from app.utils.registertable import RegisterTable, RegisterTableFile
 import app.domain.messages as messages
 import app.domain.commands as commands
 
-from cfinterface.data.registerdata import RegisterData
-from cfinterface.components.defaultregister import DefaultRegister
 from inewave.newave.eolicacadastro import (
     EolicaCadastro,
 )
@@ -55,7 +54,12 @@ from inewave.newave.modelos.eolicageracao import (
     RegistroPEEGeracaoPatamar,
 )
 
+# Maximum number of records of each part of the files that are
+# produced while being written
+CHUNK_RECORDS = 100000
 
+
+@profiled("processamento")
 def process_dger_data(
     command: commands.ProcessDgerData, uow: AbstractNewaveUnitOfWork
 ) -> Optional[messages.DgerData]:
@@ -106,6 +110,7 @@ def process_dger_data(
         return data
 
 
+@profiled("processamento")
 def process_patamar_data(
     command: commands.ProcessPatamarData,
     uow: AbstractNewaveUnitOfWork,
@@ -134,6 +139,7 @@ def process_patamar_data(
         )
 
 
+@profiled("processamento")
 def process_sistema_data(
     command: commands.ProcessSistemaData,
     uow: AbstractNewaveUnitOfWork,
@@ -161,28 +167,123 @@ def process_sistema_data(
         )
 
 
+def __restored_rows(
+    df: pd.DataFrame, rows: pd.DataFrame, windblock: int
+) -> pd.DataFrame:
+    """
+    Substitui as linhas de um bloco de geração não simulada pelas linhas
+    retiradas dele, mantendo a ordem por subsistema e bloco dos arquivos.
+    """
+    restored = pd.concat(
+        [df.loc[df["Bloco"] != windblock, :], rows.astype(df.dtypes)],
+        ignore_index=True,
+    )
+    return restored.sort_values(
+        ["Subsistema", "Bloco"], kind="stable"
+    ).reset_index(drop=True)
+
+
+@profiled("processamento")
+def restore_patamar_data(
+    command: commands.RestorePatamarData,
+    uow: AbstractNewaveUnitOfWork,
+):
+    Log.log().info(f"Restaurando o bloco {command.windblock} no patamar.dat")
+    with uow:
+        p = uow.newave.get_patamar()
+        df = p.usinas_nao_simuladas
+        assert df is not None
+        p.usinas_nao_simuladas = __restored_rows(
+            df, command.blocks, command.windblock
+        )
+        uow.newave.set_patamar(p)
+
+
+@profiled("processamento")
+def restore_sistema_data(
+    command: commands.RestoreSistemaData,
+    uow: AbstractNewaveUnitOfWork,
+):
+    Log.log().info(f"Restaurando o bloco {command.windblock} no sistema.dat")
+    with uow:
+        p = uow.newave.get_sistema()
+        df = p.geracao_usinas_nao_simuladas
+        assert df is not None
+        p.geracao_usinas_nao_simuladas = __restored_rows(
+            df, command.nonsimulated, command.windblock
+        )
+        uow.newave.set_sistema(p)
+
+
+def __installed_capacity_series(
+    installed_capacity: pd.DataFrame,
+    clusternames: List[str],
+    months: pd.DatetimeIndex,
+) -> Tuple[pd.DataFrame, pd.Series]:
+    """
+    Alinha as capacidades instaladas de cada cluster aos meses
+    fornecidos, em uma tabela [mês, cluster] que contém NaN nos meses
+    sem dados, e obtém o último valor informado para cada cluster.
+    """
+    data = installed_capacity.copy(deep=False)
+    data["cluster"] = data["cluster"].astype(str)
+    data["data_hora"] = (
+        pd.to_datetime(data["data_hora"], format="%Y-%m")
+        .dt.to_period("M")
+        .dt.to_timestamp()
+    )
+    last = data.drop_duplicates("cluster", keep="last").set_index("cluster")[
+        "capacidade_instalada"
+    ]
+    table = (
+        data.drop_duplicates(["cluster", "data_hora"], keep="last")
+        .pivot(
+            index="data_hora", columns="cluster", values="capacidade_instalada"
+        )
+        .reindex(index=months, columns=clusternames)
+    )
+    return table, last.reindex(clusternames)
+
+
+def __clusters_index(clusters: pd.DataFrame) -> messages.ClustersIndex:
+    clusternames = [str(c) for c in clusters["cluster"]]
+    clustercodes = list(range(1, len(clusternames) + 1))
+    return messages.ClustersIndex(
+        dict(zip(clusternames, clustercodes)),
+        dict(zip(clustercodes, clusters["submercado"].astype(int).tolist())),
+    )
+
+
+@profiled("processamento")
+def index_clusters(
+    clusters_uow: AbstractClustersUnitOfWork,
+) -> messages.ClustersIndex:
+    """
+    Obtém os códigos dos PEE atribuídos aos clusters no
+    eolica-cadastro.csv, sem gerar o arquivo.
+    """
+    with clusters_uow:
+        clusters = clusters_uow.clusters.get_clusters()
+    return __clusters_index(clusters)
+
+
+@profiled("processamento")
 def generate_eolicacadastro(
     command: commands.GenerateEolicaCadastro,
     nw_uow: AbstractNewaveUnitOfWork,
     clusters_uow: AbstractClustersUnitOfWork,
-):
+) -> messages.ClustersIndex:
     Log.log().info("Gerando arquivo eolica-cadastro.csv")
     with clusters_uow:
         clusters = clusters_uow.clusters.get_clusters()
         installed_capacity = clusters_uow.clusters.get_installed_capacity()
-        installed_capacity["data_hora"] = pd.to_datetime(
-            installed_capacity["data_hora"], format="%Y-%m"
-        )
-        installed_capacity["data_hora"] = installed_capacity[
-            "data_hora"
-        ].apply(lambda dt: dt.replace(day=1))
-    file = EolicaCadastro(data=RegisterData(DefaultRegister(data="")))
+    clusternames = [str(c) for c in clusters["cluster"]]
+    clustercodes = np.arange(1, len(clusternames) + 1)
     # Adds PEE-CAD
-    for idx, line in clusters.iterrows():
-        rc = RegistroPEECadastro()
-        rc.codigo_pee = idx + 1
-        rc.nome_pee = str(line["cluster"])
-        file.append_registro(rc)
+    cadastro = RegisterTable(
+        RegistroPEECadastro,
+        {"codigo_pee": clustercodes, "nome_pee": clusternames},
+    )
     # Adds PEE-POT-INST-PER
     # TODO - Reabilitar quando o NEWAVE tiver suporte para pré-estudo
     # neste aspecto. Atualmente da erro por não tolerar períodos anteriores.
@@ -203,44 +304,54 @@ def generate_eolicacadastro(
     final_months = initial_months
     initial_months = np.append(initial_months, initial_post_study)
     final_months = np.append(final_months, final_post_study)
-    for idx, line in clusters.iterrows():
-        last_cluster_capacity = (
-            installed_capacity.loc[
-                (installed_capacity["cluster"] == str(line["cluster"])),
-                "capacidade_instalada",
-            ]
-            .sort_index()
-            .tolist()[-1]
+    capacities, last_capacities = __installed_capacity_series(
+        installed_capacity, clusternames, pd.DatetimeIndex(initial_months)
+    )
+    missing = []
+    columns: List[List[np.ndarray]] = [[], [], [], []]
+    for code, clustername in zip(clustercodes, clusternames):
+        values = capacities[clustername].to_numpy()
+        finals = final_months.copy()
+        # The last known value is used from the first missing period
+        # until the end of the horizon
+        gaps = np.flatnonzero(np.isnan(values))
+        if len(gaps) > 0:
+            end = gaps[0]
+            missing.append(
+                f"{clustername} ({initial_months[end].strftime('%m/%Y')}"
+                + f" - último valor {[last_capacities[clustername]]})"
+            )
+            values = values[: end + 1]
+            values[end] = last_capacities[clustername]
+            finals = finals[: end + 1]
+            finals[end] = final_months[-1]
+        columns[0].append(np.full(len(values), code))
+        columns[1].append(initial_months[: len(values)])
+        columns[2].append(finals)
+        columns[3].append(values)
+    potencias = RegisterTable(
+        RegistroPEEPotenciaInstaladaPeriodo,
+        {
+            "codigo_pee": np.concatenate(columns[0]),
+            "periodo_inicial": np.concatenate(columns[1]),
+            "periodo_final": np.concatenate(columns[2]),
+            "potencia_instalada": np.concatenate(columns[3]),
+        },
+    )
+    if len(missing) > 0:
+        Log.log().warning(
+            f"Não existe capacidade instalada para {len(missing)} clusters"
+            + " a partir dos períodos indicados. Usando o último valor"
+            + f" de cada um até o fim do horizonte: {', '.join(missing)}"
         )
-        ended = False
-        for im, fm in zip(initial_months, final_months):
-            rpe = RegistroPEEPotenciaInstaladaPeriodo()
-            rpe.codigo_pee = idx + 1
-            rpe.periodo_inicial = im
-            rpe.periodo_final = fm
-            capacity_candidate = installed_capacity.loc[
-                (installed_capacity["cluster"] == str(line["cluster"]))
-                & (installed_capacity["data_hora"] == im),
-                "capacidade_instalada",
-            ]
-            if capacity_candidate.empty:
-                Log.log().warning(
-                    f"Não existe capacidade instalada para o cluster "
-                    + f"{str(line['cluster'])} - período {im.strftime('%m/%Y')}."
-                    + f" Usando o último valor {[last_cluster_capacity]}"
-                )
-                capacity_candidate = last_cluster_capacity
-                rpe.periodo_final = final_months[-1]
-                ended = True
-            rpe.potencia_instalada = float(capacity_candidate)
-            file.append_registro(rpe)
-            # If the end of the horizon has been reached
-            if ended:
-                break
     with nw_uow:
-        nw_uow.newave.set_eolicacadastro(file)
+        nw_uow.newave.set_eolicacadastro(
+            RegisterTableFile(EolicaCadastro, [cadastro, potencias])
+        )
+    return __clusters_index(clusters)
 
 
+@profiled("processamento")
 def generate_eolicasubmercado(
     command: commands.GenerateEolicaSubmercado,
     nw_uow: AbstractNewaveUnitOfWork,
@@ -249,16 +360,20 @@ def generate_eolicasubmercado(
     Log.log().info("Gerando arquivo eolica-submercado.csv")
     with clusters_uow:
         clusters = clusters_uow.clusters.get_clusters()
-    file = EolicaSubmercado(data=RegisterData(DefaultRegister(data="")))
-    for idx, line in clusters.iterrows():
-        r = RegistroPEESubmercado()
-        r.codigo_pee = idx + 1
-        r.codigo_submercado = int(line["submercado"])
-        file.append_registro(r)
+    table = RegisterTable(
+        RegistroPEESubmercado,
+        {
+            "codigo_pee": np.arange(1, len(clusters) + 1),
+            "codigo_submercado": clusters["submercado"].astype(int),
+        },
+    )
     with nw_uow:
-        nw_uow.newave.set_eolicasubmercado(file)
+        nw_uow.newave.set_eolicasubmercado(
+            RegisterTableFile(EolicaSubmercado, [table])
+        )
 
 
+@profiled("processamento")
 def generate_eolicaconfig(
     command: commands.GenerateEolicaConfig,
     nw_uow: AbstractNewaveUnitOfWork,
@@ -267,21 +382,25 @@ def generate_eolicaconfig(
     Log.log().info("Gerando arquivo eolica-config.csv")
     with clusters_uow:
         clusters = clusters_uow.clusters.get_clusters()
-    file = EolicaConfiguracao(data=RegisterData(DefaultRegister(data="")))
     years = [command.year + i for i in range(command.study_horizon)]
     initial_month = datetime(command.year, command.month, 1)
     final_month = datetime(years[-1] + command.post_study_horizon, 12, 1)
-    for idx, _ in clusters.iterrows():
-        r = RegistroPEEConfiguracaoPeriodo()
-        r.codigo_pee = idx + 1
-        r.data_inicial_estado_operacao = initial_month
-        r.data_final_estado_operacao = final_month
-        r.estado_operacao = "fixo"
-        file.append_registro(r)
+    table = RegisterTable(
+        RegistroPEEConfiguracaoPeriodo,
+        {
+            "codigo_pee": np.arange(1, len(clusters) + 1),
+            "data_inicial_estado_operacao": [initial_month] * len(clusters),
+            "data_final_estado_operacao": [final_month] * len(clusters),
+            "estado_operacao": ["fixo"] * len(clusters),
+        },
+    )
     with nw_uow:
-        nw_uow.newave.set_eolicaconfiguracao(file)
+        nw_uow.newave.set_eolicaconfiguracao(
+            RegisterTableFile(EolicaConfiguracao, [table])
+        )
 
 
+@profiled("processamento")
 def generate_eolicafte(
     command: commands.GenerateEolicaFTE,
     nw_uow: AbstractNewaveUnitOfWork,
@@ -290,29 +409,28 @@ def generate_eolicafte(
     Log.log().info("Gerando arquivo eolica-fte.csv")
     with clusters_uow:
         ftm = clusters_uow.clusters.get_ftm()
-    with nw_uow:
-        eolicacadastro = nw_uow.newave.get_eolicacadastro()
-    file = EolicaFTE(data=RegisterData(DefaultRegister(data="")))
     initial_month = datetime(command.year, command.month, 1)
     final_month = datetime(
         command.year + command.study_horizon + command.post_study_horizon - 1,
         12,
         1,
     )
-    for _, line in ftm.iterrows():
-        r = RegistroPEEFTE()
-        rc = eolicacadastro.pee_cad(nome_pee=str(line["cluster"]))
-        assert isinstance(rc, RegistroPEECadastro)
-        r.codigo_pee = rc.codigo_pee
-        r.data_inicial = initial_month
-        r.data_final = final_month
-        r.coeficiente_linear = float(line["b0"])
-        r.coeficiente_angular = float(line["b1"])
-        file.append_registro(r)
+    codes = [command.index.codes[str(c)] for c in ftm["cluster"]]
+    table = RegisterTable(
+        RegistroPEEFTE,
+        {
+            "codigo_pee": codes,
+            "data_inicial": [initial_month] * len(ftm),
+            "data_final": [final_month] * len(ftm),
+            "coeficiente_linear": ftm["b0"].astype(float),
+            "coeficiente_angular": ftm["b1"].astype(float),
+        },
+    )
     with nw_uow:
-        nw_uow.newave.set_eolicafte(file)
+        nw_uow.newave.set_eolicafte(RegisterTableFile(EolicaFTE, [table]))
 
 
+@profiled("processamento")
 def generate_eolicaposto(
     command: commands.GenerateEolicaPosto,
     nw_uow: AbstractNewaveUnitOfWork,
@@ -321,24 +439,24 @@ def generate_eolicaposto(
     Log.log().info("Gerando arquivo eolica-posto.csv")
     with clusters_uow:
         clusters = clusters_uow.clusters.get_clusters()
-    file = EolicaPosto(data=RegisterData(DefaultRegister(data="")))
-
-    for idx, line in clusters.iterrows():
-        rc = RegistroPostoVentoCadastro()
-        rc.codigo_posto = idx + 1
-        rc.nome_posto = str(line["cluster"])
-        file.append_registro(rc)
-
-    for idx, line in clusters.iterrows():
-        rp = RegistroPEEPostoVento()
-        rp.codigo_pee = idx + 1
-        rp.codigo_posto = idx + 1
-        file.append_registro(rp)
-
+    codes = np.arange(1, len(clusters) + 1)
+    postos = RegisterTable(
+        RegistroPostoVentoCadastro,
+        {
+            "codigo_posto": codes,
+            "nome_posto": [str(c) for c in clusters["cluster"]],
+        },
+    )
+    pees = RegisterTable(
+        RegistroPEEPostoVento, {"codigo_pee": codes, "codigo_posto": codes}
+    )
     with nw_uow:
-        nw_uow.newave.set_eolicaposto(file)
+        nw_uow.newave.set_eolicaposto(
+            RegisterTableFile(EolicaPosto, [postos, pees])
+        )
 
 
+@profiled("processamento")
 def generate_eolicahistorico(
     command: commands.GenerateEolicaHistorico,
     nw_uow: AbstractNewaveUnitOfWork,
@@ -346,118 +464,162 @@ def generate_eolicahistorico(
 ):
     Log.log().info("Gerando arquivo hist-ventos.csv")
     with clusters_uow:
-        clusters = clusters_uow.clusters.get_clusters()
         history = clusters_uow.clusters.get_average_wind()
         history["data_hora"] = pd.to_datetime(
             history["data_hora"], format="%Y-%m-%d"
         )
-    with nw_uow:
-        eolicacadastro = nw_uow.newave.get_eolicacadastro()
-    file = EolicaHistorico(data=RegisterData(DefaultRegister(data="")))
-    first_january = [h for h in history["data_hora"] if h.month == 1][0]
-    last_january = [h for h in history["data_hora"] if h.month == 1][-1]
+    dates = history["data_hora"]
+    januaries = dates[dates.dt.month == 1]
+    first_january = januaries.iloc[0]
+    last_january = januaries.iloc[-1]
     considered_history = history.loc[
-        (history["data_hora"] >= first_january)
-        & (history["data_hora"] <= last_january),
+        (dates >= first_january) & (dates <= last_january),
         :,
     ]
 
-    rh = RegistroHistoricoVentoHorizonte()
-    rh.data_inicial = first_january
-    rh.data_final = last_january
-    file.append_registro(rh)
-
-    for _, clusterline in clusters.iterrows():
-        clustername = str(clusterline["cluster"])
-        rc = eolicacadastro.pee_cad(nome_pee=clustername)
-        assert isinstance(rc, RegistroPEECadastro)
-        code = rc.codigo_pee
-        clusterhistory = considered_history.loc[
-            considered_history["cluster"] == clustername, :
-        ]
-        for _, line in clusterhistory.iterrows():
-            r = RegistroHistoricoVento()
-            r.codigo_posto = code
-            r.data_inicial = line["data_hora"]
-            r.data_final = line["data_hora"] + relativedelta(months=1)
-            r.velocidade = line["vento"]
-            r.direcao = 0.0
-            file.append_registro(r)
+    horizon = RegisterTable(
+        RegistroHistoricoVentoHorizonte,
+        {"data_inicial": [first_january], "data_final": [last_january]},
+    )
+
+    clustercodes = list(command.index.codes.items())
+    # Sorts the history by the cluster order, keeping the dates order
+    positions = (
+        considered_history["cluster"]
+        .map({name: i for i, (name, _) in enumerate(clustercodes)})
+        .astype(float)
+        .to_numpy()
+    )
+    selected = np.flatnonzero(~np.isnan(positions))
+    order = selected[np.argsort(positions[selected], kind="stable")]
+    clusterindices = positions[order].astype(np.int64)
+    allcodes = np.array([code for _, code in clustercodes], dtype=np.int64)
+
+    def winds():
+        for start in range(0, len(order), CHUNK_RECORDS):
+            chunk = considered_history.iloc[
+                order[start : start + CHUNK_RECORDS]
+            ]
+            codes = allcodes[clusterindices[start : start + CHUNK_RECORDS]]
+            yield RegisterTable(
+                RegistroHistoricoVento,
+                {
+                    "codigo_posto": codes,
+                    "data_inicial": chunk["data_hora"].to_numpy(),
+                    "data_final": (
+                        chunk["data_hora"] + pd.DateOffset(months=1)
+                    ).to_numpy(),
+                    "velocidade": chunk["vento"].to_numpy(dtype=float),
+                    "direcao": np.zeros(len(codes)),
+                },
+            )
+
     with nw_uow:
-        nw_uow.newave.set_histventos(file)
+        nw_uow.newave.set_histventos(
+            RegisterTableFile(EolicaHistorico, [horizon, winds])
+        )
+
+
+MONTHS = [
+    "Janeiro",
+    "Fevereiro",
+    "Março",
+    "Abril",
+    "Maio",
+    "Junho",
+    "Julho",
+    "Agosto",
+    "Setembro",
+    "Outubro",
+    "Novembro",
+    "Dezembro",
+]
+
+
+def __block_depths(
+    blockdepths: pd.DataFrame,
+    submarkets: List[int],
+    year: int,
+    study_horizon: int,
+    post_study_horizon: int,
+    numblocks: int,
+) -> np.ndarray:
+    """
+    Organiza as profundidades dos patamares em um array indexado por
+    [submercado, ano, mês, patamar], repetindo o último ano de estudo
+    nos anos de pós-estudo.
+    """
+    depths = np.full(
+        (len(submarkets), study_horizon, len(MONTHS), numblocks), np.nan
+    )
+    for i, sub in enumerate(submarkets):
+        df_sub = blockdepths.loc[blockdepths["Subsistema"] == sub, :]
+        years = df_sub["Ano"].to_numpy(dtype=np.int64) - year
+        # the blocks of each year are listed in sequence
+        blocks = np.arange(len(df_sub)) % numblocks
+        depths[i, years, :, blocks] = df_sub[MONTHS].to_numpy(dtype=float)
+    # freezes the year in the last study year
+    consulting_years = np.minimum(
+        np.arange(study_horizon + post_study_horizon), study_horizon - 1
+    )
+    return depths[:, consulting_years, :, :]
 
 
+@profiled("processamento")
 def generate_eolicageracao(
     command: commands.GenerateEolicaGeracao,
     nw_uow: AbstractNewaveUnitOfWork,
     clusters_uow: AbstractClustersUnitOfWork,
 ):
-
-    MONTHS = [
-        "Janeiro",
-        "Fevereiro",
-        "Março",
-        "Abril",
-        "Maio",
-        "Junho",
-        "Julho",
-        "Agosto",
-        "Setembro",
-        "Outubro",
-        "Novembro",
-        "Dezembro",
-    ]
-
     Log.log().info("Gerando arquivo eolica-geracao.csv")
 
-    with clusters_uow:
-        clusters = clusters_uow.clusters.get_clusters()
-
-    with nw_uow:
-        eolicacadastro = nw_uow.newave.get_eolicacadastro()
-        eolicasubmercado = nw_uow.newave.get_eolicasubmercado()
-
-    file = EolicaGeracao(data=RegisterData(DefaultRegister(data="")))
     numblocks = command.numblocks
-    blocks = list(range(1, numblocks + 1))
-    blockdepths = command.patamardata
-    years = [
-        command.year + i
-        for i in range(command.study_horizon + command.post_study_horizon)
+    # The periods are ordered by year, month and block, as the depths
+    months = pd.date_range(
+        datetime(command.year, 1, 1),
+        periods=(command.study_horizon + command.post_study_horizon)
+        * len(MONTHS),
+        freq="MS",
+    ).to_numpy()
+    dates = np.repeat(months, numblocks)
+    blocks = np.tile(np.arange(1, numblocks + 1), len(months))
+
+    codes = [
+        (code, command.index.submarkets[code])
+        for code in command.index.codes.values()
     ]
+    submarkets = sorted(set(sub for _, sub in codes))
+    depths = __block_depths(
+        command.patamardata,
+        submarkets,
+        command.year,
+        command.study_horizon,
+        command.post_study_horizon,
+        numblocks,
+    )
 
-    for _, clusterline in clusters.iterrows():
-        clustername = str(clusterline["cluster"])
-        rc = eolicacadastro.pee_cad(nome_pee=clustername)
-        assert isinstance(rc, RegistroPEECadastro)
-        code = rc.codigo_pee
-        rs = eolicasubmercado.pee_subm(codigo_pee=code)
-        assert isinstance(rs, RegistroPEESubmercado)
-        sub = rs.codigo_submercado
-        df = blockdepths.copy()
-        df_sub = df.loc[df["Subsistema"] == sub, MONTHS + ["Ano"]]
-        df_sub["Patamar"] = blocks * command.study_horizon
-        for year in years:
-            # freezes the year in the last study year
-            consulting_year = min(
-                [command.year + command.study_horizon - 1, year]
+    subindices = [submarkets.index(sub) for _, sub in codes]
+    # Each part has the records of whole clusters
+    clusters_per_chunk = max(1, CHUNK_RECORDS // len(dates))
+
+    def table():
+        for start in range(0, len(codes), clusters_per_chunk):
+            chunkcodes = codes[start : start + clusters_per_chunk]
+            chunkindices = subindices[start : start + clusters_per_chunk]
+            yield RegisterTable(
+                RegistroPEEGeracaoPatamar,
+                {
+                    "codigo_pee": np.repeat(
+                        [code for code, _ in chunkcodes], len(dates)
+                    ),
+                    "data_inicial": np.tile(dates, len(chunkcodes)),
+                    "data_final": np.tile(dates, len(chunkcodes)),
+                    "indice_patamar": np.tile(blocks, len(chunkcodes)),
+                    "profundidade": depths[chunkindices].reshape(-1),
+                },
             )
-            for m, month in enumerate(MONTHS, start=1):
-                for b in blocks:
-                    d = datetime(year=year, month=m, day=1)
-                    r = RegistroPEEGeracaoPatamar()
-                    r.codigo_pee = code
-                    r.data_inicial = d
-                    r.data_final = d
-                    r.indice_patamar = b
-                    r.profundidade = float(
-                        df_sub.loc[
-                            (df_sub["Ano"] == consulting_year)
-                            & (df_sub["Patamar"] == b),
-                            month,
-                        ]
-                    )
-                    file.append_registro(r)
 
     with nw_uow:
-        nw_uow.newave.set_eolicageracao(file)
+        nw_uow.newave.set_eolicageracao(
+            RegisterTableFile(EolicaGeracao, [table])
+        )
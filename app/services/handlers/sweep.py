@@ -0,0 +1,122 @@
+from app.models.settings import Settings
+import app.domain.commands as commands
+import app.domain.messages as messages
+from app.utils.log import Log
+from app.utils.zipsession import ZipSession
+from app.services.unitofwork.newave import factory as nw_factory
+from app.services.handlers.batch import log_result, report_results
+from app.services.handlers.generation import GenerationHandler
+from typing import Any, Callable, Dict, List, Tuple
+import pandas as pd  # type: ignore
+import pathlib
+import tempfile
+import time
+
+# Columns of the variants file -> (settings attribute, type)
+VARIANT_SETTINGS: Dict[str, Tuple[str, Callable[[str], Any]]] = {
+    "CONSIDERA_GERACAO_EOLICA": ("generatewind", int),
+    "PENALIDADE_CORTE_GERACAO_EOLICA": ("windcutpenalty", float),
+    "BLOCO_NAO_SIMULADAS_EOLICA": ("nonsimulatedblock", int),
+    "CLUSTERSDIR": ("clustersdir", str),
+}
+
+
+def __read_variants(path: str) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Lê o arquivo de variantes, com uma coluna `nome` e colunas com as
+    configurações alteradas em cada variante. As células vazias mantêm
+    o valor do arquivo de configuração, e os diretórios de clusters são
+    relativos ao diretório do arquivo.
+    """
+    df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    if "nome" not in df.columns:
+        raise ValueError(f"Arquivo de variantes {path} sem a coluna nome")
+    unknown = [
+        c for c in df.columns if c != "nome" and c not in VARIANT_SETTINGS
+    ]
+    if len(unknown) > 0:
+        raise ValueError(
+            f"Colunas desconhecidas no arquivo de variantes: {unknown}"
+        )
+    names = df["nome"].str.strip()
+    if names.duplicated().any() or (names == "").any():
+        raise ValueError("Os nomes das variantes devem ser únicos")
+    basedir = pathlib.Path(path).resolve().parent
+    variants: List[Tuple[str, Dict[str, Any]]] = []
+    for name, (_, row) in zip(names, df.iterrows()):
+        overrides: Dict[str, Any] = {}
+        for column, (attribute, kind) in VARIANT_SETTINGS.items():
+            if column not in df.columns or row[column].strip() == "":
+                continue
+            overrides[attribute] = kind(row[column].strip())
+        if "clustersdir" in overrides:
+            overrides["clustersdir"] = str(
+                basedir.joinpath(overrides["clustersdir"])
+            )
+        variants.append((name, overrides))
+    return variants
+
+
+def generate_variants(
+    clustersdir: str, deck: str, variantsfile: str, outdir: str
+) -> List[messages.DeckResult]:
+    """
+    Gera um deck para cada variante a partir do mesmo deck base, que é
+    lido uma única vez. Os arquivos cujas entradas não mudam entre as
+    variantes são gerados somente na primeira delas e copiados para as
+    demais. Retorna o resultado de cada variante, na ordem do arquivo.
+    """
+    settings = Settings(clustersdir, deck)
+    Log.configure_logging(settings.basedir)
+    variants = __read_variants(variantsfile)
+    zippath = pathlib.Path(settings.basedir).resolve().joinpath(deck)
+    outpath = pathlib.Path(outdir).resolve()
+    outpath.mkdir(parents=True, exist_ok=True)
+    Log.log().info(
+        f"Gerando {len(variants)} variantes do deck {zippath} em {outpath}"
+    )
+    start = time.perf_counter()
+    # The parsed base files are kept unchanged, and each variant
+    # changes its own copies of them
+    session = ZipSession(str(zippath))
+    nwuow = nw_factory("ZIP", session, settings.caso_file, keep_originals=True)
+    shared: Dict[Tuple[str, str], commands.ZipMember] = {}
+    results: List[messages.DeckResult] = []
+    try:
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            for name, overrides in variants:
+                output = outpath.joinpath(f"{zippath.stem}_{name}.zip")
+                Log.log().info(f" ## VARIANTE {name} ##")
+                variantstart = time.perf_counter()
+                error = None
+                try:
+                    variant = Settings(clustersdir, deck, tmpdirname)
+                    variant.deck_repository = "ZIP"
+                    for attribute, value in overrides.items():
+                        setattr(variant, attribute, value)
+                    handler = GenerationHandler(
+                        variant, session, nwuow, str(output), shared
+                    )
+                    success = handler.generate()
+                    if not success:
+                        error = "validação dos arquivos não concluída"
+                except Exception as e:
+                    success = False
+                    error = f"{type(e).__name__}: {e}"
+                finally:
+                    with nwuow:
+                        nwuow.restore()
+                results.append(
+                    messages.DeckResult(
+                        str(output),
+                        success,
+                        time.perf_counter() - variantstart,
+                        error,
+                    )
+                )
+                log_result(results[-1])
+    finally:
+        session.close()
+    if len(results) > 0:
+        report_results(results, time.perf_counter() - start)
+    return results
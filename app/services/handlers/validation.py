@@ -1,11 +1,13 @@
 from app.services.unitofwork.newave import AbstractNewaveUnitOfWork
 from app.services.unitofwork.clusters import AbstractClustersUnitOfWork
 from app.utils.log import Log
+from app.utils.profiling import profiled
 import app.domain.commands as commands
 import pandas as pd  # type: ignore
 from typing import Optional, Tuple
 
 
+@profiled("validação")
 def validate_dger_data(
     command: commands.ValidateDgerData,
     uow: AbstractNewaveUnitOfWork,
@@ -26,6 +28,7 @@ def validate_dger_data(
             return [initial_year, final_year]
 
 
+@profiled("validação")
 def validate_patamar_data(
     command: commands.ValidatePatamarData,
     uow: AbstractNewaveUnitOfWork,
@@ -40,7 +43,6 @@ def validate_patamar_data(
                 + " informações dos patamares de geração"
             )
             return None
-        p.usinas_nao_simuladas = df.loc[df["Bloco"] != command.windblock, :]
         winddata = df.loc[df["Bloco"] == command.windblock, :]
         if winddata.empty:
             Log.log().error(
@@ -54,6 +56,7 @@ def validate_patamar_data(
             return winddata
 
 
+@profiled("validação")
 def validate_sistema_data(
     command: commands.ValidateSistemaData,
     uow: AbstractNewaveUnitOfWork,
@@ -68,9 +71,6 @@ def validate_sistema_data(
                 + " informações de geração não simulada"
             )
             return None
-        p.geracao_usinas_nao_simuladas = df.loc[
-            df["Bloco"] != command.windblock, :
-        ]
         winddata = df.loc[df["Bloco"] == command.windblock, :]
         if winddata.empty:
             Log.log().error(
@@ -84,6 +84,7 @@ def validate_sistema_data(
             return winddata
 
 
+@profiled("validação")
 def validate_cluster_files(clusters_uow: AbstractClustersUnitOfWork) -> bool:
     try:
         with clusters_uow:
@@ -114,6 +115,7 @@ def validate_cluster_files(clusters_uow: AbstractClustersUnitOfWork) -> bool:
         return True
 
 
+@profiled("validação")
 def validate_cluster_file(clusters_uow: AbstractClustersUnitOfWork) -> bool:
     try:
         with clusters_uow:
@@ -138,6 +140,7 @@ def validate_cluster_file(clusters_uow: AbstractClustersUnitOfWork) -> bool:
         return True
 
 
+@profiled("validação")
 def validate_installed_capacity_file(
     command: commands.ValidateInstalledCapacityData,
     clusters_uow: AbstractClustersUnitOfWork,
@@ -179,6 +182,7 @@ def validate_installed_capacity_file(
         return True
 
 
+@profiled("validação")
 def validate_ftm_file(
     clusters_uow: AbstractClustersUnitOfWork,
 ) -> bool:
@@ -205,6 +209,7 @@ def validate_ftm_file(
         return True
 
 
+@profiled("validação")
 def validate_average_wind_file(
     clusters_uow: AbstractClustersUnitOfWork,
 ) -> bool:
@@ -1,8 +1,6 @@
 from abc import ABC, abstractmethod
-from os import chdir, curdir
 from typing import Type
 from typing import Dict
-from pathlib import Path
 
 
 from app.adapters.repository.clusters import (
@@ -15,8 +13,13 @@ class AbstractClustersUnitOfWork(ABC):
     def __enter__(self) -> "AbstractClustersUnitOfWork":
         return self
 
-    def __exit__(self, *args):
-        self.rollback()
+    def __exit__(self, exc_type, *args):
+        if exc_type is not None:
+            self.rollback()
+
+    @abstractmethod
+    def commit(self):
+        raise NotImplementedError
 
     @abstractmethod
     def rollback(self):
@@ -36,32 +39,25 @@ class FSClustersUnitOfWork(AbstractClustersUnitOfWork):
         installed_capacity_file: str,
         ftm_file: str,
         average_wind_file: str,
+        sidecar: bool = False,
     ):
-        self._current_path = Path(curdir).resolve()
-        self._clusters_path = path
-        self._clusters_file = clusters_file
-        self._installed_capacity_file = installed_capacity_file
-        self._ftm_file = ftm_file
-        self._average_wind_file = average_wind_file
-
-    def __enter__(self) -> "AbstractClustersUnitOfWork":
-        chdir(self._clusters_path)
         self._clusters = FSClustersRepository(
-            self._clusters_file,
-            self._installed_capacity_file,
-            self._ftm_file,
-            self._average_wind_file,
+            path,
+            clusters_file,
+            installed_capacity_file,
+            ftm_file,
+            average_wind_file,
+            sidecar,
         )
-        return super().__enter__()
-
-    def __exit__(self, *args):
-        chdir(self._current_path)
-        super().__exit__(*args)
 
     @property
     def clusters(self) -> FSClustersRepository:
         return self._clusters
 
+    def commit(self):
+        # The clustering files are only read
+        pass
+
     def rollback(self):
         pass
 
@@ -1,60 +1,160 @@
 from abc import ABC, abstractmethod
-from os import chdir, curdir
-from typing import Dict, Type
-from pathlib import Path
-
+from typing import Dict, Iterable, Type, Optional, Union
 
+import app.domain.commands as commands
 from app.adapters.repository.newave import (
     AbstractNewaveRepository,
+    CachedNewaveRepository,
     FSNewaveRepository,
+    ZIPNewaveRepository,
 )
+from app.models.manifest import Manifest
+from app.services.handlers.files import compress_files
+from app.utils.log import Log
+from app.utils.zipsession import ZipSession
 
 
 class AbstractNewaveUnitOfWork(ABC):
     def __enter__(self) -> "AbstractNewaveUnitOfWork":
         return self
 
-    def __exit__(self, *args):
-        self.rollback()
+    def __exit__(self, exc_type, *args):
+        # Changes are kept between uses until the commit, and are
+        # only discarded when something goes wrong
+        if exc_type is not None:
+            self.rollback()
+
+    @abstractmethod
+    def commit(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def commit_to_archive(
+        self,
+        zippath: str,
+        members: Optional[
+            Dict[
+                str,
+                Union[str, bytes, Iterable[bytes], commands.ZipMember],
+            ]
+        ] = None,
+        manifest: Optional[Manifest] = None,
+        srczip: Optional[str] = None,
+    ):
+        raise NotImplementedError
 
     @abstractmethod
     def rollback(self):
         raise NotImplementedError
 
+    @abstractmethod
+    def restore(self):
+        raise NotImplementedError
+
     @property
     @abstractmethod
     def newave(self) -> AbstractNewaveRepository:
         raise NotImplementedError
 
 
-class FSNewaveUnitOfWork(AbstractNewaveUnitOfWork):
-    def __init__(self, path: str, caso: str, encoding_script: str):
-        self._current_path = Path(curdir).resolve()
+class CachedNewaveUnitOfWork(AbstractNewaveUnitOfWork):
+    """
+    Unidade de trabalho sobre um repositório que acumula as alterações
+    nos arquivos, as quais só são escritas no commit, em uma única vez.
+    """
+
+    @property
+    @abstractmethod
+    def newave(self) -> CachedNewaveRepository:
+        raise NotImplementedError
+
+    def commit(self):
+        self.newave.flush()
+
+    def commit_to_archive(
+        self,
+        zippath: str,
+        members: Optional[
+            Dict[
+                str,
+                Union[str, bytes, Iterable[bytes], commands.ZipMember],
+            ]
+        ] = None,
+        manifest: Optional[Manifest] = None,
+        srczip: Optional[str] = None,
+    ):
+        """
+        Escreve as alterações diretamente no arquivo ZIP, em conjunto
+        com os demais membros fornecidos, reescrevendo-o uma única vez.
+        Com um manifesto, somente os membros diferentes dos que estão
+        no arquivo são escritos, e o arquivo só é reescrito se houver
+        algum deles. Com um arquivo de origem, os demais membros são
+        copiados dele, e o arquivo ZIP é sempre escrito.
+        """
+        outputs = dict(members) if members is not None else {}
+        outputs.update(self.newave.flush_to_buffers())
+        if manifest is not None:
+            outputs = manifest.pending(outputs)
+            if len(outputs) == 0 and srczip is None:
+                Log.log().info(f"Nenhum arquivo alterado em {zippath}")
+                return
+        compress_files(commands.AddFilesToZip(zippath, outputs, srczip))
+
+    def rollback(self):
+        self.newave.discard()
+
+    def restore(self):
+        """
+        Descarta todas as alterações, inclusive as já escritas em outros
+        arquivos, para que o mesmo deck seja processado novamente.
+        """
+        self.newave.restore()
+
+
+class FSNewaveUnitOfWork(CachedNewaveUnitOfWork):
+    def __init__(self, path: str, caso: str):
         self._newave_path = path
         self._caso = caso
-        self._encoding_script = encoding_script
+        self._newave: Optional[FSNewaveRepository] = None
 
     def __enter__(self) -> "AbstractNewaveUnitOfWork":
-        chdir(self._newave_path)
-        self._newave = FSNewaveRepository(
-            self._newave_path, self._caso, self._encoding_script
-        )
+        # The parsed files are kept between uses
+        if self._newave is None:
+            self._newave = FSNewaveRepository(self._newave_path, self._caso)
         return super().__enter__()
 
-    def __exit__(self, *args):
-        chdir(self._current_path)
-        super().__exit__(*args)
-
     @property
     def newave(self) -> FSNewaveRepository:
+        assert self._newave is not None
         return self._newave
 
-    def rollback(self):
-        pass
+
+class ZIPNewaveUnitOfWork(CachedNewaveUnitOfWork):
+    def __init__(
+        self, session: ZipSession, caso: str, keep_originals: bool = False
+    ):
+        self._session = session
+        self._caso = caso
+        self._keep_originals = keep_originals
+        self._newave: Optional[ZIPNewaveRepository] = None
+
+    def __enter__(self) -> "AbstractNewaveUnitOfWork":
+        # The files generated in memory must survive between uses
+        if self._newave is None:
+            self._newave = ZIPNewaveRepository(
+                self._session, self._caso, self._keep_originals
+            )
+        return super().__enter__()
+
+    @property
+    def newave(self) -> ZIPNewaveRepository:
+        assert self._newave is not None
+        return self._newave
 
 
 def factory(kind: str, *args, **kwargs) -> AbstractNewaveUnitOfWork:
     mappings: Dict[str, Type[AbstractNewaveUnitOfWork]] = {
         "FS": FSNewaveUnitOfWork,
+        "ZIP": ZIPNewaveUnitOfWork,
     }
     return mappings[kind](*args, **kwargs)
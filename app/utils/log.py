@@ -12,6 +12,9 @@ class Log(metaclass=Singleton):
 
     @classmethod
     def configure_logging(cls, directory: str):
+        # Every job of the process shares the same logger
+        if cls.LOGGER is not None:
+            return
         root = logging.getLogger("main")
         h = logging.handlers.RotatingFileHandler(
             join(directory, cls.FILE), "a", 10000, 0, "utf-8"
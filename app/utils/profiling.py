@@ -0,0 +1,349 @@
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None  # type: ignore
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+REPORT_VERSION = 1
+# Interval between the memory samples taken while a stage runs
+MEMORY_SAMPLE_INTERVAL = 0.01
+
+
+@dataclass
+class Span:
+    name: str
+    category: str
+    # Seconds since the profiler was enabled
+    start: float
+    duration: float
+    thread: int
+    depth: int
+    # Peak of the memory allocated by Python during the span, in bytes
+    memory: Optional[int] = None
+
+
+class Profiler:
+    """
+    Registra a duração de cada etapa de uma execução, inclusive das
+    executadas em outras threads, e opcionalmente o pico de memória
+    alocada durante cada uma delas. Também acumula métricas de cada
+    arquivo escrito. Quando desabilitado, nada é registrado.
+
+    O registro é global ao processo e, portanto, só é válido quando um
+    único deck é processado por vez em cada processo, como nos comandos
+    geradeck e geradecks.
+    """
+
+    ENABLED = False
+    MEMORY = False
+    ORIGIN = 0.0
+    SPANS: List[Span] = []
+    FILES: Dict[str, Dict[str, Any]] = {}
+    # Peak of the allocated memory between each sample and the previous
+    SAMPLES: List[int] = []
+    LOCK = threading.Lock()
+    STACKS = threading.local()
+    SAMPLER: Optional[threading.Thread] = None
+    STOP = threading.Event()
+    STARTED_TRACING = False
+    OWNER_LOCK = threading.Lock()
+
+    @classmethod
+    def enable(cls, memory: bool = False):
+        cls.disable()
+        cls.reset()
+        cls.ENABLED = True
+        if memory:
+            cls.__start_memory()
+
+    @classmethod
+    def try_enable(cls, memory: bool = False) -> bool:
+        """
+        Habilita o registro somente se ainda não estiver habilitado por
+        outra execução do processo, retornando se foi habilitado.
+        """
+        with cls.OWNER_LOCK:
+            if cls.ENABLED:
+                return False
+            cls.enable(memory)
+            return True
+
+    @classmethod
+    def disable(cls):
+        cls.ENABLED = False
+        if cls.MEMORY:
+            cls.__stop_memory()
+
+    @classmethod
+    def reset(cls):
+        with cls.LOCK:
+            cls.SPANS = []
+            cls.FILES = {}
+            cls.SAMPLES = []
+            cls.ORIGIN = time.perf_counter()
+
+    @classmethod
+    def __start_memory(cls):
+        cls.STARTED_TRACING = not tracemalloc.is_tracing()
+        if cls.STARTED_TRACING:
+            tracemalloc.start()
+        cls.MEMORY = True
+        cls.STOP.clear()
+        cls.SAMPLER = threading.Thread(
+            target=cls.__sample_periodically, daemon=True
+        )
+        cls.SAMPLER.start()
+
+    @classmethod
+    def __stop_memory(cls):
+        cls.STOP.set()
+        if cls.SAMPLER is not None:
+            cls.SAMPLER.join()
+            cls.SAMPLER = None
+        cls.MEMORY = False
+        if cls.STARTED_TRACING:
+            tracemalloc.stop()
+            cls.STARTED_TRACING = False
+
+    @classmethod
+    def __sample_periodically(cls):
+        # Catches the peaks of the stages that take longer than the
+        # interval, which would otherwise only be seen at their ends
+        while not cls.STOP.wait(MEMORY_SAMPLE_INTERVAL):
+            cls.__sample()
+
+    @classmethod
+    def __sample(cls) -> int:
+        """
+        Registra o pico de memória desde a amostra anterior, retornando
+        o número de amostras registradas.
+        """
+        with cls.LOCK:
+            current, peak = tracemalloc.get_traced_memory()
+            if hasattr(tracemalloc, "reset_peak"):
+                tracemalloc.reset_peak()
+            else:  # pragma: no cover - Python < 3.9
+                peak = current
+            cls.SAMPLES.append(peak)
+            return len(cls.SAMPLES)
+
+    @classmethod
+    def __stack(cls) -> List[str]:
+        stack = getattr(cls.STACKS, "names", None)
+        if stack is None:
+            stack = []
+            cls.STACKS.names = stack
+        return stack
+
+    @classmethod
+    @contextmanager
+    def span(cls, name: str, category: str = "etapa") -> Iterator[None]:
+        """
+        Registra a duração do bloco como uma etapa, dentro das etapas
+        em execução na mesma thread.
+        """
+        if not cls.ENABLED:
+            yield
+            return
+        stack = cls.__stack()
+        depth = len(stack)
+        stack.append(name)
+        memory = cls.MEMORY
+        # The samples after this one cover only the span
+        first = cls.__sample() if memory else 0
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            stack.pop()
+            peak: Optional[int] = None
+            if memory:
+                last = cls.__sample()
+                with cls.LOCK:
+                    peak = max(cls.SAMPLES[first:last])
+            with cls.LOCK:
+                cls.SPANS.append(
+                    Span(
+                        name,
+                        category,
+                        start - cls.ORIGIN,
+                        duration,
+                        threading.get_ident(),
+                        depth,
+                        peak,
+                    )
+                )
+
+    @classmethod
+    def record(cls, filename: str, **metrics):
+        """
+        Acumula métricas de um arquivo, como o número de registros e
+        os bytes escritos.
+        """
+        if not cls.ENABLED:
+            return
+        with cls.LOCK:
+            cls.FILES.setdefault(filename, {}).update(metrics)
+
+    @classmethod
+    def spans(cls) -> List[Span]:
+        with cls.LOCK:
+            return sorted(cls.SPANS, key=lambda s: s.start)
+
+    @classmethod
+    def stages(cls) -> List[Dict[str, Any]]:
+        """
+        Agrega as execuções de cada etapa, na ordem em que foram
+        iniciadas.
+        """
+        stages: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for s in cls.spans():
+            stage = stages.setdefault(
+                (s.category, s.name),
+                {
+                    "etapa": s.name,
+                    "categoria": s.category,
+                    "nivel": s.depth,
+                    "chamadas": 0,
+                    "tempo_total": 0.0,
+                    "tempo_maximo": 0.0,
+                    "memoria_maxima": None,
+                },
+            )
+            stage["chamadas"] += 1
+            stage["tempo_total"] += s.duration
+            stage["tempo_maximo"] = max(stage["tempo_maximo"], s.duration)
+            if s.memory is not None:
+                stage["memoria_maxima"] = max(
+                    stage["memoria_maxima"] or 0, s.memory
+                )
+        return list(stages.values())
+
+    @classmethod
+    def summary(cls) -> str:
+        """
+        Tabela com o número de execuções, o tempo total e máximo e,
+        quando registrado, o pico de memória de cada etapa, na ordem
+        em que foram iniciadas.
+        """
+        spans = cls.spans()
+        stages = cls.stages()
+        wall = max([s.start + s.duration for s in spans], default=0.0)
+        memory = any(s["memoria_maxima"] is not None for s in stages)
+        names = ["  " * s["nivel"] + s["etapa"] for s in stages]
+        width = max([len(n) for n in names] + [5])
+        header = (
+            f"{'ETAPA':<{width}}  {'CATEGORIA':<14}  CHAMADAS"
+            + "  TOTAL (s)  MÁXIMO (s)      %"
+        )
+        lines = [header + ("  MEMÓRIA (MB)" if memory else "")]
+        for name, stage in zip(names, stages):
+            total = stage["tempo_total"]
+            share = 100 * total / wall if wall > 0 else 0.0
+            line = (
+                f"{name:<{width}}  {stage['categoria']:<14}"
+                + f"  {stage['chamadas']:8d}  {total:9.3f}"
+                + f"  {stage['tempo_maximo']:10.3f}  {share:5.1f}"
+            )
+            if memory:
+                peak = stage["memoria_maxima"] or 0
+                line += f"  {peak / 2**20:12.1f}"
+            lines.append(line)
+        return "\n".join(lines)
+
+    @classmethod
+    def write_trace(cls, path: str, **metadata):
+        """
+        Escreve as etapas registradas em um arquivo JSON no formato de
+        eventos do Chrome (chrome://tracing ou Perfetto).
+        """
+        threads: Dict[int, int] = {}
+        events = []
+        for s in cls.spans():
+            tid = threads.setdefault(s.thread, len(threads) + 1)
+            event = {
+                "name": s.name,
+                "cat": s.category,
+                "ph": "X",
+                "ts": round(s.start * 1e6, 1),
+                "dur": round(s.duration * 1e6, 1),
+                "pid": os.getpid(),
+                "tid": tid,
+            }
+            if s.memory is not None:
+                event["args"] = {"memoria_maxima": s.memory}
+            events.append(event)
+        with open(path, "w") as f:
+            json.dump(
+                {
+                    "traceEvents": events,
+                    "displayTimeUnit": "ms",
+                    "otherData": metadata,
+                },
+                f,
+                indent=1,
+            )
+
+    @classmethod
+    def write_report(cls, path: str, **metadata):
+        """
+        Escreve um relatório JSON com o tempo e o pico de memória de
+        cada etapa e as métricas de cada arquivo escrito.
+        """
+        rss: Optional[int] = None
+        if resource is not None:
+            # Kilobytes on Linux
+            rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        with cls.LOCK:
+            files = {f: dict(m) for f, m in cls.FILES.items()}
+        with open(path, "w") as f:
+            json.dump(
+                {
+                    "versao": REPORT_VERSION,
+                    **metadata,
+                    "rss_maximo_processo": rss,
+                    "etapas": cls.stages(),
+                    "arquivos": files,
+                },
+                f,
+                indent=2,
+            )
+
+
+def profiled(category: str) -> Callable[[F], F]:
+    """
+    Registra cada chamada da função como uma etapa, com o seu nome.
+    """
+
+    def decorator(function: F) -> F:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not Profiler.ENABLED:
+                return function(*args, **kwargs)
+            with Profiler.span(function.__name__, category):
+                return function(*args, **kwargs)
+
+        return wrapper  # type: ignore
+
+    return decorator
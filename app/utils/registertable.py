@@ -0,0 +1,190 @@
+from os.path import join
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Sequence,
+    Type,
+    Union,
+)
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from cfinterface.components.datetimefield import DatetimeField
+from cfinterface.components.field import Field
+from cfinterface.components.floatfield import FloatField
+from cfinterface.components.integerfield import IntegerField
+from cfinterface.components.literalfield import LiteralField
+from cfinterface.components.register import Register
+from cfinterface.files.registerfile import RegisterFile
+
+# The field attributes needed below are not exposed by cfinterface,
+# so they are read from the name-mangled private attributes
+
+
+def _format_integers(field: IntegerField, values: pd.Series) -> np.ndarray:
+    missing = values.isna().to_numpy()
+    formatted = (
+        values.fillna(0).astype(np.int64).astype(str).to_numpy(dtype=object)
+    )
+    formatted[missing] = ""
+    return formatted
+
+
+def _format_floats(field: FloatField, values: pd.Series) -> np.ndarray:
+    # Follows FloatField, which drops decimal digits until the value
+    # fits in the field size
+    numbers = values.to_numpy(dtype=float)
+    formatted = np.full(len(numbers), "", dtype=object)
+    pending = ~np.isnan(numbers)
+    for digits in range(field._FloatField__decimal_digits, -1, -1):
+        indices = np.flatnonzero(pending)
+        if len(indices) == 0:
+            break
+        candidates = np.char.mod(
+            f"%.{digits}{field._FloatField__format}", numbers[indices]
+        )
+        fits = np.char.str_len(candidates) <= field.size
+        if digits == 0:
+            fits[:] = True
+        formatted[indices[fits]] = candidates[fits]
+        pending[indices[fits]] = False
+    return formatted
+
+
+def _format_datetimes(field: DatetimeField, values: pd.Series) -> np.ndarray:
+    formatted = (
+        pd.to_datetime(values)
+        .dt.strftime(field._DatetimeField__format)
+        .to_numpy(dtype=object)
+    )
+    formatted[values.isna().to_numpy()] = ""
+    return formatted
+
+
+def _format_literals(field: LiteralField, values: pd.Series) -> np.ndarray:
+    formatted = values.astype(str).str.strip().to_numpy(dtype=object)
+    formatted[values.isna().to_numpy()] = ""
+    return formatted
+
+
+def _format_column(field: Field, values: pd.Series) -> np.ndarray:
+    if isinstance(field, IntegerField):
+        return _format_integers(field, values)
+    elif isinstance(field, FloatField):
+        return _format_floats(field, values)
+    elif isinstance(field, DatetimeField):
+        return _format_datetimes(field, values)
+    elif isinstance(field, LiteralField):
+        return _format_literals(field, values)
+    raise TypeError(f"Tipo de campo não suportado: {type(field)}")
+
+
+class RegisterTable:
+    """
+    Conjunto de registros de um mesmo tipo, armazenados em colunas
+    na ordem dos campos da linha do registro. As linhas são formatadas
+    de uma só vez, da mesma forma que os registros as escreveriam.
+    """
+
+    def __init__(
+        self,
+        registertype: Type[Register],
+        data: Union[pd.DataFrame, Dict[str, Sequence[Any]]],
+    ):
+        self.__registertype = registertype
+        self.__data = pd.DataFrame(data)
+        fields = registertype.LINE.fields
+        if len(self.__data.columns) != len(fields):
+            raise ValueError(
+                f"Número de colunas ({len(self.__data.columns)}) diferente"
+                + f" do número de campos de {registertype.IDENTIFIER}"
+                + f" ({len(fields)})"
+            )
+
+    def __len__(self) -> int:
+        return len(self.__data)
+
+    @property
+    def registertype(self) -> Type[Register]:
+        return self.__registertype
+
+    @property
+    def data(self) -> pd.DataFrame:
+        return self.__data
+
+    def to_text(self) -> str:
+        if len(self.__data) == 0:
+            return ""
+        registertype = self.__registertype
+        delimiter = registertype.LINE.delimiter
+        lines = np.full(len(self.__data), registertype.IDENTIFIER, object)
+        for i, field in enumerate(registertype.LINE.fields):
+            lines = (
+                lines
+                + delimiter
+                + _format_column(field, self.__data.iloc[:, i])
+            )
+        return "\n".join(lines.tolist()) + "\n"
+
+
+# Tables that are only produced when the file is written, in chunks
+TableChunks = Callable[[], Iterable[RegisterTable]]
+
+
+class RegisterTableFile:
+    """
+    Arquivo do NEWAVE composto por tabelas de registros, que é escrito
+    com o mesmo conteúdo que o arquivo equivalente de registros.
+    As tabelas podem ser fornecidas prontas ou por funções que as
+    produzem em partes, no momento da escrita, de modo que o arquivo
+    completo nunca precise estar em memória.
+    """
+
+    def __init__(
+        self,
+        filetype: Type[RegisterFile],
+        tables: List[Union[RegisterTable, TableChunks]],
+    ):
+        self.__filetype = filetype
+        self.__tables = tables
+
+    @property
+    def filetype(self) -> Type[RegisterFile]:
+        return self.__filetype
+
+    @property
+    def tables(self) -> List[Union[RegisterTable, TableChunks]]:
+        return self.__tables
+
+    @property
+    def ENCODING(self) -> str:
+        return self.__filetype.ENCODING
+
+    def iter_tables(self) -> Iterator[RegisterTable]:
+        for table in self.__tables:
+            if isinstance(table, RegisterTable):
+                yield table
+            else:
+                yield from table()
+
+    def iter_text(self) -> Iterator[str]:
+        for table in self.iter_tables():
+            yield table.to_text()
+
+    def iter_bytes(self) -> Iterator[bytes]:
+        for text in self.iter_text():
+            yield text.encode(self.ENCODING)
+
+    def to_text(self) -> str:
+        return "".join(self.iter_text())
+
+    def escreve_arquivo(self, diretorio: str, nome_arquivo: str = ""):
+        with open(
+            join(diretorio, nome_arquivo), "w", encoding=self.ENCODING
+        ) as f:
+            for text in self.iter_text():
+                f.write(text)
@@ -0,0 +1,58 @@
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List
+
+from app.utils.profiling import Profiler
+
+
+@dataclass
+class Stage:
+    name: str
+    function: Callable[[], Any]
+    dependencies: List[str] = field(default_factory=list)
+
+
+def __check_stages(stages: List[Stage]):
+    names = [s.name for s in stages]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Etapas com nomes repetidos: {names}")
+    for s in stages:
+        unknown = [d for d in s.dependencies if d not in names]
+        if len(unknown) > 0:
+            raise ValueError(
+                f"Etapa {s.name} depende de etapas inexistentes: {unknown}"
+            )
+    # Kahn's algorithm, only for detecting cycles
+    remaining = {s.name: set(s.dependencies) for s in stages}
+    while len(remaining) > 0:
+        ready = [n for n, deps in remaining.items() if len(deps) == 0]
+        if len(ready) == 0:
+            raise ValueError(
+                f"Dependência circular entre as etapas: {list(remaining)}"
+            )
+        for n in ready:
+            remaining.pop(n)
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+
+def __run_stage(stage: Stage) -> Any:
+    with Profiler.span(stage.name, "etapa"):
+        return stage.function()
+
+
+def run_stages(stages: List[Stage]) -> Dict[str, Any]:
+    """
+    Executa um conjunto de etapas em sequência, respeitando as
+    dependências entre elas e, quando possível, a ordem em que foram
+    declaradas. Retorna o resultado de cada etapa, pelo nome.
+    """
+    __check_stages(stages)
+    done: Dict[str, Any] = {}
+    while len(done) < len(stages):
+        stage = next(
+            s
+            for s in stages
+            if s.name not in done and all(d in done for d in s.dependencies)
+        )
+        done[stage.name] = __run_stage(stage)
+    return done
@@ -0,0 +1,67 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from zipfile import ZipFile, ZipInfo
+
+
+class ZipSession:
+    """
+    Mantém um arquivo ZIP aberto, com o diretório central lido uma
+    única vez e os membros indexados pelo nome, para que diversas
+    extrações sejam feitas sem reabrir o arquivo.
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+        self._zipfile: Optional[ZipFile] = None
+        self._members: Dict[str, ZipInfo] = {}
+
+    def __enter__(self) -> "ZipSession":
+        self.open()
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def open(self):
+        if self._zipfile is None:
+            self._zipfile = ZipFile(self._path)
+            self._members = {i.filename: i for i in self._zipfile.infolist()}
+
+    def close(self):
+        if self._zipfile is not None:
+            self._zipfile.close()
+            self._zipfile = None
+            self._members = {}
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def zipfile(self) -> ZipFile:
+        self.open()
+        assert self._zipfile is not None
+        return self._zipfile
+
+    @property
+    def members(self) -> Dict[str, ZipInfo]:
+        self.open()
+        return self._members
+
+    def read(self, filename: str) -> bytes:
+        return self.zipfile.read(self.members[filename])
+
+    def extract(self, filename: str, targetdir: str) -> str:
+        return self.zipfile.extract(self.members[filename], targetdir)
+
+    def extract_many(
+        self, filenames: List[str], targetdir: str, workers: int = 1
+    ) -> List[str]:
+        if workers <= 1 or len(filenames) <= 1:
+            return [self.extract(f, targetdir) for f in filenames]
+        # ZipFile serializes the access to the underlying file, so
+        # only the decompression of the members runs in parallel
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(
+                pool.map(lambda f: self.extract(f, targetdir), filenames)
+            )
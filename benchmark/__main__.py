@@ -0,0 +1,73 @@
+from benchmark.runner import SIZES, compare, load, parse_size, run, save
+import click
+
+
+@click.group()
+def cli():
+    """
+    Medição do tempo de cada etapa da geração de decks com dados
+    sintéticos de clusterização, em diferentes tamanhos.
+    """
+    pass
+
+
+@click.command("executa")
+@click.option(
+    "--tamanho",
+    "sizes",
+    multiple=True,
+    default=["pequeno", "medio"],
+    show_default=True,
+    help=f"{', '.join(SIZES.keys())} ou clusters,anos,meses",
+)
+@click.option(
+    "--repeticoes",
+    default=5,
+    show_default=True,
+    help="número de execuções de cada etapa",
+)
+@click.option(
+    "--etapa",
+    "stages",
+    multiple=True,
+    help="executa somente as etapas que contêm o texto",
+)
+@click.option(
+    "--saida",
+    default="benchmark.json",
+    show_default=True,
+    help="arquivo JSON com os tempos medidos",
+)
+def execute(sizes, repeticoes, stages, saida):
+    """
+    Mede os tempos das etapas e os salva em um arquivo JSON.
+    """
+    try:
+        parsed = [parse_size(s) for s in sizes]
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--tamanho")
+    results = run(parsed, repeticoes, list(stages), click.echo)
+    save(results, saida)
+    click.echo(f"Resultados salvos em {saida}")
+
+
+@click.command("compara")
+@click.argument("antes")
+@click.argument("depois")
+def compare_results(antes, depois):
+    """
+    Compara as medianas dos tempos de dois arquivos de resultados.
+
+    ANTES: resultados da versão de referência
+
+    DEPOIS: resultados da versão avaliada
+    """
+    for line in compare(load(antes), load(depois)):
+        click.echo(line)
+
+
+cli.add_command(execute)
+cli.add_command(compare_results)
+
+if __name__ == "__main__":
+    cli()
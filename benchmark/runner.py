@@ -0,0 +1,574 @@
+from contextlib import contextmanager
+from datetime import datetime
+from os.path import join
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+import json
+import logging
+import os
+import pathlib
+import platform
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from zipfile import ZipFile
+
+from dotenv import load_dotenv
+
+from benchmark.synthetic import Size, write_clusters, write_deck
+
+INSTALLDIR = pathlib.Path(__file__).resolve().parent.parent
+BASEDECK = INSTALLDIR.joinpath("examples", "deck_newave_base.zip")
+RESULTS_VERSION = 1
+
+# (clusters, history years, capacity months)
+SIZES: Dict[str, Size] = {
+    "pequeno": Size(10, 10, 60),
+    "medio": Size(100, 30, 240),
+    "grande": Size(500, 43, 480),
+}
+
+# The setup of a case is not timed and returns the timed function
+Case = Callable[[], Callable[[], Any]]
+
+
+@contextmanager
+def __environment(workdir: str) -> Iterator[None]:
+    """
+    Configura o mesmo ambiente do main.py, com o espaço de trabalho
+    como diretório de chamada. As variáveis de ambiente e o log são
+    restaurados ao fim.
+    """
+    from app.utils.log import Log
+
+    environ = dict(os.environ)
+    logger = Log.LOGGER
+    main = logging.getLogger("main")
+    handlers, level = list(main.handlers), main.level
+    if logger is not None:
+        handlers, level = list(logger.handlers), logger.level
+    os.environ["APP_INSTALLDIR"] = str(INSTALLDIR)
+    load_dotenv(INSTALLDIR.joinpath("eolicas-newave-deck.cfg"), override=True)
+    os.environ["APP_BASEDIR"] = workdir
+    Log.configure_logging(workdir)
+    Log.log().setLevel(logging.ERROR)
+    try:
+        yield
+    finally:
+        os.environ.clear()
+        os.environ.update(environ)
+        # The handlers created here write to the workspace
+        for handler in list(Log.log().handlers):
+            if handler not in handlers:
+                Log.log().removeHandler(handler)
+                handler.close()
+        Log.log().setLevel(level)
+        Log.LOGGER = logger
+
+
+def __consume(buffers: Dict[str, Any]) -> int:
+    # The tables are only rendered when the buffers are consumed
+    size = 0
+    for content in buffers.values():
+        if isinstance(content, bytes):
+            size += len(content)
+        else:
+            size += sum(len(chunk) for chunk in content)
+    return size
+
+
+class Workspace:
+    """
+    Arquivos sintéticos de um tamanho e as unidades de trabalho usadas
+    nos casos, com o deck lido uma única vez e restaurado entre eles.
+    """
+
+    def __init__(self, directory: str, size: Size):
+        from app.models.settings import Settings
+        from app.utils.zipsession import ZipSession
+        from app.services.unitofwork.newave import factory as nw_factory
+        from app.services.unitofwork.clusters import (
+            factory as clusters_factory,
+        )
+
+        self.directory = directory
+        self.size = size
+        self.clustersdir = join(directory, "clusters")
+        self.deck = join(directory, "deck.zip")
+        os.makedirs(self.clustersdir)
+        self.settings = Settings(self.clustersdir, self.deck, directory)
+        write_clusters(self.clustersdir, size, self.settings)
+        write_deck(str(BASEDECK), self.deck, self.settings)
+        self.session = ZipSession(self.deck)
+        self.nwuow = nw_factory(
+            "ZIP", self.session, self.settings.caso_file, keep_originals=True
+        )
+        self.clustersuow = clusters_factory(
+            "FS",
+            self.clustersdir,
+            self.settings.clusters_file,
+            self.settings.installed_capacity_file,
+            self.settings.ftm_file,
+            self.settings.average_wind_file,
+            sidecar=self.settings.clusters_sidecar,
+        )
+        self.__counter = 0
+
+    def fresh_deck(self) -> Any:
+        """
+        Restaura os arquivos do deck como foram lidos, já copiados.
+        """
+        with self.nwuow:
+            self.nwuow.restore()
+            self.nwuow.newave.get_dger()
+            self.nwuow.newave.get_patamar()
+            self.nwuow.newave.get_sistema()
+        return self.nwuow
+
+    def fresh_path(self, name: str) -> str:
+        self.__counter += 1
+        path = join(self.directory, f"{self.__counter}_{name}")
+        os.makedirs(path)
+        return path
+
+    def close(self):
+        self.session.close()
+
+
+def __validation_cases(ws: Workspace) -> Dict[str, Case]:
+    import app.domain.commands as commands
+    import app.services.handlers.validation as validation
+
+    block = ws.settings.nonsimulatedblock
+    years = validation.validate_dger_data(
+        commands.ValidateDgerData(), ws.fresh_deck()
+    )
+
+    def deck_case(function: Callable, command: Any) -> Case:
+        def setup():
+            nwuow = ws.fresh_deck()
+            return lambda: function(command, nwuow)
+
+        return setup
+
+    def clusters_case(function: Callable, *args) -> Case:
+        return lambda: lambda: function(*args, ws.clustersuow)
+
+    return {
+        "validation.validate_dger_data": deck_case(
+            validation.validate_dger_data, commands.ValidateDgerData()
+        ),
+        "validation.validate_patamar_data": deck_case(
+            validation.validate_patamar_data,
+            commands.ValidatePatamarData(block),
+        ),
+        "validation.validate_sistema_data": deck_case(
+            validation.validate_sistema_data,
+            commands.ValidateSistemaData(block),
+        ),
+        "validation.validate_cluster_files": clusters_case(
+            validation.validate_cluster_files
+        ),
+        "validation.validate_cluster_file": clusters_case(
+            validation.validate_cluster_file
+        ),
+        "validation.validate_installed_capacity_file": clusters_case(
+            validation.validate_installed_capacity_file,
+            commands.ValidateInstalledCapacityData(*years),
+        ),
+        "validation.validate_ftm_file": clusters_case(
+            validation.validate_ftm_file
+        ),
+        "validation.validate_average_wind_file": clusters_case(
+            validation.validate_average_wind_file
+        ),
+    }
+
+
+def __processing_cases(ws: Workspace) -> Dict[str, Case]:
+    import app.domain.commands as commands
+    import app.services.handlers.processing as processing
+
+    settings = ws.settings
+    block = settings.nonsimulatedblock
+
+    def prepare() -> Tuple[Any, Dict[str, Any]]:
+        # Reads the deck data needed by the generated files
+        nwuow = ws.fresh_deck()
+        dger = processing.process_dger_data(
+            commands.ProcessDgerData(
+                settings.generatewind, settings.windcutpenalty
+            ),
+            nwuow,
+        )
+        count, patamar = processing.process_patamar_data(
+            commands.ProcessPatamarData(block), nwuow, ws.clustersuow
+        )
+        index = processing.index_clusters(ws.clustersuow)
+        with nwuow:
+            nwuow.newave.flush_to_buffers()
+        horizon = (
+            dger.month,
+            dger.year,
+            dger.pre_study_horizon,
+            dger.study_horizon,
+            dger.post_study_horizon,
+        )
+        data = {
+            "horizon": horizon,
+            "dger": dger,
+            "count": count,
+            "blocks": patamar.blocks,
+            "index": index,
+        }
+        return nwuow, data
+
+    def rendered(nwuow: Any, handler: Callable[[], Any]) -> Callable:
+        # The files are only complete after they are rendered
+        def run():
+            handler()
+            with nwuow:
+                return __consume(nwuow.newave.flush_to_buffers())
+
+        return run
+
+    def process_case(function: Callable, command: Any) -> Case:
+        def setup():
+            nwuow = ws.fresh_deck()
+            if function is processing.process_dger_data:
+                return rendered(nwuow, lambda: function(command, nwuow))
+            return rendered(
+                nwuow, lambda: function(command, nwuow, ws.clustersuow)
+            )
+
+        return setup
+
+    def generate_case(
+        function: Callable, command: Callable[[Dict[str, Any]], Any]
+    ) -> Case:
+        def setup():
+            nwuow, data = prepare()
+            c = command(data)
+            return rendered(nwuow, lambda: function(c, nwuow, ws.clustersuow))
+
+        return setup
+
+    return {
+        "processing.process_dger_data": process_case(
+            processing.process_dger_data,
+            commands.ProcessDgerData(
+                settings.generatewind, settings.windcutpenalty
+            ),
+        ),
+        "processing.process_patamar_data": process_case(
+            processing.process_patamar_data,
+            commands.ProcessPatamarData(block),
+        ),
+        "processing.process_sistema_data": process_case(
+            processing.process_sistema_data,
+            commands.ProcessSistemaData(block),
+        ),
+        "processing.generate_eolicacadastro": generate_case(
+            processing.generate_eolicacadastro,
+            lambda d: commands.GenerateEolicaCadastro(
+                d["dger"].pre_study_month, *d["horizon"]
+            ),
+        ),
+        "processing.generate_eolicasubmercado": generate_case(
+            processing.generate_eolicasubmercado,
+            lambda d: commands.GenerateEolicaSubmercado(),
+        ),
+        "processing.generate_eolicaconfig": generate_case(
+            processing.generate_eolicaconfig,
+            lambda d: commands.GenerateEolicaConfig(*d["horizon"]),
+        ),
+        "processing.generate_eolicafte": generate_case(
+            processing.generate_eolicafte,
+            lambda d: commands.GenerateEolicaFTE(*d["horizon"], d["index"]),
+        ),
+        "processing.generate_eolicaposto": generate_case(
+            processing.generate_eolicaposto,
+            lambda d: commands.GenerateEolicaPosto(),
+        ),
+        "processing.generate_eolicahistorico": generate_case(
+            processing.generate_eolicahistorico,
+            lambda d: commands.GenerateEolicaHistorico(d["index"]),
+        ),
+        "processing.generate_eolicageracao": generate_case(
+            processing.generate_eolicageracao,
+            lambda d: commands.GenerateEolicaGeracao(
+                *d["horizon"], d["count"], d["blocks"], d["index"]
+            ),
+        ),
+    }
+
+
+def __files_cases(ws: Workspace) -> Dict[str, Case]:
+    import app.domain.commands as commands
+    import app.services.handlers.files as files
+    from app.utils.zipsession import ZipSession
+
+    with ws.nwuow:
+        arquivos = ws.nwuow.newave.arquivos
+        filenames = [
+            ws.settings.caso_file,
+            ws.nwuow.newave.caso.arquivos,
+            arquivos.dger,
+            arquivos.sistema,
+            arquivos.patamar,
+        ]
+
+    def extract():
+        targetdir = ws.fresh_path("extraidos")
+        command = commands.ExtractZipFiles(ws.deck, targetdir, filenames)
+        return lambda: files.extract_files(command)
+
+    def extract_session():
+        targetdir = ws.fresh_path("extraidos")
+        command = commands.ExtractZipFiles(ws.deck, targetdir, filenames)
+        session = ZipSession(ws.deck)
+
+        def run():
+            files.extract_files(command, session)
+            session.close()
+
+        return run
+
+    # Members with the size of the generated files, as in the deck
+    generated = __generated_members(ws)
+
+    def compress():
+        zippath = join(ws.fresh_path("compactado"), "deck.zip")
+        shutil.copyfile(ws.deck, zippath)
+        command = commands.AddFilesToZip(zippath, generated)
+        return lambda: files.compress_files(command)
+
+    def compress_copy():
+        zippath = join(ws.fresh_path("compactado"), "deck.zip")
+        command = commands.AddFilesToZip(zippath, generated, ws.deck)
+        return lambda: files.compress_files(command)
+
+    return {
+        "files.extract_files": extract,
+        "files.extract_files[sessao]": extract_session,
+        "files.compress_files": compress,
+        "files.compress_files[origem]": compress_copy,
+    }
+
+
+def __generated_members(ws: Workspace) -> Dict[str, bytes]:
+    from app.models.settings import Settings
+    from app.services.handlers.generation import GenerationHandler
+
+    workdir = ws.fresh_path("membros")
+    settings = Settings(ws.clustersdir, ws.deck, workdir)
+    settings.deck_repository = "ZIP"
+    output = join(workdir, "deck.zip")
+    handler = GenerationHandler(settings, ws.session, ws.fresh_deck(), output)
+    handler.generate()
+    with ZipFile(output, "r") as z:
+        members = {
+            n: z.read(n) for n in z.namelist() if n not in ws.session.members
+        }
+    ws.fresh_deck()
+    return members
+
+
+def __clusters_cases(ws: Workspace) -> Dict[str, Case]:
+    from app.adapters.repository.clusters import ClustersDataCache
+
+    def read():
+        # The data of the cache is read from the files again
+        ClustersDataCache().invalidate()
+
+        def run():
+            with ws.clustersuow:
+                ws.clustersuow.clusters.get_clusters()
+                ws.clustersuow.clusters.get_installed_capacity()
+                ws.clustersuow.clusters.get_ftm()
+                ws.clustersuow.clusters.get_average_wind()
+
+        return run
+
+    return {"clusters.leitura": read}
+
+
+def __generation_cases(ws: Workspace) -> Dict[str, Case]:
+    from app.models.settings import Settings
+    from app.services.handlers.generation import GenerationHandler
+
+    def generation(repository: str) -> Case:
+        def setup():
+            workdir = ws.fresh_path("geracao")
+            deck = join(workdir, "deck.zip")
+            shutil.copyfile(ws.deck, deck)
+            settings = Settings(ws.clustersdir, deck, workdir)
+            settings.deck_repository = repository
+
+            def run():
+                handler = GenerationHandler(settings)
+                try:
+                    handler.extract_files_from_deck()
+                    if not handler.generate():
+                        raise RuntimeError("Deck sintético inválido")
+                finally:
+                    handler.close()
+
+            return run
+
+        return setup
+
+    return {
+        "generation.generate[FS]": generation("FS"),
+        "generation.generate[ZIP]": generation("ZIP"),
+    }
+
+
+def __time_case(case: Case, repetitions: int) -> List[float]:
+    times: List[float] = []
+    for _ in range(repetitions):
+        run = case()
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def __commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=INSTALLDIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_size(value: str) -> Size:
+    """
+    Obtém um tamanho pelo nome ou na forma `clusters,anos,meses`.
+    """
+    if value in SIZES:
+        return SIZES[value]
+    try:
+        clusters, years, months = [int(v) for v in value.split(",")]
+    except ValueError:
+        raise ValueError(
+            f"Tamanho {value} inválido: use {list(SIZES.keys())}"
+            + " ou clusters,anos,meses"
+        )
+    return Size(clusters, years, months)
+
+
+def run(
+    sizes: Iterable[Size],
+    repetitions: int = 5,
+    selected: Optional[List[str]] = None,
+    progress: Callable[[str], None] = lambda _: None,
+) -> Dict[str, Any]:
+    """
+    Executa os casos de cada etapa com dados sintéticos de cada
+    tamanho, retornando os tempos em segundos de cada repetição.
+    Somente as etapas que contêm algum dos textos em `selected`
+    são executadas, quando fornecido.
+    """
+    results: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory() as tmpdirname, __environment(
+        tmpdirname
+    ):
+        from app.adapters.repository.clusters import ClustersDataCache
+
+        for i, size in enumerate(sizes):
+            progress(f"Gerando os dados sintéticos {size.name}")
+            ws = Workspace(join(tmpdirname, f"{i}_{size.name}"), size)
+            try:
+                cases: Dict[str, Case] = {}
+                cases.update(__clusters_cases(ws))
+                cases.update(__validation_cases(ws))
+                cases.update(__processing_cases(ws))
+                cases.update(__files_cases(ws))
+                cases.update(__generation_cases(ws))
+                for stage, case in cases.items():
+                    if selected and not any(s in stage for s in selected):
+                        continue
+                    times = __time_case(case, repetitions)
+                    progress(
+                        f"{size.name} {stage}:"
+                        + f" {statistics.median(times) * 1000:.1f} ms"
+                    )
+                    results.append(
+                        {
+                            "tamanho": {
+                                "clusters": size.clusters,
+                                "anos_historico": size.history_years,
+                                "meses_capacidade": size.capacity_months,
+                            },
+                            "etapa": stage,
+                            "tempos": times,
+                            "minimo": min(times),
+                            "mediana": statistics.median(times),
+                        }
+                    )
+            finally:
+                ws.close()
+                # The data of one size is not kept for the next ones
+                ClustersDataCache().invalidate()
+    return {
+        "versao": RESULTS_VERSION,
+        "commit": __commit(),
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "repeticoes": repetitions,
+        "resultados": results,
+    }
+
+
+def __key(result: Dict[str, Any]) -> Tuple[str, str]:
+    size = result["tamanho"]
+    name = Size(
+        size["clusters"], size["anos_historico"], size["meses_capacidade"]
+    ).name
+    return name, result["etapa"]
+
+
+def compare(old: Dict[str, Any], new: Dict[str, Any]) -> List[str]:
+    """
+    Compara as medianas das etapas medidas nos dois resultados,
+    retornando uma linha por etapa em comum.
+    """
+    before = {__key(r): r["mediana"] for r in old["resultados"]}
+    lines = [f"{'TAMANHO':<16}  {'ETAPA':<46}  ANTES (ms)  DEPOIS (ms)  RAZÃO"]
+    for result in new["resultados"]:
+        key = __key(result)
+        if key not in before:
+            continue
+        ratio = result["mediana"] / before[key] if before[key] > 0 else 0.0
+        lines.append(
+            f"{key[0]:<16}  {key[1]:<46}  {before[key] * 1000:10.1f}"
+            + f"  {result['mediana'] * 1000:11.1f}  {ratio:5.2f}"
+        )
+    return lines
+
+
+def save(results: Dict[str, Any], path: str):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+
+
+def load(path: str) -> Dict[str, Any]:
+    with open(path, "r") as f:
+        return json.load(f)
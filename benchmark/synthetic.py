@@ -0,0 +1,135 @@
+from dataclasses import dataclass
+from os.path import join
+from typing import List
+import zipfile
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from app.adapters.repository.newave import _write_to_buffer
+from app.models.settings import Settings
+from app.utils.zipsession import ZipSession
+from app.services.unitofwork.newave import factory as nw_factory
+
+# Submarkets that have non-simulated generation in the example deck
+SUBMARKETS = [1, 2, 3, 4]
+# The installed capacities end in the same month of the example files
+LAST_CAPACITY_MONTH = "2026-02-09"
+FIRST_HISTORY_MONTH = "1979-01-01"
+
+
+@dataclass
+class Size:
+    clusters: int
+    history_years: int
+    capacity_months: int
+
+    @property
+    def name(self) -> str:
+        return (
+            f"{self.clusters}c-{self.history_years}a"
+            + f"-{self.capacity_months}m"
+        )
+
+
+def write_clusters(directory: str, size: Size, settings: Settings, seed=0):
+    """
+    Escreve os arquivos de saída da clusterização com `size.clusters`
+    clusters distribuídos entre os submercados do deck de exemplo,
+    `size.history_years` anos de histórico de vento e
+    `size.capacity_months` meses de capacidade instalada.
+    """
+    rng = np.random.default_rng(seed)
+    names = [f"cluster_{i + 1}" for i in range(size.clusters)]
+    submarkets = [
+        SUBMARKETS[i % len(SUBMARKETS)] for i in range(size.clusters)
+    ]
+    pd.DataFrame({"cluster": names, "submercado": submarkets}).to_csv(
+        join(directory, settings.clusters_file), index=False
+    )
+    pd.DataFrame(
+        {
+            "cluster": names,
+            "b0": rng.normal(-0.2, 0.05, size.clusters),
+            "b1": rng.normal(0.09, 0.01, size.clusters),
+        }
+    ).to_csv(join(directory, settings.ftm_file), index=False)
+
+    history = pd.date_range(
+        FIRST_HISTORY_MONTH, periods=12 * size.history_years, freq="MS"
+    )
+    pd.DataFrame(
+        {
+            "cluster": np.repeat(names, len(history)),
+            "data_hora": np.tile(history.strftime("%Y-%m-%d"), size.clusters),
+            "vento": rng.uniform(4.0, 10.0, len(history) * size.clusters),
+        }
+    ).to_csv(join(directory, settings.average_wind_file), index=False)
+
+    months = pd.date_range(
+        end=LAST_CAPACITY_MONTH, periods=size.capacity_months, freq="MS"
+    ) + pd.Timedelta(days=8)
+    increments = rng.uniform(0.0, 20.0, (size.clusters, len(months)))
+    pd.DataFrame(
+        {
+            "data_hora": np.tile(months.strftime("%Y-%m-%d"), size.clusters),
+            "capacidade_instalada": np.round(
+                np.cumsum(increments, axis=1).reshape(-1), 2
+            ),
+            "cluster": np.repeat(names, len(months)),
+        }
+    ).to_csv(join(directory, settings.installed_capacity_file), index=False)
+
+
+def __with_wind_block(
+    df: pd.DataFrame, windblock: int, **columns
+) -> pd.DataFrame:
+    # The wind block repeats the data of the second block
+    wind = df.loc[df["Bloco"] == 2].assign(Bloco=windblock, **columns)
+    return (
+        pd.concat([df.loc[df["Bloco"] != windblock], wind])
+        .sort_values(["Subsistema", "Bloco"], kind="stable")
+        .reset_index(drop=True)
+    )
+
+
+def write_deck(basezip: str, zippath: str, settings: Settings):
+    """
+    Escreve um deck a partir do deck de exemplo, ainda não processado,
+    que contém o bloco de geração eólica no patamar.dat e no sistema.dat.
+    """
+    session = ZipSession(basezip)
+    uow = nw_factory("ZIP", session, settings.caso_file)
+    with uow:
+        arquivos = uow.newave.arquivos
+        patamar = uow.newave.get_patamar()
+        sistema = uow.newave.get_sistema()
+    windblock = settings.nonsimulatedblock
+    patamar.usinas_nao_simuladas = __with_wind_block(
+        patamar.usinas_nao_simuladas, windblock
+    )
+    sistema.geracao_usinas_nao_simuladas = __with_wind_block(
+        sistema.geracao_usinas_nao_simuladas, windblock, **{"Razão": "EOL"}
+    )
+    replaced = {
+        arquivos.patamar: _write_to_buffer(patamar),
+        arquivos.sistema: _write_to_buffer(sistema),
+    }
+    # The files generated by the application are left out
+    generated: List[str] = [
+        settings.indice_file,
+        settings.manifest_file,
+        settings.eolicacadastro_file,
+        settings.eolicasubmercado_file,
+        settings.eolicaconfig_file,
+        settings.eolicafte_file,
+        settings.eolicaposto_file,
+        settings.histventos_file,
+        settings.eolicageracao_file,
+    ]
+    with zipfile.ZipFile(zippath, "w", zipfile.ZIP_DEFLATED) as zout:
+        for item in session.zipfile.infolist():
+            if item.filename in generated:
+                continue
+            data = replaced.get(item.filename, session.read(item.filename))
+            zout.writestr(item, data)
+    session.close()
@@ -0,0 +1,89 @@
+from dataclasses import dataclass
+from zipfile import ZipFile
+import logging
+import pathlib
+
+from dotenv import dotenv_values
+import pytest
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+
+
+@dataclass
+class SyntheticDeck:
+    basedir: pathlib.Path
+    clustersdir: pathlib.Path
+    deck: pathlib.Path
+
+    def settings(self, **environment):
+        """
+        Configurações de uma execução sobre o deck, com as variáveis de
+        ambiente fornecidas.
+        """
+        from app.models.settings import Settings
+
+        mp = pytest.MonkeyPatch()
+        for key, value in environment.items():
+            mp.setenv(key, str(value))
+        try:
+            return Settings(
+                str(self.clustersdir),
+                str(self.deck),
+                str(self.basedir.joinpath("tmp")),
+            )
+        finally:
+            mp.undo()
+
+
+def zip_contents(path) -> dict:
+    """
+    Conteúdo de cada membro de um arquivo ZIP, pelo nome.
+    """
+    with ZipFile(path, "r") as z:
+        return {n: z.read(n) for n in z.namelist()}
+
+
+@pytest.fixture
+def environment(monkeypatch, tmp_path) -> pathlib.Path:
+    """
+    Ambiente de execução da aplicação, como configurado pelo main.py,
+    com o diretório temporário do teste como diretório de chamada. As
+    variáveis e o log são restaurados ao fim do teste.
+    """
+    monkeypatch.setenv("APP_INSTALLDIR", str(ROOT))
+    for key, value in dotenv_values(
+        ROOT.joinpath("eolicas-newave-deck.cfg")
+    ).items():
+        monkeypatch.setenv(key, value)
+    monkeypatch.setenv("APP_BASEDIR", str(tmp_path))
+    from app.utils.log import Log
+
+    logger = logging.getLogger("test")
+    logger.setLevel(logging.INFO)
+    monkeypatch.setattr(Log, "LOGGER", logger)
+    return tmp_path
+
+
+@pytest.fixture
+def synthetic_deck(environment) -> SyntheticDeck:
+    """
+    Deck ainda não processado e arquivos de clusterização sintéticos,
+    com poucos clusters.
+    """
+    from app.adapters.repository.clusters import ClustersDataCache
+    from app.models.settings import Settings
+    from benchmark.synthetic import Size, write_clusters, write_deck
+
+    clustersdir = environment.joinpath("clusters")
+    clustersdir.mkdir()
+    deck = environment.joinpath("deck.zip")
+    settings = Settings(str(clustersdir), str(deck))
+    write_clusters(str(clustersdir), Size(6, 3, 24), settings)
+    write_deck(
+        str(ROOT.joinpath("examples", "deck_newave_base.zip")),
+        str(deck),
+        settings,
+    )
+    yield SyntheticDeck(environment, clustersdir, deck)
+    # The files of the test are not kept for the next ones
+    ClustersDataCache().invalidate()
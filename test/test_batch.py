@@ -0,0 +1,43 @@
+import shutil
+
+import pytest
+
+from app.services.handlers.batch import generate_many
+from app.services.handlers.generation import generate
+from test.conftest import zip_contents
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_generate_many(synthetic_deck, workers):
+    decksdir = synthetic_deck.basedir.joinpath("decks")
+    decksdir.mkdir()
+    for name in ["a.zip", "b.zip", "c.zip"]:
+        shutil.copyfile(synthetic_deck.deck, decksdir.joinpath(name))
+    decksdir.joinpath("invalido.zip").write_bytes(b"invalido")
+    listfile = synthetic_deck.basedir.joinpath("decks.txt")
+    listfile.write_text("# decks\ndecks/c.zip\n\ndecks/invalido.zip\n")
+    # The reference deck is generated on its own
+    assert generate(synthetic_deck.settings())
+    expected = zip_contents(synthetic_deck.deck)
+
+    results = generate_many(
+        str(synthetic_deck.clustersdir),
+        [str(decksdir.joinpath("[ab].zip")), str(decksdir.joinpath("a.zip"))],
+        str(listfile),
+        workers,
+    )
+    # In the given order, without repetitions
+    assert [r.deck for r in results] == [
+        str(decksdir.joinpath(n))
+        for n in ["a.zip", "b.zip", "c.zip", "invalido.zip"]
+    ]
+    assert [r.success for r in results] == [True, True, True, False]
+    assert results[-1].error.startswith("BadZipFile")
+    for name in ["a.zip", "b.zip", "c.zip"]:
+        assert zip_contents(decksdir.joinpath(name)) == expected
+    assert decksdir.joinpath("invalido.zip").read_bytes() == b"invalido"
+
+
+def test_generate_many_without_decks(synthetic_deck):
+    pattern = str(synthetic_deck.basedir.joinpath("*.rar"))
+    assert generate_many(str(synthetic_deck.clustersdir), [pattern]) == []
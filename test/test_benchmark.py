@@ -0,0 +1,48 @@
+import logging
+import os
+
+from app.utils.log import Log
+from benchmark.runner import compare, parse_size, run
+from benchmark.synthetic import Size
+
+
+def test_parse_size():
+    assert parse_size("3,2,12") == Size(3, 2, 12)
+    assert parse_size("pequeno").clusters == 10
+
+
+def test_run():
+    environ = dict(os.environ)
+    logger = Log.LOGGER
+    main = logging.getLogger("main")
+    handlers, level = list(main.handlers), main.level
+    results = run([Size(3, 2, 12)], 2, ["generate[ZIP]", "compress_files"])
+    # The environment and the log are left as they were
+    assert dict(os.environ) == environ
+    assert Log.LOGGER is logger
+    assert (main.handlers, main.level) == (handlers, level)
+    stages = [r["etapa"] for r in results["resultados"]]
+    assert stages == [
+        "files.compress_files",
+        "files.compress_files[origem]",
+        "generation.generate[ZIP]",
+    ]
+    for r in results["resultados"]:
+        assert r["tamanho"] == {
+            "clusters": 3,
+            "anos_historico": 2,
+            "meses_capacidade": 12,
+        }
+        assert len(r["tempos"]) == 2
+        assert r["minimo"] <= r["mediana"]
+    lines = compare(results, results)
+    assert len(lines) == 1 + len(stages)
+    assert all(line.endswith("1.00") for line in lines[1:])
+
+
+def test_run_with_configured_log(environment):
+    logger = Log.log()
+    run([Size(2, 1, 12)], 1, ["compress_files[origem]"])
+    assert Log.LOGGER is logger
+    assert logger.level == logging.INFO
+    assert os.environ["APP_BASEDIR"] == str(environment)
@@ -0,0 +1,186 @@
+import logging
+import os
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+import pytest
+
+import app.adapters.repository.clusters as clusters
+from app.adapters.repository.clusters import ClustersDataCache, _read_csv
+
+
+@pytest.fixture
+def cache():
+    cache = ClustersDataCache()
+    cache.invalidate()
+    yield cache
+    cache.invalidate()
+
+
+def __write(path, n: int, value: float = 1.0) -> str:
+    pd.DataFrame(
+        {
+            "cluster": [f"cluster_{i}" for i in range(n)],
+            "data_hora": ["2024-01-01"] * n,
+            "vento": np.full(n, value),
+        }
+    ).to_csv(path, index=False)
+    return str(path)
+
+
+class Loader:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, path: str) -> pd.DataFrame:
+        self.calls += 1
+        return _read_csv(path)
+
+
+def test_hits_and_invalidation(cache, tmp_path):
+    path = __write(tmp_path.joinpath("vento_medio.csv"), 5)
+    load = Loader()
+    first = cache.get(path, load)
+    second = cache.get(path, load)
+    assert load.calls == 1
+    assert first.equals(second)
+    # A change of the file is seen through its mtime and size
+    __write(path, 6, 2.0)
+    changed = cache.get(path, load)
+    assert load.calls == 2
+    assert list(changed["vento"]) == [2.0] * 6
+    # A change that keeps the size is seen through the mtime
+    __write(path, 6, 3.0)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert list(cache.get(path, load)["vento"]) == [3.0] * 6
+    assert load.calls == 3
+    # Only the current version of the file is kept
+    assert len(cache._entries) == 1
+
+
+def test_invalidate(cache, tmp_path):
+    a = __write(tmp_path.joinpath("a.csv"), 3)
+    b = __write(tmp_path.joinpath("b.csv"), 3)
+    load = Loader()
+    cache.get(a, load)
+    cache.get(b, load)
+    cache.invalidate(a)
+    cache.get(a, load)
+    cache.get(b, load)
+    assert load.calls == 3
+    cache.invalidate()
+    assert cache.size == 0
+    cache.get(b, load)
+    assert load.calls == 4
+
+
+def test_eviction(cache, tmp_path, monkeypatch):
+    paths = [__write(tmp_path.joinpath(f"{i}.csv"), 100) for i in range(3)]
+    load = Loader()
+    cache.get(paths[0], load)
+    entry = cache.size
+    monkeypatch.setattr(cache, "max_bytes", 2 * entry)
+    cache.get(paths[1], load)
+    # The first file becomes the most recently used one
+    cache.get(paths[0], load)
+    cache.get(paths[2], load)
+    assert cache.size <= cache.max_bytes
+    assert load.calls == 3
+    cache.get(paths[0], load)
+    assert load.calls == 3
+    cache.get(paths[1], load)
+    assert load.calls == 4
+    # Files larger than the limit are never kept
+    monkeypatch.setattr(cache, "max_bytes", entry // 2)
+    cache.invalidate()
+    cache.get(paths[0], load)
+    cache.get(paths[0], load)
+    assert load.calls == 6
+    assert cache.size == 0
+
+
+def test_read_only_views(cache, tmp_path):
+    path = __write(tmp_path.joinpath("vento_medio.csv"), 4)
+    view = cache.get(path, _read_csv)
+    with pytest.raises(ValueError):
+        view["vento"].to_numpy()[0] = 10.0
+    with pytest.raises(ValueError):
+        view["data_hora"].to_numpy()[0] = np.datetime64("2000-01-01")
+    # Replacing the columns of a view does not change the cache
+    view["vento"] = view["vento"] * 2
+    view["cluster"] = view["cluster"].cat.rename_categories(
+        lambda c: c.upper()
+    )
+    other = cache.get(path, _read_csv)
+    assert list(other["vento"]) == [1.0] * 4
+    assert list(other["cluster"])[0] == "cluster_0"
+
+
+def __fail(path: str):
+    raise AssertionError(f"{path} lido do CSV")
+
+
+def test_sidecar_rebuilt(tmp_path, monkeypatch):
+    path = __write(tmp_path.joinpath("vento_medio.csv"), 4)
+    expected = _read_csv(path)
+    assert clusters._read_with_sidecar(path).equals(expected)
+    sidecar = path + clusters.SIDECAR_EXTENSION
+    assert os.path.isfile(sidecar)
+    # The next readings do not parse the CSV
+    with monkeypatch.context() as m:
+        m.setattr(clusters, "_read_csv", __fail)
+        df = clusters._read_with_sidecar(path)
+    assert df.equals(expected)
+    assert isinstance(df["cluster"].dtype, pd.CategoricalDtype)
+    # A change of the CSV rebuilds it
+    __write(path, 5, 2.0)
+    assert list(clusters._read_with_sidecar(path)["vento"]) == [2.0] * 5
+    with monkeypatch.context() as m:
+        m.setattr(clusters, "_read_csv", __fail)
+        assert list(clusters._read_with_sidecar(path)["vento"]) == [2.0] * 5
+
+
+def test_stale_sidecar(tmp_path, monkeypatch):
+    path = __write(tmp_path.joinpath("vento_medio.csv"), 4)
+    other = __write(tmp_path.joinpath("outro.csv"), 7, 5.0)
+    # A sidecar written for other contents is not used
+    clusters._save_sidecar(path, os.stat(other), _read_csv(other))
+    assert clusters._load_sidecar(path, os.stat(path)) is None
+    assert clusters._read_with_sidecar(path).equals(_read_csv(path))
+    # Neither is one written by another version
+    monkeypatch.setattr(clusters, "SIDECAR_VERSION", 2)
+    assert clusters._load_sidecar(path, os.stat(path)) is None
+    # Nor a corrupted one
+    with open(path + clusters.SIDECAR_EXTENSION, "wb") as f:
+        f.write(b"corrompido")
+    assert clusters._read_with_sidecar(path).equals(_read_csv(path))
+
+
+def test_unwritable_sidecar(tmp_path, monkeypatch, environment, caplog):
+    path = __write(tmp_path.joinpath("vento_medio.csv"), 4)
+
+    def denied(*args, **kwargs):
+        raise PermissionError("somente leitura")
+
+    monkeypatch.setattr(clusters.tempfile, "mkstemp", denied)
+    with caplog.at_level(logging.WARNING):
+        df = clusters._read_with_sidecar(path)
+    assert df.equals(_read_csv(path))
+    assert "cache binário" in caplog.text
+    assert os.listdir(tmp_path) == ["vento_medio.csv"]
+
+
+def test_failed_sidecar_replace(tmp_path, monkeypatch, environment, caplog):
+    path = __write(tmp_path.joinpath("vento_medio.csv"), 4)
+
+    def denied(*args, **kwargs):
+        raise PermissionError("somente leitura")
+
+    monkeypatch.setattr(clusters.os, "replace", denied)
+    with caplog.at_level(logging.WARNING):
+        df = clusters._read_with_sidecar(path)
+    assert df.equals(_read_csv(path))
+    assert "cache binário" in caplog.text
+    # The partial file is removed
+    assert os.listdir(tmp_path) == ["vento_medio.csv"]
@@ -0,0 +1,30 @@
+from app.utils.encoding import (
+    convert_encoding,
+    decode_text,
+    detect_encoding,
+)
+
+TEXT = "PATAMAR DE CARGA - GERAÇÃO EÓLICA “NÃO SIMULADA”"
+
+
+def test_detection_order():
+    assert detect_encoding(b"ascii only") == "utf-8"
+    assert detect_encoding(TEXT.encode("utf-8")) == "utf-8"
+    assert detect_encoding(TEXT.encode("cp1252")) == "cp1252"
+    # 0x81 is not defined in cp1252
+    latin = "GERAÇÃO".encode("iso-8859-1") + b"\x81"
+    assert detect_encoding(latin) == "iso-8859-1"
+    assert decode_text(TEXT.encode("cp1252")) == TEXT
+
+
+def test_convert_encoding_idempotent(tmp_path):
+    path = tmp_path.joinpath("sistema.dat")
+    path.write_bytes(TEXT.encode("cp1252"))
+    assert convert_encoding(str(path)) == "cp1252"
+    converted = path.read_bytes()
+    assert converted == TEXT.encode("utf-8")
+    mtime = path.stat().st_mtime_ns
+    # A converted file is not written again
+    assert convert_encoding(str(path)) == "utf-8"
+    assert path.read_bytes() == converted
+    assert path.stat().st_mtime_ns == mtime
@@ -0,0 +1,175 @@
+from zipfile import ZipFile, ZIP_DEFLATED, ZIP_STORED
+import os
+import tracemalloc
+from typing import Tuple
+import zipfile
+
+from inewave.newave.eolicahistorico import EolicaHistorico
+from inewave.newave.modelos.eolicahistorico import RegistroHistoricoVento
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from app.adapters.repository.newave import _counted_bytes
+import app.domain.commands as commands
+import app.services.handlers.files as files
+from app.utils.profiling import Profiler
+from app.utils.registertable import RegisterTable, RegisterTableFile
+
+MEMBERS = {
+    "a.dat": (b"linha do arquivo a\n" * 2000, ZIP_DEFLATED),
+    "b.dat": (os.urandom(5000), ZIP_STORED),
+    "c.dat": (b"c" * 100, ZIP_DEFLATED),
+}
+
+
+def __source_zip(path) -> str:
+    with ZipFile(path, "w") as z:
+        for name, (data, compression) in MEMBERS.items():
+            z.writestr(name, data, compression)
+    return str(path)
+
+
+def __infos(path):
+    with ZipFile(path, "r") as z:
+        return {
+            i.filename: (i.CRC, i.compress_size, i.file_size, z.read(i))
+            for i in z.infolist()
+        }
+
+
+def __check_kept(before, after):
+    for name in MEMBERS:
+        crc, compress_size, file_size, data = after[name]
+        assert (crc, file_size, data) == (
+            before[name][0],
+            before[name][2],
+            before[name][3],
+        )
+        assert data == MEMBERS[name][0]
+
+
+def test_raw_copy(environment):
+    zippath = __source_zip(environment.joinpath("deck.zip"))
+    before = __infos(zippath)
+    files.compress_files(
+        commands.AddFilesToZip(zippath, {"c.dat": b"novo", "d.dat": b"d"})
+    )
+    after = __infos(zippath)
+    # The compressed data of the kept members is copied as is
+    for name in ["a.dat", "b.dat"]:
+        assert after[name] == before[name]
+    assert after["c.dat"][3] == b"novo"
+    assert after["d.dat"][3] == b"d"
+    with ZipFile(zippath, "r") as z:
+        assert z.testzip() is None
+        assert z.namelist() == ["a.dat", "b.dat", "c.dat", "d.dat"]
+
+
+def test_copy_from_other_zip(environment):
+    srczip = __source_zip(environment.joinpath("base.zip"))
+    output = str(environment.joinpath("variante.zip"))
+    other = str(environment.joinpath("outro.zip"))
+    with ZipFile(other, "w") as z:
+        z.writestr("e.dat", b"e" * 3000, ZIP_DEFLATED)
+    files.compress_files(
+        commands.AddFilesToZip(
+            output, {"e.dat": commands.ZipMember(other, "e.dat")}, srczip
+        )
+    )
+    after = __infos(output)
+    assert after["e.dat"] == __infos(other)["e.dat"]
+    for name in MEMBERS:
+        assert after[name] == __infos(srczip)[name]
+
+
+def test_recompressed_copy(environment, monkeypatch):
+    # Without the zipfile internals, the members are copied again
+    monkeypatch.setattr(files, "_raw_copy_supported", lambda zout: False)
+    zippath = __source_zip(environment.joinpath("deck.zip"))
+    before = __infos(zippath)
+    files.compress_files(commands.AddFilesToZip(zippath, {"d.dat": b"d"}))
+    after = __infos(zippath)
+    __check_kept(before, after)
+    with ZipFile(zippath, "r") as z:
+        assert z.testzip() is None
+
+
+def test_streamed_members(environment):
+    zippath = __source_zip(environment.joinpath("deck.zip"))
+    small = [b"pequeno\n"] * 10
+    large = [os.urandom(files.ZIP_STREAM_BUFFER_SIZE // 4)] * 6
+    files.compress_files(
+        commands.AddFilesToZip(
+            zippath, {"p.dat": iter(small), "g.dat": iter(large)}
+        )
+    )
+    with ZipFile(zippath, "r") as z:
+        assert z.read("p.dat") == b"".join(small)
+        assert z.read("g.dat") == b"".join(large)
+        # Only the member larger than the buffer is written as ZIP64
+        assert z.getinfo("p.dat").extract_version < zipfile.ZIP64_VERSION
+        assert z.getinfo("g.dat").extract_version >= zipfile.ZIP64_VERSION
+
+
+def __stream_hist_ventos(zippath: str, parts: int) -> Tuple[int, int]:
+    """
+    Escreve um hist-ventos.csv produzido em partes de 1000 registros,
+    retornando o tamanho do arquivo e o pico de memória da escrita.
+    """
+    records = 1000
+    dates = pd.date_range("1979-01-01", periods=records, freq="D").to_numpy()
+
+    def winds():
+        for i in range(parts):
+            yield RegisterTable(
+                RegistroHistoricoVento,
+                {
+                    "codigo_posto": np.full(records, i + 1),
+                    "data_inicial": dates,
+                    "data_final": dates,
+                    "velocidade": np.linspace(0.0, 20.0, records),
+                    "direcao": np.zeros(records),
+                },
+            )
+
+    file = RegisterTableFile(EolicaHistorico, [winds])
+    tracemalloc.start()
+    try:
+        files.compress_files(
+            commands.AddFilesToZip(
+                zippath,
+                {"hist-ventos.csv": _counted_bytes("hist-ventos.csv", file)},
+            )
+        )
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    with ZipFile(zippath, "r") as z:
+        with z.open("hist-ventos.csv") as f:
+            assert sum(1 for _ in f) == parts * records
+        return z.getinfo("hist-ventos.csv").file_size, peak
+
+
+def test_streamed_memory(environment, monkeypatch):
+    monkeypatch.setattr(files, "ZIP_STREAM_BUFFER_SIZE", 2**16)
+    zippath = __source_zip(environment.joinpath("deck.zip"))
+    small, small_peak = __stream_hist_ventos(zippath, 8)
+    Profiler.enable()
+    try:
+        large, large_peak = __stream_hist_ventos(zippath, 48)
+    finally:
+        Profiler.disable()
+    # The memory does not grow with the file, which is never whole
+    # in memory
+    assert large > 1.5 * 2**20
+    assert large_peak < small_peak * 1.5
+    assert large_peak < large / 2
+    # The production of the parts is recorded inside the compression
+    stages = {s["etapa"]: s for s in Profiler.stages()}
+    assert stages["escrita hist-ventos.csv"]["chamadas"] == 48 + 1
+    assert (
+        stages["escrita hist-ventos.csv"]["nivel"]
+        == stages["compress_files"]["nivel"] + 1
+    )
+    assert Profiler.FILES["hist-ventos.csv"]["registros"] == 48 * 1000
+    Profiler.reset()
@@ -0,0 +1,124 @@
+from concurrent.futures import ThreadPoolExecutor
+from zipfile import ZipFile
+import io
+import shutil
+
+import pandas as pd  # type: ignore
+import pytest
+
+from app.services.handlers.generation import generate
+from app.utils.profiling import Profiler
+from test.conftest import zip_contents
+
+
+@pytest.mark.parametrize("repository", ["FS", "ZIP"])
+def test_concurrent_decks(synthetic_deck, repository):
+    decks = []
+    for i in range(6):
+        deck = synthetic_deck.basedir.joinpath(f"deck{i}.zip")
+        shutil.copyfile(synthetic_deck.deck, deck)
+        decks.append(deck)
+
+    def run(i: int) -> bool:
+        settings = synthetic_deck.settings(REPOSITORIO_DECK=repository)
+        settings.newave_deck_zip = str(decks[i])
+        settings.tmpdir = str(synthetic_deck.basedir.joinpath(f"tmp{i}"))
+        return generate(settings)
+
+    assert all(run(i) for i in range(3))
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        assert all(pool.map(run, range(3, 6)))
+    expected = zip_contents(decks[0])
+    assert "eolica-geracao.csv" in expected
+    for deck in decks[1:]:
+        assert zip_contents(deck) == expected
+
+
+def test_profile_of_another_deck(synthetic_deck, caplog):
+    settings = synthetic_deck.settings(PERFIL_EXECUCAO=1)
+    # Another deck of the process is being profiled
+    assert Profiler.try_enable()
+    try:
+        with Profiler.span("outro deck"):
+            assert generate(settings)
+        assert Profiler.ENABLED
+        assert "não será registrado" in caplog.text
+    finally:
+        Profiler.disable()
+    assert Profiler.spans()[0].name == "outro deck"
+    Profiler.reset()
+
+
+def test_profile_after_invalid_deck(synthetic_deck, caplog):
+    invalid = synthetic_deck.basedir.joinpath("invalido.zip")
+    invalid.write_bytes(b"conteudo invalido")
+    settings = synthetic_deck.settings(PERFIL_EXECUCAO=1, METRICAS_EXECUCAO=1)
+    settings.newave_deck_zip = str(invalid)
+    assert not generate(settings)
+    assert not Profiler.ENABLED
+    # The next deck of the process is profiled
+    assert generate(synthetic_deck.settings(PERFIL_EXECUCAO=1))
+    assert "não será registrado" not in caplog.text
+    assert any(s.name == "geradeck" for s in Profiler.spans())
+    Profiler.reset()
+
+
+@pytest.mark.parametrize("repository", ["FS", "ZIP"])
+def test_incremental_generation(synthetic_deck, repository):
+    original = synthetic_deck.basedir.joinpath("original.zip")
+    shutil.copyfile(synthetic_deck.deck, original)
+    settings = synthetic_deck.settings(REPOSITORIO_DECK=repository)
+    assert generate(settings)
+    first = synthetic_deck.deck.read_bytes()
+    # Nothing changed: the deck is not rewritten
+    assert generate(synthetic_deck.settings(REPOSITORIO_DECK=repository))
+    assert synthetic_deck.deck.read_bytes() == first
+    # Only the file built from the changed input is generated again
+    wind = synthetic_deck.clustersdir.joinpath(settings.average_wind_file)
+    history = pd.read_csv(wind)
+    history.loc[0, "vento"] += 1.0
+    history.to_csv(wind, index=False)
+    assert generate(synthetic_deck.settings(REPOSITORIO_DECK=repository))
+    with ZipFile(io.BytesIO(first)) as before, ZipFile(
+        synthetic_deck.deck
+    ) as after:
+        # The generated members are written again at the end
+        assert sorted(before.namelist()) == sorted(after.namelist())
+        changed = [
+            n
+            for n in after.namelist()
+            if before.getinfo(n).CRC != after.getinfo(n).CRC
+        ]
+        kept = [n for n in after.namelist() if n not in changed]
+        assert all(before.read(n) == after.read(n) for n in kept)
+    assert sorted(changed) == [
+        settings.histventos_file,
+        settings.manifest_file,
+    ]
+    # The deck is the same as one generated from scratch
+    settings = synthetic_deck.settings(
+        REPOSITORIO_DECK=repository, GERACAO_INCREMENTAL=0
+    )
+    settings.newave_deck_zip = str(original)
+    assert generate(settings)
+    assert zip_contents(original) == zip_contents(synthetic_deck.deck)
+
+
+@pytest.mark.parametrize("repository", ["FS", "ZIP"])
+def test_generation_with_another_block(synthetic_deck, repository):
+    original = synthetic_deck.basedir.joinpath("original.zip")
+    shutil.copyfile(synthetic_deck.deck, original)
+    assert generate(synthetic_deck.settings(REPOSITORIO_DECK=repository))
+    # The rows taken from block 3 return to the deck before block 2 is
+    # taken from it
+    assert generate(
+        synthetic_deck.settings(
+            REPOSITORIO_DECK=repository, BLOCO_NAO_SIMULADAS_EOLICA=2
+        )
+    )
+    settings = synthetic_deck.settings(
+        REPOSITORIO_DECK=repository, BLOCO_NAO_SIMULADAS_EOLICA=2
+    )
+    settings.newave_deck_zip = str(original)
+    assert generate(settings)
+    assert zip_contents(original) == zip_contents(synthetic_deck.deck)
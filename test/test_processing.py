@@ -0,0 +1,158 @@
+import logging
+
+import pandas as pd  # type: ignore
+
+import app.domain.commands as commands
+import app.domain.messages as messages
+import app.services.handlers.processing as processing
+from app.services.handlers.processing import MONTHS
+
+
+class Clusters:
+    def __init__(self, **frames):
+        self.frames = frames
+
+    def __getattr__(self, name: str):
+        # get_clusters, get_installed_capacity, ...
+        frame = self.frames[name[len("get_") :]]
+        return lambda: frame.copy()
+
+
+class Newave:
+    def __init__(self):
+        self.files = {}
+
+    def __getattr__(self, name: str):
+        # set_eolicacadastro, set_histventos, ...
+        return lambda file: self.files.__setitem__(name[len("set_") :], file)
+
+
+class UnitOfWork:
+    def __init__(self, **repositories):
+        self.__dict__.update(repositories)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+def __tables(file) -> list:
+    return [t.data for t in file.iter_tables()]
+
+
+def __depths(submarket: int, year: int, block: int) -> list:
+    return [submarket * 1000 + year * 10 + block + m / 100 for m in range(12)]
+
+
+def test_block_depths_after_study():
+    year, study, post, numblocks = 2024, 2, 3, 2
+    rows = []
+    for sub in [1, 2]:
+        for y in range(year, year + study):
+            for b in range(numblocks):
+                rows.append([sub, y] + __depths(sub, y, b))
+    blockdepths = pd.DataFrame(rows, columns=["Subsistema", "Ano"] + MONTHS)
+    depths = processing.__block_depths(
+        blockdepths, [1, 2], year, study, post, numblocks
+    )
+    assert depths.shape == (2, study + post, 12, numblocks)
+    for i, sub in enumerate([1, 2]):
+        for y in range(study + post):
+            # The years after the study repeat the last study year
+            source = year + min(y, study - 1)
+            for b in range(numblocks):
+                assert list(depths[i, y, :, b]) == __depths(sub, source, b)
+
+
+def test_installed_capacity_carried_forward(environment, caplog):
+    clusters = pd.DataFrame({"cluster": ["a", "b", "c"], "submercado": 1})
+    # From 11/2024 to the first post-study month, 01/2026
+    months = pd.date_range("2024-11-01", "2026-01-01", freq="MS")
+    ends = {"a": months[-1], "b": months[4], "c": months[7]}
+    capacity = pd.concat(
+        [
+            pd.DataFrame(
+                {
+                    "data_hora": months[months <= end] + pd.Timedelta(days=8),
+                    "capacidade_instalada": range((months <= end).sum()),
+                    "cluster": name,
+                }
+            )
+            for name, end in ends.items()
+        ]
+    )
+    capacity["cluster"] = capacity["cluster"].astype("category")
+    nw_uow = UnitOfWork(newave=Newave())
+    clusters_uow = UnitOfWork(
+        clusters=Clusters(clusters=clusters, installed_capacity=capacity)
+    )
+    command = commands.GenerateEolicaCadastro(1, 11, 2024, 0, 2, 1)
+    with caplog.at_level(logging.INFO):
+        processing.generate_eolicacadastro(command, nw_uow, clusters_uow)
+    _, potencias = __tables(nw_uow.newave.files["eolicacadastro"])
+    assert potencias["codigo_pee"].value_counts().to_dict() == {
+        1: 15,
+        3: 9,
+        2: 6,
+    }
+    for code, gap in [(2, 5), (3, 8)]:
+        periods = potencias.loc[potencias["codigo_pee"] == code]
+        # The last known value is kept from the first period without
+        # data until the end of the horizon
+        assert list(periods["potencia_instalada"]) == list(range(gap)) + [
+            gap - 1
+        ]
+        assert list(periods["periodo_inicial"]) == list(months[: gap + 1])
+        assert list(periods["periodo_final"]) == list(months[:gap]) + [
+            pd.Timestamp("2027-12-01")
+        ]
+    # A single warning lists every cluster without data
+    warnings = [r for r in caplog.records if r.levelno == logging.WARNING]
+    assert len(warnings) == 1
+    assert "para 2 clusters" in warnings[0].message
+    assert "b (04/2025" in warnings[0].message
+    assert "c (07/2025" in warnings[0].message
+
+
+def test_history_order(environment, monkeypatch):
+    # The records are split in parts that do not match the clusters
+    monkeypatch.setattr(processing, "CHUNK_RECORDS", 7)
+    dates = pd.date_range("1979-01-01", "1981-01-01", freq="MS")
+    # Interleaved clusters, with a cluster that is not in the deck and
+    # months after the last January
+    names = ["b", "x", "a"]
+    history = pd.DataFrame(
+        {
+            "cluster": pd.Categorical(
+                [n for _ in dates for n in names] + ["a", "b"]
+            ),
+            "data_hora": [d for d in dates for _ in names]
+            + [pd.Timestamp("1981-02-01")] * 2,
+            "vento": [float(i) for i in range(len(dates) * len(names) + 2)],
+        }
+    )
+    nw_uow = UnitOfWork(newave=Newave())
+    clusters_uow = UnitOfWork(clusters=Clusters(average_wind=history))
+    index = messages.ClustersIndex({"a": 7, "b": 9}, {7: 1, 9: 2})
+    processing.generate_eolicahistorico(
+        commands.GenerateEolicaHistorico(index), nw_uow, clusters_uow
+    )
+    horizon, *winds = __tables(nw_uow.newave.files["histventos"])
+    assert list(horizon.iloc[0]) == [
+        pd.Timestamp("1979-01-01"),
+        pd.Timestamp("1981-01-01"),
+    ]
+    assert len(winds) > 2
+    records = pd.concat(winds)
+    # The clusters follow the index order, each with its dates in order
+    assert list(records["codigo_posto"]) == [7] * len(dates) + [9] * len(dates)
+    for code, name in [(7, "a"), (9, "b")]:
+        cluster = records.loc[records["codigo_posto"] == code]
+        assert list(cluster["data_inicial"]) == list(dates)
+        expected = history.loc[
+            (history["cluster"] == name) & (history["data_hora"] <= dates[-1]),
+            "vento",
+        ]
+        assert list(cluster["velocidade"]) == list(expected)
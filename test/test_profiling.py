@@ -0,0 +1,84 @@
+import json
+
+from app.utils.profiling import Profiler, profiled
+from app.utils.scheduler import Stage, run_stages
+
+
+@profiled("teste")
+def __work():
+    return 1
+
+
+def test_disabled():
+    Profiler.disable()
+    with Profiler.span("nada"):
+        pass
+    assert __work() == 1
+    assert Profiler.spans() == []
+
+
+def test_spans(tmp_path):
+    Profiler.enable()
+    with Profiler.span("raiz", "comando"):
+        run_stages(
+            [
+                Stage("a", __work),
+                Stage("b", __work, ["a"]),
+                Stage("c", __work),
+            ]
+        )
+        __work()
+    Profiler.disable()
+    spans = {(s.name, s.depth) for s in Profiler.spans()}
+    assert spans == {
+        ("raiz", 0),
+        ("a", 1),
+        ("b", 1),
+        ("c", 1),
+        ("__work", 1),
+        ("__work", 2),
+    }
+    summary = Profiler.summary().splitlines()
+    assert summary[1].startswith("raiz ")
+    assert [line.split()[0] for line in summary[1:]].count("__work") == 1
+    path = tmp_path.joinpath("trace.json")
+    Profiler.write_trace(str(path), deck="deck.zip")
+    trace = json.loads(path.read_text())
+    assert len(trace["traceEvents"]) == 8
+    assert trace["otherData"] == {"deck": "deck.zip"}
+    assert all(e["ph"] == "X" for e in trace["traceEvents"])
+
+
+def test_memory_and_files(tmp_path):
+    Profiler.enable(memory=True)
+    with Profiler.span("raiz"):
+        with Profiler.span("alocacao"):
+            data = bytearray(8 * 2**20)
+            del data
+        Profiler.record("arquivo.csv", registros=3)
+        Profiler.record("arquivo.csv", bytes=10)
+    Profiler.disable()
+    Profiler.record("ignorado.csv", registros=1)
+    peaks = {s.name: s.memory for s in Profiler.spans()}
+    assert peaks["alocacao"] >= 8 * 2**20
+    assert peaks["raiz"] >= peaks["alocacao"]
+    assert "MEMÓRIA (MB)" in Profiler.summary()
+    path = tmp_path.joinpath("metricas.json")
+    Profiler.write_report(str(path), deck="deck.zip")
+    report = json.loads(path.read_text())
+    assert report["deck"] == "deck.zip"
+    assert report["arquivos"] == {"arquivo.csv": {"registros": 3, "bytes": 10}}
+    assert [s["etapa"] for s in report["etapas"]] == ["raiz", "alocacao"]
+
+
+def test_single_owner():
+    Profiler.disable()
+    assert Profiler.try_enable()
+    with Profiler.span("primeiro"):
+        # A second execution does not reset the first one
+        assert not Profiler.try_enable()
+    Profiler.disable()
+    assert [s.name for s in Profiler.spans()] == ["primeiro"]
+    assert Profiler.try_enable()
+    Profiler.disable()
+    Profiler.reset()
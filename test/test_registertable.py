@@ -0,0 +1,189 @@
+from datetime import datetime
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from cfinterface.components.defaultregister import DefaultRegister
+from cfinterface.data.registerdata import RegisterData
+from inewave.newave.eolicacadastro import EolicaCadastro
+from inewave.newave.eolicaconfiguracao import EolicaConfiguracao
+from inewave.newave.eolicafte import EolicaFTE
+from inewave.newave.eolicageracao import EolicaGeracao
+from inewave.newave.eolicahistorico import EolicaHistorico
+from inewave.newave.eolicaposto import EolicaPosto
+from inewave.newave.eolicasubmercado import EolicaSubmercado
+from inewave.newave.modelos.eolicacadastro import (
+    RegistroPEECadastro,
+    RegistroPEEPotenciaInstaladaPeriodo,
+)
+from inewave.newave.modelos.eolicaconfiguracao import (
+    RegistroPEEConfiguracaoPeriodo,
+)
+from inewave.newave.modelos.eolicafte import RegistroPEEFTE
+from inewave.newave.modelos.eolicageracao import RegistroPEEGeracaoPatamar
+from inewave.newave.modelos.eolicahistorico import (
+    RegistroHistoricoVento,
+    RegistroHistoricoVentoHorizonte,
+)
+from inewave.newave.modelos.eolicaposto import (
+    RegistroPEEPostoVento,
+    RegistroPostoVentoCadastro,
+)
+from inewave.newave.modelos.eolicasubmercado import RegistroPEESubmercado
+
+from app.adapters.repository.newave import _write_to_buffer
+from app.utils.registertable import RegisterTable, RegisterTableFile
+
+N = 500
+RNG = np.random.default_rng(42)
+CODES = RNG.integers(1, 1000, N)
+DATES = pd.date_range("1979-01-01", periods=N, freq="MS").to_numpy()
+NAMES = [f" cluster_{i} " for i in range(N)]
+
+
+def __floats(scale: float) -> np.ndarray:
+    values = RNG.normal(scale=scale, size=N)
+    # Values that are rounded to a tie, that need fewer digits to fit
+    # in the field and that are missing
+    values[:6] = [0.125, -0.00005, 2.5, 1e15, -123456789.123456789, np.nan]
+    return values
+
+
+def __register_file(filetype, tables) -> bytes:
+    file = filetype(data=RegisterData(DefaultRegister(data="")))
+    for table in tables:
+        for row in table.data.itertuples(index=False):
+            register = table.registertype()
+            register.data = list(row)
+            file.append_registro(register)
+    return _write_to_buffer(file)
+
+
+def __assert_same_output(filetype, tables):
+    expected = __register_file(filetype, tables)
+    obtained = _write_to_buffer(RegisterTableFile(filetype, tables))
+    assert obtained == expected
+
+
+def test_eolicacadastro():
+    __assert_same_output(
+        EolicaCadastro,
+        [
+            RegisterTable(RegistroPEECadastro, {"c": CODES, "n": NAMES}),
+            RegisterTable(
+                RegistroPEEPotenciaInstaladaPeriodo,
+                {"c": CODES, "i": DATES, "f": DATES, "p": __floats(1e4)},
+            ),
+        ],
+    )
+
+
+def test_eolicasubmercado():
+    __assert_same_output(
+        EolicaSubmercado,
+        [RegisterTable(RegistroPEESubmercado, {"c": CODES, "s": CODES})],
+    )
+
+
+def test_eolicaconfig():
+    __assert_same_output(
+        EolicaConfiguracao,
+        [
+            RegisterTable(
+                RegistroPEEConfiguracaoPeriodo,
+                {"c": CODES, "i": DATES, "f": DATES, "e": ["fixo"] * N},
+            )
+        ],
+    )
+
+
+def test_eolicafte():
+    __assert_same_output(
+        EolicaFTE,
+        [
+            RegisterTable(
+                RegistroPEEFTE,
+                {
+                    "c": CODES,
+                    "i": DATES,
+                    "f": DATES,
+                    "b0": __floats(0.3),
+                    "b1": __floats(0.1),
+                },
+            )
+        ],
+    )
+
+
+def test_eolicaposto():
+    __assert_same_output(
+        EolicaPosto,
+        [
+            RegisterTable(
+                RegistroPostoVentoCadastro, {"c": CODES, "n": NAMES}
+            ),
+            RegisterTable(RegistroPEEPostoVento, {"c": CODES, "p": CODES}),
+        ],
+    )
+
+
+def test_histventos():
+    __assert_same_output(
+        EolicaHistorico,
+        [
+            RegisterTable(
+                RegistroHistoricoVentoHorizonte,
+                {"i": [datetime(1979, 1, 1)], "f": [datetime(2021, 1, 1)]},
+            ),
+            RegisterTable(
+                RegistroHistoricoVento,
+                {
+                    "c": CODES,
+                    "i": DATES,
+                    "f": DATES,
+                    "v": __floats(5.0),
+                    "d": np.zeros(N),
+                },
+            ),
+        ],
+    )
+
+
+def test_eolicageracao():
+    __assert_same_output(
+        EolicaGeracao,
+        [
+            RegisterTable(
+                RegistroPEEGeracaoPatamar,
+                {
+                    "c": CODES,
+                    "i": DATES,
+                    "f": DATES,
+                    "p": RNG.integers(1, 4, N),
+                    "v": __floats(1.0),
+                },
+            )
+        ],
+    )
+
+
+def test_chunked_tables():
+    data = {
+        "c": CODES,
+        "i": DATES,
+        "f": DATES,
+        "p": RNG.integers(1, 4, N),
+        "v": __floats(1.0),
+    }
+    table = RegisterTable(RegistroPEEGeracaoPatamar, data)
+
+    def chunks():
+        for start in range(0, N, 7):
+            yield RegisterTable(
+                RegistroPEEGeracaoPatamar,
+                {k: v[start : start + 7] for k, v in data.items()},
+            )
+
+    expected = _write_to_buffer(RegisterTableFile(EolicaGeracao, [table]))
+    chunked = RegisterTableFile(EolicaGeracao, [chunks])
+    assert b"".join(chunked.iter_bytes()) == expected
+    assert _write_to_buffer(chunked) == expected
@@ -0,0 +1,71 @@
+import pytest
+
+from app.utils.scheduler import Stage, run_stages
+
+
+class Recorder:
+    def __init__(self):
+        self.events = []
+
+    def stage(self, name: str, error=None):
+        def run():
+            self.events.append(name)
+            if error is not None:
+                raise error
+            return name.upper()
+
+        return run
+
+
+def test_order():
+    r = Recorder()
+    stages = [
+        Stage("fte", r.stage("fte"), ["cadastro"]),
+        Stage("cadastro", r.stage("cadastro")),
+        Stage("submercado", r.stage("submercado")),
+        Stage("geracao", r.stage("geracao"), ["cadastro", "submercado"]),
+        Stage("posto", r.stage("posto")),
+    ]
+    results = run_stages(stages)
+    # The declaration order is kept when the dependencies allow it
+    assert r.events == ["cadastro", "fte", "submercado", "geracao", "posto"]
+    assert results == {s.name: s.name.upper() for s in stages}
+
+
+@pytest.mark.parametrize(
+    "stages, message",
+    [
+        ([Stage("a", int), Stage("a", int)], "nomes repetidos"),
+        ([Stage("a", int, ["b"])], "etapas inexistentes: \\['b'\\]"),
+        (
+            [
+                Stage("a", int, ["c"]),
+                Stage("b", int, ["a"]),
+                Stage("c", int, ["b"]),
+                Stage("d", int),
+            ],
+            "Dependência circular entre as etapas: \\['a', 'b', 'c'\\]",
+        ),
+        ([Stage("a", int, ["a"])], "Dependência circular"),
+    ],
+)
+def test_invalid_stages(stages, message):
+    r = Recorder()
+    with pytest.raises(ValueError, match=message):
+        run_stages(stages + [Stage("z", r.stage("z"))])
+    # Nothing runs before the checks
+    assert r.events == []
+
+
+def test_failure():
+    r = Recorder()
+    stages = [
+        Stage("antes", r.stage("antes")),
+        Stage("falha", r.stage("falha", KeyError("falha"))),
+        Stage("dependente", r.stage("dependente"), ["falha"]),
+        Stage("independente", r.stage("independente")),
+    ]
+    with pytest.raises(KeyError, match="falha"):
+        run_stages(stages)
+    # No stage is started after the failure
+    assert r.events == ["antes", "falha"]
@@ -0,0 +1,51 @@
+from typing import Dict
+import pathlib
+import subprocess
+import sys
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+# Only loaded by the commands that need them
+HEAVY_MODULES = ["pandas", "numpy", "inewave", "cfinterface", "dateutil"]
+# Largest share of the import time of the command handlers that the
+# CLI module may take, which does not depend on the machine speed
+STARTUP_BUDGET_SHARE = 0.25
+
+
+def __import_times(*args: str) -> Dict[str, int]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line.split("|")
+        times[module.strip()] = int(cumulative)
+    return times
+
+
+def test_help_imports():
+    modules = __import_times("main.py", "--help")
+    assert "app.app" in modules
+    heavy = [
+        m
+        for m in modules
+        if m.split(".")[0] in HEAVY_MODULES or m.startswith("app.services")
+    ]
+    assert heavy == []
+
+
+def test_startup_budget():
+    # The best of a few runs, which is less affected by the machine load
+    def best(module: str) -> int:
+        return min(
+            __import_times("-c", f"import {module}")[module] for _ in range(3)
+        )
+
+    cli = best("app.app")
+    handlers = best("app.services.handlers.generation")
+    assert cli <= STARTUP_BUDGET_SHARE * handlers
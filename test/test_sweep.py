@@ -0,0 +1,97 @@
+import shutil
+
+import pytest
+
+from app.services.handlers.generation import generate
+from app.services.handlers.sweep import generate_variants
+from benchmark.synthetic import Size, write_clusters
+from test.conftest import zip_contents
+
+
+def test_generate_variants(synthetic_deck):
+    # Clusters of another clustering, relative to the variants file
+    otherdir = synthetic_deck.basedir.joinpath("outros")
+    otherdir.mkdir()
+    settings = synthetic_deck.settings()
+    write_clusters(str(otherdir), Size(4, 2, 18), settings, seed=1)
+    variantsfile = synthetic_deck.basedir.joinpath("variantes.csv")
+    variantsfile.write_text(
+        "nome,PENALIDADE_CORTE_GERACAO_EOLICA,CLUSTERSDIR\n"
+        + "base,,\n"
+        + "penalidade,0.01,\n"
+        + "outros,,outros\n"
+    )
+    base = synthetic_deck.deck.read_bytes()
+    outdir = synthetic_deck.basedir.joinpath("variantes")
+    results = generate_variants(
+        str(synthetic_deck.clustersdir),
+        str(synthetic_deck.deck),
+        str(variantsfile),
+        str(outdir),
+    )
+    assert [r.success for r in results] == [True, True, True]
+    # The base deck is not changed
+    assert synthetic_deck.deck.read_bytes() == base
+    overrides = {
+        "base": {},
+        "penalidade": {"windcutpenalty": 0.01},
+        "outros": {"clustersdir": str(otherdir)},
+    }
+    for result, (name, values) in zip(results, overrides.items()):
+        assert result.deck == str(outdir.joinpath(f"deck_{name}.zip"))
+        # Each variant is the same as the deck processed on its own
+        standalone = synthetic_deck.basedir.joinpath(f"{name}.zip")
+        shutil.copyfile(synthetic_deck.deck, standalone)
+        settings = synthetic_deck.settings()
+        settings.newave_deck_zip = str(standalone)
+        for attribute, value in values.items():
+            setattr(settings, attribute, value)
+        assert generate(settings)
+        assert zip_contents(result.deck) == zip_contents(standalone)
+    # The penalty only changes the dger.dat
+    penalty = zip_contents(results[1].deck)
+    differ = [
+        n
+        for n, data in zip_contents(results[0].deck).items()
+        if penalty[n] != data
+    ]
+    assert sorted(differ) == ["dger.dat", "manifesto-eolicas.json"]
+
+
+def test_block_variants_of_processed_deck(synthetic_deck):
+    original = synthetic_deck.basedir.joinpath("original.zip")
+    shutil.copyfile(synthetic_deck.deck, original)
+    assert generate(synthetic_deck.settings())
+    variantsfile = synthetic_deck.basedir.joinpath("variantes.csv")
+    variantsfile.write_text(
+        "nome,BLOCO_NAO_SIMULADAS_EOLICA\n" + "bloco2,2\n" + "bloco3,3\n"
+    )
+    outdir = synthetic_deck.basedir.joinpath("variantes")
+    results = generate_variants(
+        str(synthetic_deck.clustersdir),
+        str(synthetic_deck.deck),
+        str(variantsfile),
+        str(outdir),
+    )
+    assert [r.success for r in results] == [True, True]
+    for result, block in zip(results, [2, 3]):
+        # Each variant is the same as the original deck processed with
+        # its block
+        standalone = synthetic_deck.basedir.joinpath(f"bloco{block}.zip")
+        shutil.copyfile(original, standalone)
+        settings = synthetic_deck.settings(BLOCO_NAO_SIMULADAS_EOLICA=block)
+        settings.newave_deck_zip = str(standalone)
+        assert generate(settings)
+        assert zip_contents(result.deck) == zip_contents(standalone)
+
+
+def test_invalid_variants(synthetic_deck):
+    variantsfile = synthetic_deck.basedir.joinpath("variantes.csv")
+    variantsfile.write_text("nome,DESCONHECIDA\na,1\n")
+    with pytest.raises(ValueError, match="Colunas desconhecidas"):
+        generate_variants(
+            str(synthetic_deck.clustersdir),
+            str(synthetic_deck.deck),
+            str(variantsfile),
+            str(synthetic_deck.basedir.joinpath("variantes")),
+        )
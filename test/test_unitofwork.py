@@ -0,0 +1,74 @@
+import pytest
+
+import app.services.handlers.files as files
+import app.services.handlers.generation as generation
+from app.services.unitofwork.newave import factory as nw_factory
+from app.utils.zipsession import ZipSession
+
+
+def __fail(*args, **kwargs):
+    raise RuntimeError("falha")
+
+
+@pytest.fixture(params=["FS", "ZIP"])
+def uow(request, synthetic_deck):
+    session = ZipSession(str(synthetic_deck.deck))
+    if request.param == "ZIP":
+        yield nw_factory("ZIP", session, "caso.dat")
+    else:
+        path = synthetic_deck.basedir.joinpath("extraido")
+        session.zipfile.extractall(path)
+        yield nw_factory("FS", str(path), "caso.dat")
+    session.close()
+
+
+@pytest.mark.parametrize("repository", ["FS", "ZIP"])
+@pytest.mark.parametrize(
+    "module, function",
+    [(generation, "generate_eolicageracao"), (files, "__write_stream")],
+)
+def test_failed_generate(
+    synthetic_deck, monkeypatch, repository, module, function
+):
+    monkeypatch.setattr(module, function, __fail)
+    settings = synthetic_deck.settings(REPOSITORIO_DECK=repository)
+    before = synthetic_deck.deck.read_bytes()
+    with pytest.raises(RuntimeError):
+        generation.generate(settings)
+    assert synthetic_deck.deck.read_bytes() == before
+    # No temporary copy of the deck is left behind
+    assert [
+        p.name for p in synthetic_deck.basedir.iterdir() if p.is_file()
+    ] == ["deck.zip"]
+
+
+def test_rollback(uow):
+    with uow:
+        original = uow.newave.get_patamar().usinas_nao_simuladas.copy()
+        patamar = uow.newave.get_patamar()
+        patamar.usinas_nao_simuladas = original.iloc[:1]
+        uow.newave.set_patamar(patamar)
+        assert len(uow.newave.get_patamar().usinas_nao_simuladas) == 1
+        uow.rollback()
+        assert uow.newave.dirty == []
+        read = uow.newave.get_patamar().usinas_nao_simuladas
+    assert read.equals(original)
+
+
+def test_rollback_on_error(uow):
+    with uow:
+        original = uow.newave.get_sistema().geracao_usinas_nao_simuladas
+        original = original.copy()
+    with pytest.raises(RuntimeError):
+        with uow:
+            sistema = uow.newave.get_sistema()
+            sistema.geracao_usinas_nao_simuladas = original.iloc[:0]
+            uow.newave.set_sistema(sistema)
+            __fail()
+    with uow:
+        read = uow.newave.get_sistema().geracao_usinas_nao_simuladas
+        # The changes kept between uses are only written on commit
+        patamar = uow.newave.get_patamar()
+        uow.newave.set_patamar(patamar)
+    assert read.equals(original)
+    assert uow.newave.dirty == ["patamar.dat"]
@@ -0,0 +1,51 @@
+from zipfile import ZipFile
+
+import pytest
+
+from app.utils.zipsession import ZipSession
+
+MEMBERS = {"caso.dat": b"arquivos.dat", "dger.dat": b"dger", "a.dat": b"a"}
+
+
+@pytest.fixture
+def zippath(tmp_path) -> str:
+    path = tmp_path.joinpath("deck.zip")
+    with ZipFile(path, "w") as z:
+        for name, data in MEMBERS.items():
+            z.writestr(name, data)
+    return str(path)
+
+
+def test_reads_with_one_open(zippath):
+    with ZipSession(zippath) as session:
+        opened = session.zipfile
+        assert list(session.members) == list(MEMBERS)
+        for name, data in MEMBERS.items():
+            assert session.read(name) == data
+        assert session.zipfile is opened
+    assert session._zipfile is None
+    # Reopened on demand after being closed
+    assert session.read("a.dat") == b"a"
+    session.close()
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_extract_many(zippath, tmp_path, workers):
+    target = tmp_path.joinpath(f"extraidos{workers}")
+    with ZipSession(zippath) as session:
+        paths = session.extract_many(list(MEMBERS), str(target), workers)
+    assert paths == [str(target.joinpath(n)) for n in MEMBERS]
+    for name, data in MEMBERS.items():
+        assert target.joinpath(name).read_bytes() == data
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_extract_many_missing_member(zippath, tmp_path, workers):
+    target = tmp_path.joinpath("extraidos")
+    with ZipSession(zippath) as session:
+        with pytest.raises(KeyError):
+            session.extract_many(
+                ["caso.dat", "inexistente.dat"], str(target), workers
+            )
+        # The session is still usable after the error
+        assert session.read("dger.dat") == b"dger"